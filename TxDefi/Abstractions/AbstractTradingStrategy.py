@@ -3,10 +3,10 @@ from pubsub import pub
 from abc import ABC
 import queue
 import threading
-import concurrent.futures
 from typing import TypeVar, Generic
 from TxDefi.Abstractions.AbstractTradesManager import AbstractTradesManager
 from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry, SerialLane
 from TxDefi.Data.MarketEnums import *
 
 T = TypeVar("T", bound=object)  # Generic type Key Pair Type
@@ -22,6 +22,7 @@ class AbstractTradingStrategy(ABC, threading.Thread, Generic[T], AbstractSubscri
         self.updates_lock = threading.Lock()
         self.event_queue = queue.Queue()
         self.event_count = 0
+        self.event_lane = SerialLane(ExecutorRegistry.strategy_pool) #Events are processed one at a time and in order like a single subscriber thread would
         
         if settings:
             self.load_from_dict(settings)
@@ -44,10 +45,13 @@ class AbstractTradingStrategy(ABC, threading.Thread, Generic[T], AbstractSubscri
     def set_strategy_complete(self):
         self.state = StrategyState.COMPLETE
 
+    #An event with the same key as one still waiting replaces it; None (the default) processes every event
+    def get_event_key(self, event: T):
+        return None
+
     def update(self, arg1: T):
         if self.state != StrategyState.COMPLETE:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                executor.submit(self._process_event_task, (arg1))
+            self.event_lane.submit(self.get_event_key(arg1), self._process_event_task, arg1)
         else:
             self.stop()
                         
@@ -1,11 +1,11 @@
 from pathlib import Path
 from pubsub import pub
-import concurrent.futures
 import threading
 import os
 import customtkinter as ctk
 
 from TxDefi.Data.MarketEnums import *
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry
 
 #Paths
 library_root = str(Path(__file__).resolve().parent.parent)
@@ -88,8 +88,7 @@ class TopicHelper:
         self.topic_name = topicname
 
     def send(self, command: Command):
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.submit(self._send_task, (command))
+        ExecutorRegistry.submit(ExecutorRegistry.ui_pool, self._send_task, command)
 
     def _send_task(self, arg: Command):
        pub.sendMessage(topicName=self.topic_name, arg1=arg)
@@ -86,6 +86,23 @@ class ParsedTransaction(TransactionInfo):
         self.fees = fees
         self.instructions = instructions
         self.log_messages = log_messages
+        self.log_alerts : list = None #Program log events when they were already decoded with the transaction; None if not attempted
+
+    #Rough bytes held in memory; used to bound transaction caches
+    def get_size_estimate(self)->int:
+        size = 512 + 256*len(self.instructions)
+
+        if self.accounts:
+            size += 160*len(self.accounts) #jsonParsed account dict
+
+        for token_balances in (self.pre_token_balances, self.post_token_balances):
+            if token_balances:
+                size += 400*len(token_balances)
+
+        if self.log_messages:
+            size += sum(len(log_message) + 56 for log_message in self.log_messages)
+
+        return size
         
     def get_supported_programs(self):
         ret_set : set[SupportedPrograms] = set()
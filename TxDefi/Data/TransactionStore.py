@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+from TxDefi.Data.TransactionInfo import ParsedTransaction
+
+class StoredTransaction:
+    def __init__(self, transaction: ParsedTransaction, size: int, token_addresses: tuple[str]):
+        self.transaction = transaction
+        self.size = size
+        self.token_addresses = token_addresses
+
+#Recent transactions by signature with secondary indexes by mint and slot; the oldest entries are evicted in O(1) once either the count or byte limit is hit
+#Safe to read from executor threads while the socket thread adds
+class TransactionStore:
+    default_max_count = 1000
+    default_max_bytes = 64*1024*1024
+
+    def __init__(self, max_count = default_max_count, max_bytes = default_max_bytes):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.entries : OrderedDict[str, StoredTransaction] = OrderedDict() #key=tx signature; insertion order is age
+        self.mint_index : dict[str, dict[str, None]] = {} #key=token address, value=signatures in insertion order
+        self.slot_index : dict[int, dict[str, None]] = {} #key=slot
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+
+        #Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add(self, transaction: ParsedTransaction):
+        tx_signature = transaction.tx_signature
+        token_addresses = TransactionStore.get_token_addresses(transaction)
+        entry = StoredTransaction(transaction, transaction.get_size_estimate(), token_addresses)
+
+        with self.lock:
+            if tx_signature in self.entries:
+                self._remove(tx_signature)
+
+            self.entries[tx_signature] = entry
+            self.total_bytes += entry.size
+
+            for token_address in token_addresses:
+                self.mint_index.setdefault(token_address, {})[tx_signature] = None
+
+            self.slot_index.setdefault(transaction.slot, {})[tx_signature] = None
+
+            while len(self.entries) > self.max_count or (self.total_bytes > self.max_bytes and len(self.entries) > 1):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, tx_signature: str)->ParsedTransaction:
+        entry = self.entries.pop(tx_signature, None)
+
+        if entry is None:
+            return
+
+        self.total_bytes -= entry.size
+
+        for token_address in entry.token_addresses:
+            self._remove_from_index(self.mint_index, token_address, tx_signature)
+
+        self._remove_from_index(self.slot_index, entry.transaction.slot, tx_signature)
+
+        return entry.transaction
+
+    @staticmethod
+    def _remove_from_index(index: dict, key, tx_signature: str):
+        signatures = index.get(key)
+
+        if signatures is not None:
+            signatures.pop(tx_signature, None)
+
+            if len(signatures) == 0:
+                index.pop(key)
+
+    def get(self, tx_signature: str)->ParsedTransaction:
+        with self.lock:
+            entry = self.entries.get(tx_signature)
+
+            if entry:
+                self.hits += 1
+                return entry.transaction
+
+            self.misses += 1
+
+    def pop(self, tx_signature: str)->ParsedTransaction:
+        with self.lock:
+            return self._remove(tx_signature)
+
+    #Newest first
+    def get_by_mint(self, token_address: str)->list[ParsedTransaction]:
+        with self.lock:
+            signatures = self.mint_index.get(token_address, {})
+
+            return [self.entries[tx_signature].transaction for tx_signature in reversed(signatures)]
+
+    def get_by_slot(self, slot: int)->list[ParsedTransaction]:
+        with self.lock:
+            signatures = self.slot_index.get(slot, {})
+
+            return [self.entries[tx_signature].transaction for tx_signature in signatures]
+
+    #Newest transaction for the mint that passes the check; counts toward the hit rate like get. is_match runs under the lock so keep it cheap
+    def find_by_mint(self, token_address: str, is_match: Callable[[ParsedTransaction], bool])->ParsedTransaction:
+        with self.lock:
+            for tx_signature in reversed(self.mint_index.get(token_address, {})):
+                transaction = self.entries[tx_signature].transaction
+
+                if is_match(transaction):
+                    self.hits += 1
+                    return transaction
+
+            self.misses += 1
+
+    def __contains__(self, tx_signature: str)->bool:
+        return tx_signature in self.entries
+
+    def __len__(self)->int:
+        return len(self.entries)
+
+    def get_stats(self)->dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {"count": len(self.entries), "bytes": self.total_bytes, "mints": len(self.mint_index), "slots": len(self.slot_index), "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits/lookups if lookups > 0 else 0, "evictions": self.evictions}
+
+    #Mints named by the decoded instructions and log events; nothing is parsed here
+    @staticmethod
+    def get_token_addresses(transaction: ParsedTransaction)->tuple[str]:
+        token_addresses = {}
+
+        for instruction in transaction.instructions:
+            token_address = getattr(instruction.data, 'token_address', None)
+
+            if token_address:
+                token_addresses[token_address] = None
+
+        for log_alert in transaction.log_alerts or []:
+            token_address = getattr(log_alert, 'token_address', None)
+
+            if token_address:
+                token_addresses[token_address] = None
+
+        return tuple(token_addresses)
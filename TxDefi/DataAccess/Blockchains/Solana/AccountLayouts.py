@@ -0,0 +1,58 @@
+import base64
+import struct
+import base58
+
+#Raw SPL account layouts; lets us decode getMultipleAccounts base64 data without the jsonParsed overhead
+SPL_TOKEN_ACCOUNT_SIZE = 165 #Token-2022 accounts may be longer (extensions), base layout is the same
+SPL_MINT_SIZE = 82
+token_account_struct = struct.Struct("<32s32sQ") #mint, owner, amount
+mint_struct = struct.Struct("<I32sQB?") #mint authority option, mint authority, supply, decimals, is_initialized
+freeze_authority_struct = struct.Struct("<I32s")
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64 #After mint and owner
+token_amount_struct = struct.Struct("<Q")
+
+class SplTokenAccount:
+    def __init__(self, address: str, mint_address: str, owner_address: str, amount: int):
+        self.address = address
+        self.mint_address = mint_address
+        self.owner_address = owner_address
+        self.amount = amount #scaled
+
+class SplMint:
+    def __init__(self, address: str, supply: int, decimals: int):
+        self.address = address
+        self.supply = supply #scaled
+        self.decimals = decimals
+        self.mint_authority = None
+        self.freeze_authority = None
+
+def get_account_bytes(account_value: dict)->bytes:
+    data = account_value.get('data') if account_value else None
+
+    if isinstance(data, list) and len(data) >= 2 and data[1] == "base64":
+        return base64.b64decode(data[0])
+
+def parse_token_account(address: str, data: bytes)->SplTokenAccount:
+    if data and len(data) >= SPL_TOKEN_ACCOUNT_SIZE:
+        mint_bytes, owner_bytes, amount = token_account_struct.unpack_from(data, 0)
+
+        return SplTokenAccount(address, base58.b58encode(mint_bytes).decode(), base58.b58encode(owner_bytes).decode(), amount)
+
+#Scaled amount read straight from the raw account; skips decoding the mint and owner
+def parse_token_amount(data: bytes)->int:
+    if data and len(data) >= SPL_TOKEN_ACCOUNT_SIZE:
+        return token_amount_struct.unpack_from(data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+def parse_mint(address: str, data: bytes)->SplMint:
+    if data and len(data) >= SPL_MINT_SIZE:
+        has_mint_authority, mint_authority, supply, decimals, _ = mint_struct.unpack_from(data, 0)
+        has_freeze_authority, freeze_authority = freeze_authority_struct.unpack_from(data, mint_struct.size)
+        ret_mint = SplMint(address, supply, decimals)
+
+        if has_mint_authority:
+            ret_mint.mint_authority = base58.b58encode(mint_authority).decode()
+
+        if has_freeze_authority:
+            ret_mint.freeze_authority = base58.b58encode(freeze_authority).decode()
+
+        return ret_mint
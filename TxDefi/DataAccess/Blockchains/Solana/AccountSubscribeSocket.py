@@ -1,17 +1,180 @@
 import os
 import sys
+import json
+import threading
+import time
+from pubsub import pub
 
-from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder
+from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder, AccountNotification
 from TxDefi.DataAccess.Blockchains.Solana.SubscribeSocket import SubscribeSocket
-from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import SubscriptionsDataDecoder
+from TxDefi.DataAccess.Blockchains.Solana.SubscriptionRegistry import SubscriptionRegistry, LogicalSubscription
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import SubscriptionsDataDecoder, Subscription
+from TxDefi.Utilities.BoundedQueue import OverflowPolicy
 
-class AccountSubscribeSocket(SubscribeSocket):    
-    def __init__(self, wss_uri: str, out_topic: str, ping = False):
-        SubscribeSocket.__init__(self, wss_uri, SubscriptionsDataDecoder(), out_topic, [], ping)
+class AccountSubscribeSocket(SubscribeSocket):
+    catch_up_timeout = 5 #Seconds to wait for resubscriptions to confirm before catching up on the ones that did
+    max_catch_up_accounts = 100 #getMultipleAccounts key limit
+
+    #solana_rpc_api is used to catch up on account changes missed while the socket was reconnecting
+    def __init__(self, wss_uri: str, out_topic: str, ping = False, solana_rpc_api: SolanaRpcApi = None):
+        #Solana's pubsub accepts JSON-RPC batches; only the latest state of an account matters so backed up notifications are coalesced
+        SubscribeSocket.__init__(self, wss_uri, SubscriptionsDataDecoder(), out_topic, [], ping, True, overflow_policy=OverflowPolicy.COALESCE)
         self.wallet_tracker_decoder : SubscriptionsDataDecoder = self.event_decoder
-    
+        self.solana_rpc_api = solana_rpc_api
+        self.registry = SubscriptionRegistry()
+        self.connection_count = 0
+        self.catch_up_lock = threading.Lock()
+        self.catch_up_timer : threading.Timer = None
+        self.catch_up_ids : set[int] = None #Request ids to catch up on; None means every confirmed subscription
+        self.max_slot = 0 #Newest notification slot seen on this socket
+        self.last_message_time = 0
+        self.catch_ups = 0
+        self.caught_up_accounts = 0
+
     def add_decoder(self, subscription_id: int, account_info_decoder: AccountNotificationDecoder):
         self.wallet_tracker_decoder.add_decoder(subscription_id, account_info_decoder)
-    
+
     def remove_decoder(self, subscription_id: int):
-        self.wallet_tracker_decoder.remove_decoder(subscription_id) 
\ No newline at end of file
+        self.wallet_tracker_decoder.remove_decoder(subscription_id)
+
+    #Registry backed subscriptions are replayed and remapped on every reconnect; request_id must be unique per socket
+    #catch_up: replay the current state once the subscriptions confirm (e.g. they were moved here from a dead connection)
+    def subscribe_accounts(self, subscriptions: list[tuple[int, str, AccountNotificationDecoder]], catch_up = False):
+        json_requests = []
+
+        for request_id, account_address, decoder in subscriptions:
+            sub_request = SolanaRpcApi.get_account_subscribe_request(account_address, request_id)
+            json_request = json.dumps(sub_request)
+            self.registry.add(LogicalSubscription(request_id, json_request, account_address, sub_request['params'][1], decoder))
+            json_requests.append(json_request)
+
+        self.send_requests_no_wait(json_requests)
+
+        if catch_up:
+            self.request_catch_up([request_id for request_id, _, _ in subscriptions])
+
+    def unsubscribe_account(self, request_id: int)->LogicalSubscription:
+        subscription = self.registry.remove(request_id)
+
+        if subscription and subscription.server_id is not None:
+            self.wallet_tracker_decoder.remove_decoder(subscription.server_id)
+
+            if self.connected:
+                unsub_request = SolanaRpcApi.get_account_unsubscribe_request(subscription.server_id, request_id)
+                self.send_request_no_wait(json.dumps(unsub_request))
+
+        return subscription
+
+    #request_ids=None catches up on every subscription of this socket
+    def request_catch_up(self, request_ids: list[int] = None):
+        if not self.solana_rpc_api:
+            return
+
+        with self.catch_up_lock:
+            if self.catch_up_timer:
+                self.catch_up_timer.cancel()
+
+                if self.catch_up_ids is not None and request_ids is not None:
+                    request_ids = self.catch_up_ids.union(request_ids)
+                else:
+                    request_ids = None
+
+            self.catch_up_ids = set(request_ids) if request_ids is not None else None
+            self.catch_up_timer = threading.Timer(self.catch_up_timeout, self._catch_up)
+            self.catch_up_timer.daemon = True
+            self.catch_up_timer.start()
+
+    #Registry requests are replayed instead of raw sub_requests
+    def add_sub_request(self, request: str):
+        pass
+
+    def _init(self):
+        self.connection_count += 1
+        self.wallet_tracker_decoder.clear() #Decoders are keyed by server ids of the dead connection
+        requests = self.registry.reset_server_ids()
+
+        self.send_requests_no_wait(requests)
+
+        if self.connection_count > 1 and len(requests) > 0:
+            self.request_catch_up()
+
+    def _process_json(self, json_data: dict):
+        if not json_data:
+            return
+
+        decoded_data = self.event_decoder.decode(json_data)
+
+        if isinstance(decoded_data, Subscription):
+            subscription = self.registry.confirm(decoded_data.id, decoded_data.subscription)
+
+            if subscription:
+                self.wallet_tracker_decoder.add_decoder(subscription.server_id, subscription.decoder)
+
+                if self.catch_up_timer and self.registry.get_pending_count() == 0: #Everything is back; no need to wait for the timeout
+                    with self.catch_up_lock:
+                        if self.catch_up_timer:
+                            self.catch_up_timer.cancel()
+                            threading.Thread(target=self._catch_up, daemon=True).start()
+        elif isinstance(decoded_data, AccountNotification):
+            self.max_slot = max(self.max_slot, decoded_data.slot)
+            self.last_message_time = time.monotonic()
+            subscription = self.registry.get_by_server_id(decoded_data.subscription_id)
+
+            if subscription and not self.registry.update_slot(subscription, decoded_data.slot):
+                return #Stale; a newer state was already delivered (e.g. by a catch-up)
+
+        if decoded_data:
+            pub.sendMessage(topicName=self.out_topic, arg1=decoded_data)
+
+    #One-shot getMultipleAccounts pass that replays the current state of every account whose updates may have been missed during the gap
+    def _catch_up(self):
+        with self.catch_up_lock:
+            if not self.catch_up_timer:
+                return
+
+            self.catch_up_timer = None
+            catch_up_ids = self.catch_up_ids
+
+        subscriptions = [subscription for subscription in self.registry.get_confirmed() if catch_up_ids is None or subscription.request_id in catch_up_ids]
+        groups : dict[str, list[LogicalSubscription]] = {}
+
+        for subscription in subscriptions:
+            groups.setdefault(json.dumps(subscription.config, sort_keys=True), []).append(subscription)
+
+        requests_list = []
+        chunks : list[list[LogicalSubscription]] = []
+
+        for group in groups.values():
+            for i in range(0, len(group), self.max_catch_up_accounts):
+                chunk = group[i:i+self.max_catch_up_accounts]
+                chunks.append(chunk)
+                requests_list.append(("getMultipleAccounts", [[subscription.account_address for subscription in chunk], chunk[0].config]))
+
+        try:
+            responses = self.solana_rpc_api.run_rpc_batch(requests_list)
+        except Exception as e:
+            print(f"AccountSubscribeSocket: Issue catching up after reconnect {e}")
+            return
+
+        self.catch_ups += 1
+
+        for chunk, response in zip(chunks, responses):
+            if not response:
+                continue
+
+            slot = response.result['context']['slot']
+
+            for subscription, value in zip(chunk, response.result['value']):
+                if value and subscription.server_id is not None and slot > subscription.last_slot: #Gap: the chain moved past what we delivered
+                    self.caught_up_accounts += 1
+                    self._process_json({"jsonrpc": "2.0", "method": "accountNotification",
+                                        "params": {"result": {"context": {"slot": slot}, "value": value}, "subscription": subscription.server_id}})
+
+    def get_stats(self)->dict:
+        stats = super().get_stats()
+        stats.update(self.registry.get_stats())
+        stats.update({"reconnects": max(0, self.connection_count-1), "catch_ups": self.catch_ups, "caught_up_accounts": self.caught_up_accounts,
+                      "max_slot": self.max_slot, "last_message_age": time.monotonic() - self.last_message_time if self.last_message_time > 0 else None})
+
+        return stats
@@ -0,0 +1,165 @@
+import bisect
+import hashlib
+import threading
+import time
+from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+
+#Spreads account subscriptions across several AccountSubscribeSocket connections so per-connection subscription and message rate caps aren't hit
+#Accounts are placed by consistent hashing; when a connection stays down its accounts move to the live shards and move back once it recovers
+class AccountSubscribeSocketPool(threading.Thread):
+    default_num_shards = 2
+    virtual_nodes = 100 #Ring points per shard; more points give a more even spread
+    rebalance_delay = 10 #Seconds a shard may be down before its accounts move; short blips are handled by the shard's own resubscribe
+    monitor_interval = 1 #Seconds
+
+    def __init__(self, wss_uri: str, out_topic: str, num_shards = default_num_shards, ping = False, solana_rpc_api: SolanaRpcApi = None):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = AccountSubscribeSocketPool.__name__
+        self.wss_uri = wss_uri
+        self.out_topic = out_topic #Every shard publishes to the same topic so consumers don't see the sharding
+        self.shards : list[AccountSubscribeSocket] = []
+
+        for index in range(max(1, num_shards)):
+            shard = AccountSubscribeSocket(wss_uri, out_topic, ping, solana_rpc_api)
+            shard.name = f"{AccountSubscribeSocket.__name__}{index}"
+            self.shards.append(shard)
+
+        self.subscriptions : dict[int, tuple[str, AccountNotificationDecoder]] = {} #key=request id
+        self.assignments : dict[int, int] = {} #key=request id, value=shard index
+        self.live_shards = set(range(len(self.shards)))
+        self.ring : list[tuple[int, int]] = [] #(hash, shard index) sorted by hash
+        self.ring_hashes : list[int] = []
+        self.lock = threading.RLock()
+        self.cancel_event = threading.Event()
+        self.rebalances = 0
+        self.shard_rates : list[float] = [0]*len(self.shards) #Messages per second over the last monitor interval
+        self.last_received : list[int] = [0]*len(self.shards)
+        self.last_rate_time = time.monotonic()
+        self._build_ring()
+
+    @staticmethod
+    def _hash(key: str)->int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def _build_ring(self):
+        self.ring = sorted((self._hash(f"{index}:{node}"), index) for index in self.live_shards for node in range(self.virtual_nodes))
+        self.ring_hashes = [ring_hash for ring_hash, _ in self.ring]
+
+    def get_shard_index(self, account_address: str)->int:
+        if len(self.ring) == 0: #Everything is down; keep the accounts where they'd normally live
+            return self._hash(account_address) % len(self.shards)
+
+        position = bisect.bisect(self.ring_hashes, self._hash(account_address)) % len(self.ring)
+
+        return self.ring[position][1]
+
+    def subscribe_accounts(self, subscriptions: list[tuple[int, str, AccountNotificationDecoder]]):
+        shard_subscriptions : dict[int, list] = {}
+
+        with self.lock:
+            for request_id, account_address, decoder in subscriptions:
+                shard_index = self.get_shard_index(account_address)
+                self.subscriptions[request_id] = (account_address, decoder)
+                self.assignments[request_id] = shard_index
+                shard_subscriptions.setdefault(shard_index, []).append((request_id, account_address, decoder))
+
+        for shard_index, shard_subs in shard_subscriptions.items():
+            self.shards[shard_index].subscribe_accounts(shard_subs)
+
+    def unsubscribe_account(self, request_id: int):
+        with self.lock:
+            self.subscriptions.pop(request_id, None)
+            shard_index = self.assignments.pop(request_id, None)
+
+        if shard_index is not None:
+            self.shards[shard_index].unsubscribe_account(request_id)
+
+    #Move every subscription whose owner changed on the ring; only the dead (or recovered) shard's share moves
+    def _rebalance(self):
+        moves : dict[int, list] = {}
+        last_slots : dict[int, int] = {}
+
+        with self.lock:
+            self._build_ring()
+
+            for request_id, (account_address, decoder) in self.subscriptions.items():
+                shard_index = self.get_shard_index(account_address)
+                old_index = self.assignments[request_id]
+
+                if shard_index != old_index:
+                    old_subscription = self.shards[old_index].unsubscribe_account(request_id)
+                    last_slots[request_id] = old_subscription.last_slot if old_subscription else 0
+                    self.assignments[request_id] = shard_index
+                    moves.setdefault(shard_index, []).append((request_id, account_address, decoder))
+
+            for shard_index, shard_subs in moves.items():
+                shard = self.shards[shard_index]
+                shard.subscribe_accounts(shard_subs, True) #Catch up on whatever changed while the old shard was down
+
+                for request_id, _, _ in shard_subs:
+                    subscription = shard.registry.get(request_id)
+
+                    if subscription:
+                        subscription.last_slot = last_slots[request_id]
+
+        if len(moves) > 0:
+            self.rebalances += 1
+            print(f"{self.name}: Moved {sum(len(shard_subs) for shard_subs in moves.values())} subscriptions; live shards: {sorted(self.live_shards)}")
+
+    def _check_shards(self):
+        live_shards = set()
+
+        for index, shard in enumerate(self.shards):
+            if shard.get_disconnected_duration() < self.rebalance_delay:
+                live_shards.add(index)
+
+        if live_shards != self.live_shards and len(live_shards) > 0: #Nowhere to move to if every shard is down
+            self.live_shards = live_shards
+            self._rebalance()
+
+        now = time.monotonic()
+        elapsed = now - self.last_rate_time
+
+        if elapsed > 0:
+            for index, shard in enumerate(self.shards):
+                received = shard.get_stats()["received"]
+                self.shard_rates[index] = (received - self.last_received[index])/elapsed
+                self.last_received[index] = received
+
+            self.last_rate_time = now
+
+    def get_stats(self)->list[dict]:
+        shard_stats = [shard.get_stats() for shard in self.shards]
+        max_slot = max(stats["max_slot"] for stats in shard_stats)
+        assignment_counts = [0]*len(self.shards)
+
+        for shard_index in list(self.assignments.values()):
+            assignment_counts[shard_index] += 1
+
+        for index, stats in enumerate(shard_stats):
+            stats.update({"shard": index, "live": index in self.live_shards, "assigned": assignment_counts[index], "message_rate": self.shard_rates[index],
+                          "slot_lag": max_slot - stats["max_slot"] if stats["max_slot"] > 0 else None})
+
+        return shard_stats
+
+    def toggle(self):
+        for shard in self.shards:
+            shard.toggle()
+
+    def run(self):
+        for shard in self.shards:
+            shard.start()
+
+        while not self.cancel_event.wait(self.monitor_interval):
+            try:
+                self._check_shards()
+            except Exception as e:
+                print(f"{self.name}: Issue monitoring shards {e}")
+
+    def stop(self):
+        self.cancel_event.set()
+
+        for shard in self.shards:
+            shard.stop()
@@ -0,0 +1,232 @@
+import asyncio
+import threading
+import concurrent.futures
+from jsonrpcclient import request, parse, Ok, Error
+from TxDefi.Utilities.RateLimiter import RateLimiter
+import TxDefi.Utilities.JsonUtil as json_util
+from RpcTransport import RpcTransport
+from RpcRouter import RpcRouter, RpcEndpoint
+from RpcCache import RpcCache
+
+#asyncio-native JSON-RPC client; owns one event loop thread so hundreds of lookups can be in flight without a thread per request
+class AsyncSolanaRpcApi:
+    max_batch_size = 100 #Most RPC providers cap JSON-RPC batches around this size
+    max_multiple_accounts = 100 #getMultipleAccounts key limit
+    throttled_status_code = 429
+    throttled_error_code = -32005 #Node is behind/too many requests
+    hedged_methods = ["getTransaction", "getLatestBlockhash"] #Latency critical reads that may be raced across endpoints
+    blocking_call_timeout = 60 #Seconds a sync wrapper waits on the event loop; covers rate limiter waits and retries
+
+    #rpc_endpoints: extra (uri, weight) providers routed alongside rpc_uri
+    def __init__(self, rpc_uri: str, rate_limiter: RateLimiter, rpc_backup_uri: str = None, pool_size = RpcTransport.default_pool_size,
+                 rpc_endpoints: list[tuple[str, float]] = None, enable_hedging = True):
+        self.rpc_uri = rpc_uri
+        self.rpc_backup_uri = rpc_backup_uri
+        self.rate_limiter = rate_limiter
+        self.transport = RpcTransport(pool_size)
+        endpoints = [RpcEndpoint(rpc_uri)]
+
+        if rpc_endpoints:
+            endpoints.extend([RpcEndpoint(uri, weight) for uri, weight in rpc_endpoints if uri != rpc_uri])
+
+        self.router = RpcRouter(self.transport, endpoints, enable_hedging, rate_limiter)
+        self.cache = RpcCache()
+        self.loop : asyncio.AbstractEventLoop = None
+        self.loop_thread : threading.Thread = None
+        self.loop_lock = threading.Lock()
+        self.is_stopped = False #The loop isn't restarted once stopped
+
+    def start(self):
+        with self.loop_lock:
+            if not self.loop and not self.is_stopped:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, name=AsyncSolanaRpcApi.__name__, daemon=True)
+                self.loop_thread.start()
+                self.loop.call_soon_threadsafe(self.router.start)
+
+    def stop(self):
+        with self.loop_lock:
+            self.is_stopped = True
+
+        if self.loop and self.loop.is_running():
+            if threading.current_thread() is not self.loop_thread:
+                try:
+                    asyncio.run_coroutine_threadsafe(self.transport.close(), self.loop).result(5)
+                except Exception as e:
+                    print(f"AsyncSolanaRpcApi: Issue closing connections {e}")
+
+            self.loop.call_soon_threadsafe(self.router.stop)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    #Schedule a coroutine on the RPC event loop from any thread
+    def submit(self, coroutine)->concurrent.futures.Future:
+        self.start()
+
+        if self.is_stopped:
+            coroutine.close()
+            raise RuntimeError("AsyncSolanaRpcApi: RPC call made after stop")
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    #Blocking bridge used by the sync SolanaRpcApi wrappers; returns None like a failed request if the loop doesn't answer in time
+    def run_coroutine(self, coroutine, timeout: float = blocking_call_timeout):
+        if threading.current_thread() is self.loop_thread:
+            coroutine.close()
+            raise RuntimeError("AsyncSolanaRpcApi: Blocking RPC call made from the event loop thread; await the coroutine instead")
+
+        future = self.submit(coroutine)
+
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            print(f"AsyncSolanaRpcApi: RPC call timed out after {timeout}s")
+
+    #The backup endpoint is reserved for provider specific methods (e.g. getAsset); everything else goes through the router
+    async def _post(self, json_request: dict | list, use_backup: bool, hedge = False, hedge_cost: float = 1):
+        if use_backup and self.rpc_backup_uri:
+            return await self.transport.post(self.rpc_backup_uri, json_request)
+        else:
+            return await self.router.post(json_request, hedge, hedge_cost)
+
+    #cache_ttl overrides the cache policy for this call (e.g. long lived metadata accounts); 0 bypasses the cache
+    async def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False, cache_ttl: float = None)->Ok:
+        return await self.cache.get_or_fetch(request_name, params, lambda: self._run_rpc_method(request_name, params, max_tries, use_backup), cache_ttl)
+
+    async def _run_rpc_method(self, request_name: str, params: list, max_tries: int, use_backup: bool)->Ok:
+        try:
+            cost = self.rate_limiter.get_cost(request_name)
+
+            for i in range(max_tries):
+                if not await self.rate_limiter.acquire_sem_async(cost): #Shutting down
+                    return
+
+                response = await self._post(request(request_name, params=params), use_backup, request_name in self.hedged_methods, cost)
+
+                if response.status_code == self.throttled_status_code:
+                    self.rate_limiter.report_throttled()
+                else:
+                    parsed = parse(json_util.loads(response.content))
+
+                    if not isinstance(parsed, Error):
+                        return parsed
+                    elif parsed.code == self.throttled_error_code:
+                        self.rate_limiter.report_throttled()
+
+                await asyncio.sleep(.2)
+        except Exception as e:
+            print(f"AsyncSolanaRpcApi: Failure on request {request_name}. Check your RPC Node. Error: {e}.")
+
+    #Packs many calls into one JSON-RPC array POST; returns the parsed responses in the same order as requests_list (None on failure)
+    async def run_rpc_batch(self, requests_list: list[tuple[str, list]], max_tries = 1, use_backup = False)->list[Ok]:
+        ret_responses : list[Ok] = [None]*len(requests_list)
+        pending_indices = []
+
+        for index, (request_name, params) in enumerate(requests_list):
+            if self.cache.get_ttl(request_name) > 0:
+                ret_responses[index] = self.cache.get(self.cache.get_key(request_name, params))
+
+            if ret_responses[index] is None:
+                pending_indices.append(index)
+
+        fetch_indices = pending_indices
+
+        try:
+            for i in range(max_tries):
+                batches = [pending_indices[start_index:start_index+self.max_batch_size] for start_index in range(0, len(pending_indices), self.max_batch_size)]
+                await asyncio.gather(*[self._run_batch_chunk(requests_list, batch_indices, ret_responses, use_backup) for batch_indices in batches])
+
+                pending_indices = [index for index in pending_indices if ret_responses[index] is None]
+
+                if len(pending_indices) == 0:
+                    break
+
+                await asyncio.sleep(.2)
+        except Exception as e:
+            print(f"AsyncSolanaRpcApi: Failure on batch request of {len(requests_list)} calls. Check your RPC Node. Error: {e}.")
+
+        for index in fetch_indices:
+            request_name, params = requests_list[index]
+            self.cache.put(self.cache.get_key(request_name, params), ret_responses[index], self.cache.get_ttl(request_name))
+
+        return ret_responses
+
+    async def _run_batch_chunk(self, requests_list: list[tuple[str, list]], batch_indices: list[int], ret_responses: list[Ok], use_backup: bool):
+        #Providers bill every call inside a batch, so charge the summed method weights
+        if not await self.rate_limiter.acquire_sem_async(sum(self.rate_limiter.get_cost(requests_list[index][0]) for index in batch_indices)):
+            return
+
+        json_request = [request(requests_list[index][0], params=requests_list[index][1], id=index) for index in batch_indices]
+        response = await self._post(json_request, use_backup)
+
+        if response.status_code == self.throttled_status_code:
+            self.rate_limiter.report_throttled()
+            return
+
+        response_json = json_util.loads(response.content)
+
+        if isinstance(response_json, list):
+            was_throttled = False
+
+            for parsed in parse(response_json):
+                if isinstance(parsed, Ok) and isinstance(parsed.id, int) and 0 <= parsed.id < len(ret_responses):
+                    ret_responses[parsed.id] = parsed #Map back by id; servers may reorder batch responses
+                elif isinstance(parsed, Error) and parsed.code == self.throttled_error_code:
+                    was_throttled = True
+
+            if was_throttled:
+                self.rate_limiter.report_throttled()
+        else:
+            print(f"AsyncSolanaRpcApi: Batch request rejected by the RPC Node: {response_json}")
+
+    #Fan out independent requests concurrently; each one is its own HTTP call and counts against the rate limit
+    async def gather_rpc_methods(self, requests_list: list[tuple[str, list]], max_tries = 1, use_backup = False)->list[Ok]:
+        return await asyncio.gather(*[self.run_rpc_method(request_name, params, max_tries, use_backup) for request_name, params in requests_list])
+
+    async def get_account_info(self, address: str, max_tries=1, cache_ttl: float = None)->dict:
+        response = await self.run_rpc_method("getAccountInfo", [address, {"encoding": "jsonParsed"}], max_tries, cache_ttl=cache_ttl)
+
+        if response:
+            return response.result
+
+    async def gather_account_infos(self, addresses: list[str], max_tries=1)->list[dict]:
+        return await asyncio.gather(*[self.get_account_info(address, max_tries) for address in addresses])
+
+    async def get_account_balance(self, account_address: str, max_tries=1)->int:
+        response = await self.run_rpc_method("getBalance", [account_address], max_tries)
+
+        if response:
+            return response.result['value']
+
+    async def gather_account_balances(self, account_addresses: list[str], max_tries=1)->list[int]:
+        return await asyncio.gather(*[self.get_account_balance(address, max_tries) for address in account_addresses])
+
+    async def get_transaction(self, tx_signature: str, max_tries = 1)->dict[str, any]:
+        response = await self.run_rpc_method("getTransaction", [tx_signature,
+                                              {'encoding': 'jsonParsed', 'commitment': 'confirmed', 'maxSupportedTransactionVersion':0 }], max_tries)
+
+        if response:
+            return response.result
+
+    #Raw base64 account values in the same order as addresses (None if missing); every chunk of 100 keys is packed into one batched POST
+    async def get_multiple_accounts(self, addresses: list[str], max_tries=1)->list[dict]:
+        return (await self.get_multiple_accounts_at_slot(addresses, max_tries))[0]
+
+    #Also returns the oldest context slot across the chunks so callers can tell if the snapshot is behind a stream
+    async def get_multiple_accounts_at_slot(self, addresses: list[str], max_tries=1)->tuple[list[dict], int]:
+        ret_accounts : list[dict] = [None]*len(addresses)
+        ret_slot = None
+        valid_indices = [index for index, address in enumerate(addresses) if address]
+        chunks = [valid_indices[i:i+self.max_multiple_accounts] for i in range(0, len(valid_indices), self.max_multiple_accounts)]
+        responses = await self.run_rpc_batch([("getMultipleAccounts", [[addresses[index] for index in chunk], {"encoding": "base64", "commitment": "confirmed"}])
+                                              for chunk in chunks], max_tries)
+
+        for chunk, response in zip(chunks, responses):
+            if response:
+                slot = response.result.get('context', {}).get('slot', 0)
+                ret_slot = slot if ret_slot is None else min(ret_slot, slot)
+
+                for index, value in zip(chunk, response.result['value']):
+                    ret_accounts[index] = value
+
+        return ret_accounts, ret_slot or 0
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+from solders.hash import Hash
+
+#Immutable snapshot; swapped in as a whole so readers never need a lock
+class RecentBlockhash:
+    def __init__(self, blockhash: Hash, last_valid_block_height: int, slot: int):
+        self.blockhash = blockhash
+        self.last_valid_block_height = last_valid_block_height
+        self.slot = slot
+        self.received_time = time.monotonic()
+
+    def get_age(self)->float:
+        return time.monotonic() - self.received_time
+
+    #Block height isn't polled, so estimate it from the hash age; lastValidBlockHeight is the height at fetch time plus the processing window
+    def get_estimated_block_height(self)->int:
+        return self.last_valid_block_height - BlockhashService.max_processing_age + int(self.get_age()/BlockhashService.block_time)
+
+    def get_blocks_left(self)->int:
+        return self.last_valid_block_height - self.get_estimated_block_height()
+
+#Keeps the latest blockhash fresh in the background so trade building never waits on a getLatestBlockhash call
+class BlockhashService(threading.Thread):
+    default_poll_interval = 2 #Seconds; a hash stays valid for ~60s so there's no need to poll every slot
+    max_poll_interval = 30 #Seconds; ceiling for the back off while polls keep failing
+    max_processing_age = 150 #Blocks a hash stays valid for
+    block_time = .4 #Seconds
+    min_blocks_left = 75 #Force a refresh before signing with a hash that has used up half its window
+    max_recorded_ages = 100
+
+    def __init__(self, solana_rpc_api: "SolanaRpcApi", poll_interval: float = default_poll_interval):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = BlockhashService.__name__
+        self.solana_rpc_api = solana_rpc_api
+        self.poll_interval = poll_interval
+        self.cancel_event = threading.Event()
+        self.latest : RecentBlockhash = None
+        self.signing_ages : deque[float] = deque(maxlen=self.max_recorded_ages) #Hash age in seconds at signing time
+        self.failed_polls = 0
+        self.stale_refreshes = 0 #Signing requests that had to fetch a new hash because the cached one was too old
+        self.expired_requests = 0 #Signing requests that got no hash because the cached one was too old and the refresh failed
+
+    def refresh(self)->RecentBlockhash:
+        response = self.solana_rpc_api.run_rpc_method("getLatestBlockhash", [{'commitment': "confirmed"}], cache_ttl=0)
+
+        if response:
+            value = response.result['value']
+            slot = response.result.get('context', {}).get('slot', 0)
+            latest = self.latest
+
+            if not latest or slot >= latest.slot: #Don't go backwards if a lagging endpoint answered
+                self.latest = RecentBlockhash(Hash.from_string(value['blockhash']), value['lastValidBlockHeight'], slot)
+        else:
+            self.failed_polls += 1
+
+        return self.latest
+
+    @staticmethod
+    def is_fresh(latest: RecentBlockhash)->bool:
+        return latest is not None and latest.get_blocks_left() >= BlockhashService.min_blocks_left
+
+    #Returns None rather than a hash that is about to expire if the cache is stale and a refresh doesn't land
+    def get_fresh_blockhash(self)->RecentBlockhash:
+        latest = self.latest
+
+        if self.is_fresh(latest):
+            return latest
+
+        if latest: #Only before the first poll lands or when polls have been failing
+            self.stale_refreshes += 1
+
+        try:
+            latest = self.refresh()
+        except Exception as e:
+            self.failed_polls += 1
+            print(f"BlockhashService: Issue refreshing blockhash {e}")
+
+        if self.is_fresh(latest):
+            return latest
+
+        self.expired_requests += 1
+        print("BlockhashService: No fresh blockhash available")
+
+    def get_blockhash(self)->Hash:
+        latest = self.get_fresh_blockhash()
+
+        if latest:
+            return latest.blockhash
+
+    #Same as get_blockhash but records how old the hash was when the transaction got signed
+    def get_blockhash_for_signing(self)->Hash:
+        latest = self.get_fresh_blockhash()
+
+        if latest:
+            self.signing_ages.append(latest.get_age())
+            return latest.blockhash
+
+    def get_stats(self)->dict:
+        latest = self.latest
+        signing_ages = list(self.signing_ages)
+
+        return {"slot": latest.slot if latest else 0, "age": latest.get_age() if latest else None,
+                "avg_signing_age": sum(signing_ages)/len(signing_ages) if signing_ages else 0,
+                "max_signing_age": max(signing_ages) if signing_ages else 0, "failed_polls": self.failed_polls,
+                "stale_refreshes": self.stale_refreshes, "expired_requests": self.expired_requests}
+
+    def run(self):
+        poll_interval = self.poll_interval
+
+        while not self.cancel_event.is_set():
+            failed_polls = self.failed_polls
+
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failed_polls += 1
+                print(f"BlockhashService: Issue refreshing blockhash {e}")
+
+            if self.failed_polls > failed_polls: #Back off so a struggling endpoint isn't hammered
+                poll_interval = min(poll_interval*2, max(self.poll_interval, self.max_poll_interval))
+            else:
+                poll_interval = self.poll_interval
+
+            self.cancel_event.wait(poll_interval)
+
+    def stop(self):
+        self.cancel_event.set()
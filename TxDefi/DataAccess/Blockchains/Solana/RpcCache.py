@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import OrderedDict
+import TxDefi.Utilities.JsonUtil as json_util
+
+#Read-through cache for parsed RPC responses (jsonrpcclient Ok) with per-method TTLs, LRU eviction and single-flight de-duplication
+#Only touched from the RPC event loop thread so no locking is needed
+class RpcCache:
+    no_expiry = float('inf')
+    metadata_ttl = 3600
+    mint_ttl = 30 #Supply and authorities can change, decimals and owner can't
+    default_max_entries = 10000
+
+    #Seconds to keep a result per method; methods not listed are never cached
+    default_ttls = {
+        "getTransaction": no_expiry, #Only non-null (landed) transactions are stored
+        "getAsset": metadata_ttl,
+        "getTokenSupply": mint_ttl,
+        "getTokenLargestAccounts": 5,
+        "getBalance": 2,
+        "getTokenAccountBalance": 2,
+    }
+
+    def __init__(self, max_entries: int = default_max_entries, method_ttls: dict[str, float] = None):
+        self.max_entries = max_entries
+        self.method_ttls = dict(self.default_ttls)
+        self.entries : OrderedDict[str, tuple[float, any]] = OrderedDict() #key=request key, value=(expiry time, result)
+        self.in_flight : dict[str, asyncio.Future] = {}
+
+        if method_ttls:
+            self.method_ttls.update(method_ttls)
+
+        #Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_ttl(self, request_name: str)->float:
+        return self.method_ttls.get(request_name, 0)
+
+    @staticmethod
+    def get_key(request_name: str, params: list)->str:
+        return request_name + json_util.dumps(params, sort_keys=True)
+
+    def _lookup(self, key: str):
+        entry = self.entries.get(key)
+
+        if entry:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                return entry[1]
+            else:
+                self.entries.pop(key)
+
+    def get(self, key: str):
+        result = self._lookup(key)
+
+        if result is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return result
+
+    def put(self, key: str, result, ttl: float):
+        if ttl <= 0 or not result or result.result is None: #Never store failures or null results (e.g. a transaction that hasn't landed yet)
+            return
+
+        self.entries[key] = (time.monotonic() + ttl, result)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, request_name: str, params: list):
+        self.entries.pop(self.get_key(request_name, params), None)
+
+    def clear(self):
+        self.entries.clear()
+
+    #Return a cached result, join an identical in-flight request, or run fetch_coroutine_func and cache what it returns
+    async def get_or_fetch(self, request_name: str, params: list, fetch_coroutine_func, ttl: float = None):
+        ttl = self.get_ttl(request_name) if ttl is None else ttl
+
+        if ttl <= 0:
+            return await fetch_coroutine_func()
+
+        key = self.get_key(request_name, params)
+        result = self._lookup(key)
+
+        if result is not None:
+            self.hits += 1
+            return result
+
+        pending_future = self.in_flight.get(key)
+
+        if pending_future:
+            self.coalesced += 1
+            return await asyncio.shield(pending_future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+
+        try:
+            result = await fetch_coroutine_func()
+            self.put(key, result, ttl)
+            future.set_result(result)
+
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() #Mark as retrieved in case nobody joined
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+
+    def get_stats(self)->dict:
+        total = self.hits + self.misses
+
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "evictions": self.evictions, "hit_rate": self.hits/total if total > 0 else 0}
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import deque
+from jsonrpcclient import request
+from RpcTransport import RpcTransport
+from TxDefi.Utilities.RateLimiter import RateLimiter
+import TxDefi.Utilities.JsonUtil as json_util
+
+#Rolling health stats for one RPC provider
+class RpcEndpoint:
+    window_size = 100 #Number of recent calls used for latency/error stats
+    default_latency = .5 #Seconds assumed until we have samples
+
+    def __init__(self, uri: str, weight: float = 1):
+        self.uri = uri
+        self.weight = weight
+        self.latencies : deque[float] = deque(maxlen=self.window_size)
+        self.errors : deque[bool] = deque(maxlen=self.window_size)
+        self.slot = 0
+        self.in_flight = 0
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.errors.append(False)
+
+    def record_error(self):
+        self.errors.append(True)
+
+    def get_error_rate(self)->float:
+        if len(self.errors) == 0:
+            return 0
+
+        return sum(self.errors)/len(self.errors)
+
+    def get_latency_percentile(self, percentile: float)->float:
+        if len(self.latencies) == 0:
+            return self.default_latency
+
+        sorted_latencies = sorted(self.latencies)
+        index = min(len(sorted_latencies)-1, int(len(sorted_latencies)*percentile))
+
+        return sorted_latencies[index]
+
+    #Lower is healthier
+    def get_score(self, max_slot: int, max_slot_lag: int)->float:
+        slot_lag = max(0, max_slot - self.slot) if self.slot > 0 else 0
+        lag_penalty = 10 if slot_lag > max_slot_lag else 1 + slot_lag/max_slot_lag
+
+        return self.get_latency_percentile(.5)*(1 + 10*self.get_error_rate())*lag_penalty*(1 + self.in_flight/10)/self.weight
+
+    def get_stats(self)->dict:
+        return {"uri": self.uri, "weight": self.weight, "p50": self.get_latency_percentile(.5), "p95": self.get_latency_percentile(.95),
+                "error_rate": self.get_error_rate(), "slot": self.slot}
+
+#Sends each call to the healthiest endpoint; latency critical calls can be hedged to a second endpoint after the p95 latency
+#A hedge is a real extra request, so it is only sent when the rate limiter has a token for it right away; slot polls are charged to it too
+class RpcRouter:
+    max_slot_lag = 20 #Slots behind the best endpoint before being heavily penalized
+    slot_poll_interval = 5 #Seconds
+    min_hedge_delay = .05 #Seconds; don't hedge faster than this even if p95 is tiny
+
+    def __init__(self, transport: RpcTransport, endpoints: list[RpcEndpoint], enable_hedging = True, rate_limiter: RateLimiter = None):
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.endpoints = endpoints
+        self.enable_hedging = enable_hedging
+        self.max_slot = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.slot_task : asyncio.Task = None
+
+    #Must be called from the event loop that owns the transport
+    def start(self):
+        if len(self.endpoints) > 1 and not self.slot_task:
+            self.slot_task = asyncio.get_running_loop().create_task(self._poll_slots())
+
+    def stop(self):
+        if self.slot_task:
+            self.slot_task.cancel()
+            self.slot_task = None
+
+    def get_ranked_endpoints(self)->list[RpcEndpoint]:
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.get_score(self.max_slot, self.max_slot_lag))
+
+    def get_best_endpoint(self)->RpcEndpoint:
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+
+        return min(self.endpoints, key=lambda endpoint: endpoint.get_score(self.max_slot, self.max_slot_lag))
+
+    def get_stats(self)->list[dict]:
+        return [endpoint.get_stats() for endpoint in self.endpoints]
+
+    #HTTP errors and JSON-RPC error bodies (which come back as HTTP 200); a batch only counts if every call in it failed
+    @staticmethod
+    def is_error_response(response)->bool:
+        if response.status_code >= 400:
+            return True
+        elif b'"error"' not in response.content: #Skip the parse for the common case
+            return False
+
+        try:
+            body = json_util.loads(response.content)
+        except Exception:
+            return True
+
+        if isinstance(body, list):
+            return len(body) > 0 and all(isinstance(item, dict) and 'error' in item for item in body)
+
+        return isinstance(body, dict) and 'error' in body
+
+    async def _post_to_endpoint(self, endpoint: RpcEndpoint, json_request: dict | list):
+        endpoint.in_flight += 1
+        start_time = time.monotonic()
+
+        try:
+            response = await self.transport.post(endpoint.uri, json_request)
+
+            if self.is_error_response(response):
+                endpoint.record_error()
+            else:
+                endpoint.record_success(time.monotonic()-start_time)
+
+            return response
+        except Exception:
+            endpoint.record_error()
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+    #hedge_cost: rate limiter cost of the hedged request
+    async def post(self, json_request: dict | list, hedge = False, hedge_cost: float = 1):
+        if not hedge or not self.enable_hedging or len(self.endpoints) < 2:
+            return await self._post_to_endpoint(self.get_best_endpoint(), json_request)
+
+        ranked_endpoints = self.get_ranked_endpoints()
+        primary_task = asyncio.create_task(self._post_to_endpoint(ranked_endpoints[0], json_request))
+        hedge_delay = max(self.min_hedge_delay, ranked_endpoints[0].get_latency_percentile(.95))
+        done, _ = await asyncio.wait([primary_task], timeout=hedge_delay)
+
+        if done and not primary_task.exception() and not self.is_error_response(primary_task.result()):
+            return primary_task.result()
+
+        if self.rate_limiter and not self.rate_limiter.try_acquire(hedge_cost): #No budget to hedge; stick with the primary
+            self.hedges_skipped += 1
+            return await primary_task
+
+        #Primary is slow or failed; race it against the next healthiest endpoint
+        self.hedges += 1
+        pending = {asyncio.create_task(self._post_to_endpoint(ranked_endpoints[1], json_request))}
+
+        if not done:
+            pending.add(primary_task)
+
+        last_task = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                last_task = task
+
+                if not task.exception() and not self.is_error_response(task.result()):
+                    for pending_task in pending:
+                        pending_task.cancel()
+
+                    return task.result()
+
+        if last_task and last_task.exception():
+            raise last_task.exception()
+        elif last_task:
+            return last_task.result()
+        else:
+            return primary_task.result()
+
+    async def _poll_slots(self):
+        while True:
+            await asyncio.gather(*[self._update_slot(endpoint) for endpoint in self.endpoints])
+            await asyncio.sleep(self.slot_poll_interval)
+
+    async def _update_slot(self, endpoint: RpcEndpoint):
+        if self.rate_limiter and not await self.rate_limiter.acquire_sem_async(self.rate_limiter.get_cost("getSlot")): #Shutting down
+            return
+
+        try:
+            response = await self._post_to_endpoint(endpoint, request("getSlot", params=[{"commitment": "processed"}]))
+            slot = json_util.loads(response.content).get('result')
+
+            if isinstance(slot, int):
+                endpoint.slot = slot
+                self.max_slot = max(self.max_slot, slot)
+        except Exception as e:
+            pass #Already recorded as an error against the endpoint
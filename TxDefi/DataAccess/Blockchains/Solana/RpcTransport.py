@@ -0,0 +1,51 @@
+import asyncio
+import httpx
+import TxDefi.Utilities.JsonUtil as json_util
+
+#Connection pooled async HTTP transport shared by every JSON-RPC call; one keep-alive client per endpoint
+#Must only be used from the event loop thread that owns it (see AsyncSolanaRpcApi)
+class RpcTransport:
+    default_pool_size = 10
+    default_timeout = 30
+    max_retries = 3
+    backoff_factor = 0.5
+    retry_status_codes = [500, 502, 503, 504] #429s are handed back to the caller's rate limiter
+    headers = {"Content-Type": "application/json"}
+
+    def __init__(self, pool_size: int = default_pool_size, timeout: float = default_timeout):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.clients : dict[str, httpx.AsyncClient] = {} #key=endpoint uri
+
+    def _create_client(self)->httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=self.max_retries) #Retries failed connects
+
+        return httpx.AsyncClient(headers=self.headers, timeout=self.timeout, transport=transport)
+
+    def get_client(self, uri: str)->httpx.AsyncClient:
+        client = self.clients.get(uri)
+
+        if not client:
+            client = self._create_client()
+            self.clients[uri] = client
+
+        return client
+
+    async def post(self, uri: str, json_request: dict | list, timeout: float = None)->httpx.Response:
+        client = self.get_client(uri)
+        content = json_util.dumps_bytes(json_request) #Serialize once, outside the retry loop
+
+        for attempt in range(self.max_retries+1):
+            response = await client.post(uri, content=content, timeout=timeout or self.timeout)
+
+            if response.status_code not in self.retry_status_codes or attempt == self.max_retries:
+                return response
+
+            await asyncio.sleep(self.backoff_factor*2**attempt)
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.aclose()
+
+        self.clients.clear()
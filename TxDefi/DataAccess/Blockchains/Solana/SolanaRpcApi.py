@@ -1,4 +1,3 @@
-import requests
 import base58
 import time
 from jsonrpcclient import request, parse, Ok, Error
@@ -11,56 +10,54 @@ from solders.instruction import Instruction, AccountMeta
 from solders.transaction import VersionedTransaction
 from solders.system_program import TransferParams, transfer
 from solana.rpc.async_api import AsyncClient
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
 from TxDefi.Data.Amount import Amount
 from TxDefi.Data.MarketDTOs import TokenInfo
 from TxDefi.Data.TransactionInfo import SwapTransactionInfo, AccountInfo
 from TxDefi.Utilities.RateLimiter import RateLimiter
+from RpcTransport import RpcTransport
+from AsyncSolanaRpcApi import AsyncSolanaRpcApi
+from RpcCache import RpcCache
+from BlockhashService import BlockhashService
+import AccountLayouts as account_layouts
 import SolanaUtilities as solana_utilites
 
 class SolanaRpcApi(RateLimiter):
-    retry = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["POST"]
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-
-    def __init__(self, rpc_uri: str, wss_uri: str, rate_limit: int, rpc_backup_uri: str = None):
-        RateLimiter.__init__(self, rate_limit)
+    #Relative rate limiter cost per call; anything not listed costs 1
+    method_weights = {"getProgramAccounts": 10, "getBlock": 10, "getTokenLargestAccounts": 5, "getSignaturesForAddress": 2, "getMultipleAccounts": 2}
+
+    def __init__(self, rpc_uri: str, wss_uri: str, rate_limit: float, rpc_backup_uri: str = None, pool_size = RpcTransport.default_pool_size,
+                 rpc_endpoints: list[tuple[str, float]] = None, enable_hedging = True, blockhash_poll_interval = BlockhashService.default_poll_interval):
+        RateLimiter.__init__(self, rate_limit, method_weights=SolanaRpcApi.method_weights)
         self.rpc_uri = rpc_uri
         self.rpc_backup_uri = rpc_backup_uri #Needed for getAsset (Quicknode and Helius provides this)
         self.wss_uri = wss_uri
         self.async_client = AsyncClient(self.rpc_uri)
         self.client = Client(self.rpc_uri)   
-        self.last_block_hash = None           
-        self.session = requests.Session()
-        self.session.mount(self.rpc_uri, self.adapter)
-
-    def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False):
-        try:            
-            for i in range(max_tries):
-                if self.acquire_sem():
-                    #print("Request: " + request_name)
-                    json_request = request(request_name, params=params)
-
-                    if use_backup and self.rpc_backup_uri:
-                        response = requests.post(self.rpc_backup_uri, json=json_request)
-                    else:
-                        response = requests.post(self.rpc_uri, json=json_request)
-
-                    parsed = parse(response.json())
-
-                    if isinstance(parsed, Error):
-                        pass
-                    else:
-                        return parsed
-        
-                    time.sleep(.2) #Limit to 5 calls per second
-        except Exception as e:
-            print(f"SolanaRpcApi: Failure on request {request_name}. Check your RPC Node. Error: {e}.")
+        self.blockhash_service = BlockhashService(self, blockhash_poll_interval)
+        self.async_api = AsyncSolanaRpcApi(rpc_uri, self, rpc_backup_uri, pool_size, rpc_endpoints, enable_hedging) #All RPC traffic runs on its event loop; the methods below are blocking wrappers
+
+    def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False, cache_ttl: float = None):
+        return self.async_api.run_coroutine(self.async_api.run_rpc_method(request_name, params, max_tries, use_backup, cache_ttl))
+
+    #Packs many calls into one JSON-RPC array POST; returns the parsed responses in the same order as requests_list (None on failure)
+    def run_rpc_batch(self, requests_list: list[tuple[str, list]], max_tries = 1, use_backup = False)->list[Ok]:
+        return self.async_api.run_coroutine(self.async_api.run_rpc_batch(requests_list, max_tries, use_backup))
+
+    def get_cache_stats(self)->dict:
+        return self.async_api.cache.get_stats()
+
+    def get_endpoint_stats(self)->list[dict]:
+        return self.async_api.router.get_stats()
+
+    def start(self):
+        RateLimiter.start(self)
+        self.async_api.start()
+        self.blockhash_service.start()
+
+    def stop(self):
+        self.blockhash_service.stop()
+        RateLimiter.stop(self)
+        self.async_api.stop()
 
     def get_transaction(self, tx_signature: str, max_tries = 1)->dict[str, any]:
         response = self.run_rpc_method("getTransaction", [tx_signature,
@@ -89,6 +86,11 @@ class SolanaRpcApi(RateLimiter):
         else:
             return None
 
+    def get_account_balances(self, account_addresses: list[str], max_tries=1)->list[int]:
+        responses = self.run_rpc_batch([("getBalance", [address]) for address in account_addresses], max_tries)
+
+        return [response.result['value'] if response else None for response in responses]
+
     def get_signatures_for_address(self, contract_address: str, min_slot: int, limit = 1):
         response = self.run_rpc_method("getSignaturesForAddress", [contract_address,
                                                                    {'commitment': 'confirmed', 'minContextSlot': min_slot, 'limit': limit}])
@@ -109,6 +111,18 @@ class SolanaRpcApi(RateLimiter):
         else:
             return None
         
+    def get_token_account_balances(self, associated_token_addresses: list[str], max_tries=1)->list[Amount]:
+        responses = self.run_rpc_batch([("getTokenAccountBalance", [address]) for address in associated_token_addresses], max_tries)
+        ret_amounts : list[Amount] = []
+
+        for response in responses:
+            if response:
+                ret_amounts.append(Amount.tokens_ui(response.result['value']['uiAmount'], response.result['value']['decimals']))
+            else:
+                ret_amounts.append(None)
+
+        return ret_amounts
+
     def get_token_account_balance2(self, contract_address: str, owner_address: str, token_program_address: str, max_tries=1)->Amount:
         token_account_address = self.get_associated_token_account_address(owner_address, contract_address, token_program_address)
         token_balance = self.get_token_account_balance(token_account_address, max_tries)
@@ -160,11 +174,10 @@ class SolanaRpcApi(RateLimiter):
     
     def get_token_account_by_owner(self, mint_address: str, owner_address: str)->AccountInfo:
         token_accounts = self.get_token_largest_accounts(mint_address)
+        spl_token_accounts = self.get_spl_token_accounts([token_account.account_address for token_account in token_accounts])
         
-        for token_account in token_accounts:
-            token_owner_address = self.get_spl_account_owner(token_account.account_address)
-
-            if token_owner_address == owner_address:
+        for token_account, spl_token_account in zip(token_accounts, spl_token_accounts):
+            if spl_token_account and spl_token_account.owner_address == owner_address:
                 return token_account
             
     #Get top holding amount from top holders not including the liquidity pool accounts (i.e pumpfun or raydium)
@@ -173,20 +186,23 @@ class SolanaRpcApi(RateLimiter):
         token_accounts = self.get_token_largest_accounts(mint_address, number_accounts+num_exclusions)
         num_accounts_processed = 0
         total_tokens_held = 0
+        account_owner_addresses = []
+
+        if num_exclusions > 0: #Look up every owner in one or two batched round trips instead of one call per account
+            token_account_addresses = [token_account.account_address for token_account in token_accounts]
+
+            if is_spl_token:
+                token_owner_addresses = self.get_spl_account_owners(token_account_addresses)
+                account_owner_addresses = self.get_spl_account_owners(token_owner_addresses)
+            else:
+                account_owner_addresses = [solana_utilites.SYSVAR_SYSTEM_PROGRAM_ID]*len(token_accounts)
       
-        for token_account in token_accounts:
+        for index, token_account in enumerate(token_accounts):
             should_exclude = False
             #Don't include the pool owner tokens account into the calculation
             if num_accounts_processed < number_accounts:
                 if num_exclusions > 0:
-                    if is_spl_token:
-                        token_owner_address = self.get_spl_account_owner(token_account.account_address)
-                        account_owner_address = self.get_spl_account_owner(token_owner_address)
-                    else:
-                        token_owner_address = self.get_account_owner(token_account.account_address)
-                        account_owner_address = solana_utilites.SYSVAR_SYSTEM_PROGRAM_ID
-                    
-                    should_exclude = account_owner_address in exclude_owners
+                    should_exclude = account_owner_addresses[index] in exclude_owners
             
             if not should_exclude:
                 total_tokens_held += token_account.balance.to_scaled()
@@ -211,7 +227,7 @@ class SolanaRpcApi(RateLimiter):
         print("getBlock: Couldn't get asset")
 
     def get_account_owner(self, address: str, max_tries=1)->str:
-        account_info = self.get_account_info(address, max_tries)
+        account_info = self.get_account_info(address, max_tries, RpcCache.no_expiry) #Program owners don't change
         
         if account_info:
             return account_info.get('value', {}).get('owner')
@@ -222,6 +238,13 @@ class SolanaRpcApi(RateLimiter):
         if account_info:
             return account_info.get('owner')
 
+    def get_account_owners(self, addresses: list[str], max_tries=1)->list[str]:
+        return [account_info.get('value', {}).get('owner') if account_info and account_info.get('value') else None
+                for account_info in self.get_account_infos(addresses, max_tries)]
+
+    def get_spl_account_owners(self, addresses: list[str], max_tries=1)->list[str]:
+        return [account_info.get('owner') if account_info else None for account_info in self.get_account_infos_parsed(addresses, max_tries)]
+
     def get_account_spl_token_address(self, address: str, max_tries=1)->str:
         account_info = self.get_account_info(address, max_tries)
 
@@ -234,8 +257,47 @@ class SolanaRpcApi(RateLimiter):
         if account_info:
             return account_info.get('value', {}).get('data', {}).get('parsed', {}).get('info')
     
-    def get_account_info(self, address: str, max_tries=1)->dict:
-        response = self.run_rpc_method("getAccountInfo", [address, {"encoding": "jsonParsed"}],  max_tries) #FIXME doesn't work with all rpcs
+    def get_account_infos_parsed(self, addresses: list[str], max_tries=1)->list[dict]:
+        ret_infos : list[dict] = []
+
+        for account_info in self.get_account_infos(addresses, max_tries):
+            if account_info and account_info.get('value'):
+                ret_infos.append(account_info['value'].get('data', {}).get('parsed', {}).get('info'))
+            else:
+                ret_infos.append(None)
+
+        return ret_infos
+
+    def get_account_infos(self, addresses: list[str], max_tries=1)->list[dict]:
+        valid_indices = [index for index, address in enumerate(addresses) if address] #Chained lookups can hand us None addresses
+        responses = self.run_rpc_batch([("getAccountInfo", [addresses[index], {"encoding": "jsonParsed"}]) for index in valid_indices], max_tries)
+        ret_infos : list[dict] = [None]*len(addresses)
+
+        for index, response in zip(valid_indices, responses):
+            if response:
+                ret_infos[index] = response.result
+
+        return ret_infos
+
+    #Raw base64 account values in the same order as addresses (None if missing)
+    def get_multiple_accounts(self, addresses: list[str], max_tries=1)->list[dict]:
+        return self.get_multiple_accounts_at_slot(addresses, max_tries)[0]
+
+    def get_multiple_accounts_at_slot(self, addresses: list[str], max_tries=1)->tuple[list[dict], int]:
+        ret_value = self.async_api.run_coroutine(self.async_api.get_multiple_accounts_at_slot(addresses, max_tries))
+
+        return ret_value if ret_value else ([None]*len(addresses), 0) #Timed out
+    
+    def get_spl_token_accounts(self, addresses: list[str], max_tries=1)->list[account_layouts.SplTokenAccount]:
+        return [account_layouts.parse_token_account(address, account_layouts.get_account_bytes(value))
+                for address, value in zip(addresses, self.get_multiple_accounts(addresses, max_tries))]
+    
+    def get_spl_mints(self, addresses: list[str], max_tries=1)->list[account_layouts.SplMint]:
+        return [account_layouts.parse_mint(address, account_layouts.get_account_bytes(value))
+                for address, value in zip(addresses, self.get_multiple_accounts(addresses, max_tries))]
+
+    def get_account_info(self, address: str, max_tries=1, cache_ttl: float = None)->dict:
+        response = self.run_rpc_method("getAccountInfo", [address, {"encoding": "jsonParsed"}],  max_tries, cache_ttl=cache_ttl) #FIXME doesn't work with all rpcs
 
         if response:
             return response.result
@@ -263,6 +325,19 @@ class SolanaRpcApi(RateLimiter):
                
             return Amount.tokens_ui(supply, decimals)
 
+    def get_token_supplies_Amount(self, addresses: list[str], max_tries=1)->list[Amount]:
+        responses = self.run_rpc_batch([("getTokenSupply", [address]) for address in addresses], max_tries)
+        ret_amounts : list[Amount] = []
+
+        for response in responses:
+            if response:
+                supply_dict = response.result.get('value', {})
+                ret_amounts.append(Amount.tokens_ui(supply_dict.get('uiAmount', 0), supply_dict.get('decimals', 1)))
+            else:
+                ret_amounts.append(None)
+
+        return ret_amounts
+
     def get_priority_fee_estimate(self, program_address: str):
         response = self.run_rpc_method("getPriorityFeeEstimate", [ {'accountKeys': [program_address]},
                                                                  {'options': {'recommended': True}} ])
@@ -298,17 +373,14 @@ class SolanaRpcApi(RateLimiter):
         print("get_latest_block_hash: Couldn't do it")
 
     def update_latest_block_hash(self)->Hash:
-        block_hash_str = self.get_latest_block_hash()
+        latest = self.blockhash_service.refresh()
 
-        if block_hash_str:
-            self.last_block_hash = Hash.from_string(block_hash_str)
-            return self.last_block_hash
+        if latest:
+            return latest.blockhash
     
+    #Kept fresh in the background by the blockhash service; doesn't make an RPC call once the first hash has landed
     def get_last_recorded_block_hash(self)->Hash:
-        if not self.last_block_hash:
-            self.update_latest_block_hash()
-            
-        return self.last_block_hash
+        return self.blockhash_service.get_blockhash_for_signing()
     
     def send_transaction(self, transaction: VersionedTransaction, maxTries=0):
         transaction_bytes = bytes(transaction)
@@ -488,8 +560,17 @@ class SolanaRpcApi(RateLimiter):
                     "commitment": "confirmed", # defaults to finalized if unset
                 }
             ]
-        }           
-    
+        }
+
+    @staticmethod
+    def get_account_unsubscribe_request(subscription_id: int, id = 420):
+         return {
+                "jsonrpc": "2.0",
+                "id": id,
+                "method": "accountUnsubscribe",
+                "params": [subscription_id] # server subscription id returned by accountSubscribe
+        }
+
     @staticmethod
     def get_block_request(slot: int):
          return {
@@ -15,6 +15,11 @@ class SolanaTxBuilder(TransactionBuilder[VersionedTransaction]):
     def build_v0_transaction(self, instructions: list[Instruction], signer: SolPubKey)->VersionedTransaction:        
         signer_pubkey = signer.get_key_pair().pubkey()
         blockhash = self.solana_rpc_api.get_last_recorded_block_hash()
+
+        if not blockhash: #Better to skip the trade than sign with an expired hash
+            print("SolanaTxBuilder: No valid blockhash to sign with")
+            return
+
         message = Message(instructions, signer_pubkey)
         
         return Transaction([signer.get_key_pair()], message, blockhash)
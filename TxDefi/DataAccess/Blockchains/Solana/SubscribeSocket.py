@@ -1,35 +1,64 @@
-import json
 from pubsub import pub
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.DataAccess.Decoders import MessageDecoder
 from TxDefi.DataAccess.MarketDataSocket import MarketDataSocket
+from TxDefi.DataAccess.Decoders.NotificationFilter import NotificationFilter
+from TxDefi.DataAccess.Decoders.DecodeProcessPool import DecodeProcessPool
+import TxDefi.DataAccess.Decoders.NotificationSchemas as notification_schemas
+from TxDefi.Utilities.BoundedQueue import OverflowPolicy
 
 class SubscribeSocket(MarketDataSocket):    
-    def __init__(self, wss_uri: str, event_decoder: MessageDecoder, out_topic: str, requests: list[str] = [], ping = True):
-        MarketDataSocket.__init__(self, wss_uri, ping)
+    def __init__(self, wss_uri: str, event_decoder: MessageDecoder, out_topic: str, requests: list[str] = [], ping = True, coalesce_requests = False,
+                 receive_queue_size = MarketDataSocket.default_receive_queue_size, overflow_policy = OverflowPolicy.DROP_OLDEST, decode_workers = 1,
+                 notification_filter: NotificationFilter = None, decode_pool: DecodeProcessPool = None):
+        MarketDataSocket.__init__(self, wss_uri, ping, coalesce_requests, receive_queue_size, overflow_policy, decode_workers)
    
         self.event_decoder = event_decoder
         self.out_topic = out_topic
         self.count = 1
         self.sub_requests = requests
+        self.notification_filter = notification_filter #Optional; drops irrelevant notifications before they're parsed
+        self.prefiltered = 0
+        self.decode_pool = decode_pool #Optional; hands frames to decode processes that publish to their own out topic
 
     def _init(self):
-        for sub_request in self.sub_requests:
-            #print(f"Sending sub_request: {sub_request}")
-            self.send_request_no_wait(sub_request)
+        #print(f"Sending sub_requests: {self.sub_requests}")
+        MarketDataSocket.send_requests_no_wait(self, list(self.sub_requests))
 
     def add_sub_request(self, request: str):   
         if request not in self.sub_requests:
             self.sub_requests.append(request)
 
-    def send_request_no_wait(self, request: str):
-        super().send_request_no_wait(request)
+    def send_requests_no_wait(self, requests: list[str]):
+        super().send_requests_no_wait(requests)
 
-        self.add_sub_request(request)
+        for request in requests:
+            self.add_sub_request(request)
+
+    def get_stats(self)->dict:
+        stats = MarketDataSocket.get_stats(self)
+        stats["prefiltered"] = self.prefiltered
+
+        return stats
 
     def process_data(self, data: str):   
-        json_data = json.loads(data)
+        if self.notification_filter and not self.notification_filter.is_relevant(data):
+            self.prefiltered += 1
+            return
+
+        if self.decode_pool:
+            self.decode_pool.submit(data)
+            return
+
+        json_data = notification_schemas.decode_notification(data) #Typed schema for hot notifications when msgspec is installed
+
+        if isinstance(json_data, list): #Response to a coalesced frame
+            for json_item in json_data:
+                self._process_json(json_item)
+        else:
+            self._process_json(json_data)
 
+    def _process_json(self, json_data: dict | object):
         if json_data:
             #print("Decoding " + data + "\n")
             decoded_data = self.event_decoder.decode(json_data)
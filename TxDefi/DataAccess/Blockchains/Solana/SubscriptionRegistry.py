@@ -0,0 +1,81 @@
+import threading
+
+#One logical subscription; survives reconnects while server_id changes with every connection
+class LogicalSubscription:
+    def __init__(self, request_id: int, request: str, account_address: str, config: dict, decoder):
+        self.request_id = request_id
+        self.request = request
+        self.account_address = account_address
+        self.config = config #Encoding/commitment the subscription was made with
+        self.decoder = decoder
+        self.server_id : int = None #None until confirmed on the current connection
+        self.last_slot = 0 #Slot of the newest state delivered to subscribers
+
+#Owns the logical subscriptions of a socket so server subscription ids can be remapped after a reconnect
+class SubscriptionRegistry:
+    def __init__(self):
+        self.subscriptions : dict[int, LogicalSubscription] = {} #key=request id
+        self.server_ids : dict[int, LogicalSubscription] = {} #key=server subscription id on the current connection
+        self.lock = threading.Lock()
+
+    def add(self, subscription: LogicalSubscription):
+        with self.lock:
+            self.subscriptions[subscription.request_id] = subscription
+
+    def remove(self, request_id: int)->LogicalSubscription:
+        with self.lock:
+            subscription = self.subscriptions.pop(request_id, None)
+
+            if subscription and subscription.server_id is not None:
+                self.server_ids.pop(subscription.server_id, None)
+
+            return subscription
+
+    def get(self, request_id: int)->LogicalSubscription:
+        return self.subscriptions.get(request_id)
+
+    def get_by_server_id(self, server_id: int)->LogicalSubscription:
+        return self.server_ids.get(server_id)
+
+    #Map the server's id for this connection; returns None for requests we don't own (e.g. unsubscribe acks)
+    def confirm(self, request_id: int, server_id: int)->LogicalSubscription:
+        with self.lock:
+            subscription = self.subscriptions.get(request_id)
+
+            if subscription and isinstance(server_id, int) and not isinstance(server_id, bool):
+                if subscription.server_id is not None:
+                    self.server_ids.pop(subscription.server_id, None)
+
+                subscription.server_id = server_id
+                self.server_ids[server_id] = subscription
+
+                return subscription
+
+    #Forget every server id (the connection they belonged to is gone) and return the requests to replay
+    def reset_server_ids(self)->list[str]:
+        with self.lock:
+            self.server_ids.clear()
+
+            for subscription in self.subscriptions.values():
+                subscription.server_id = None
+
+            return [subscription.request for subscription in self.subscriptions.values()]
+
+    #Returns False if the update is older than what subscribers already have
+    def update_slot(self, subscription: LogicalSubscription, slot: int)->bool:
+        with self.lock:
+            if slot < subscription.last_slot:
+                return False
+
+            subscription.last_slot = slot
+
+            return True
+
+    def get_pending_count(self)->int:
+        return sum(1 for subscription in list(self.subscriptions.values()) if subscription.server_id is None)
+
+    def get_confirmed(self)->list[LogicalSubscription]:
+        return [subscription for subscription in list(self.subscriptions.values()) if subscription.server_id is not None]
+
+    def get_stats(self)->dict:
+        return {"subscriptions": len(self.subscriptions), "confirmed": len(self.server_ids)}
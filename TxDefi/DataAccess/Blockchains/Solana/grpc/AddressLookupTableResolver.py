@@ -0,0 +1,196 @@
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from solders.pubkey import Pubkey
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+import TxDefi.DataAccess.Blockchains.Solana.AccountLayouts as account_layouts
+
+#Snapshot of an on-chain address lookup table; addresses stay raw 32 byte keys
+class AddressLookupTable:
+    header_struct = struct.Struct("<IQQB") #type, deactivation slot, last extended slot, last extended slot start index
+    header_size = 56 #Metadata is padded out to 56 bytes before the address list
+    address_size = 32
+    active_slot = 2**64 - 1 #Deactivation slot of a table that hasn't been deactivated
+    deactivation_cooldown = 513 #Slots a deactivated table can still be used (slot hashes depth)
+
+    def __init__(self, table_key: bytes, deactivation_slot: int, last_extended_slot: int, addresses: list[bytes], fetched_slot: int):
+        self.table_key = table_key
+        self.deactivation_slot = deactivation_slot
+        self.last_extended_slot = last_extended_slot
+        self.addresses = addresses
+        self.fetched_slot = fetched_slot #Slot of the RPC response this snapshot came from
+
+    def is_usable(self, slot: int)->bool:
+        return self.deactivation_slot == self.active_slot or slot <= self.deactivation_slot + self.deactivation_cooldown
+
+    @staticmethod
+    def from_bytes(table_key: bytes, data: bytes, fetched_slot: int)->"AddressLookupTable":
+        if data and len(data) >= AddressLookupTable.header_size:
+            type_index, deactivation_slot, last_extended_slot, _ = AddressLookupTable.header_struct.unpack_from(data, 0)
+
+            if type_index == 1: #0 is an uninitialized table
+                address_size = AddressLookupTable.address_size
+                addresses = [data[offset:offset+address_size] for offset in range(AddressLookupTable.header_size, len(data) - address_size + 1, address_size)]
+
+                return AddressLookupTable(table_key, deactivation_slot, last_extended_slot, addresses, fetched_slot)
+
+#Resolves v0 address table lookups from a local cache and fetches missing or outdated tables in the background so the stream never waits on the RPC
+#A table is refetched when a transaction newer than the cached snapshot indexes past its end (i.e. the table was extended since)
+#or still uses it after the snapshot's deactivation cooldown
+class AddressLookupTableResolver(threading.Thread):
+    default_max_tables = 5000
+    max_batch_size = 100 #getMultipleAccounts limit
+    retry_interval = 2 #Seconds before a table that couldn't be loaded is requested again
+    poll_interval = .5
+
+    #on_fetched: called from the resolver thread after every fetch attempt so waiting transactions can be retried right away
+    def __init__(self, solana_rpc: SolanaRpcApi, max_tables = default_max_tables, on_fetched: Callable[[], None] = None):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = AddressLookupTableResolver.__name__
+        self.solana_rpc = solana_rpc
+        self.on_fetched = on_fetched
+        self.max_tables = max_tables
+        self.tables : OrderedDict[bytes, AddressLookupTable] = OrderedDict() #key=raw table address; LRU order
+        self.pending : dict[bytes, None] = {} #Tables waiting to be fetched, in request order
+        self.failed : dict[bytes, float] = {} #key=raw table address, value=time of the failed fetch
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.cancel_event = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.refetches = 0
+        self.fetched = 0
+        self.failed_fetches = 0
+        self.evictions = 0
+        self.unusable = 0 #Lookups into a table that is deactivated past its cooldown even in a snapshot newer than the transaction
+
+    def request(self, table_key: bytes):
+        with self.lock:
+            failed_time = self.failed.get(table_key)
+
+            if failed_time is not None and time.monotonic() - failed_time < self.retry_interval:
+                return
+
+            if table_key not in self.pending:
+                self.pending[table_key] = None
+                self.wake_event.set()
+
+    #Loaded (writable, readonly) keys in account order or None if a table isn't cached yet; missing tables are requested
+    #A table that can't be used at slot even after a refetch resolves to no keys at all so the transaction isn't held for nothing
+    def resolve(self, address_table_lookups, slot: int)->tuple[list[bytes], list[bytes]]:
+        tables : list[AddressLookupTable] = []
+        is_resolved = True
+
+        with self.lock:
+            for lookup in address_table_lookups:
+                table = self.tables.get(lookup.account_key)
+
+                if table:
+                    self.tables.move_to_end(lookup.account_key)
+
+                tables.append(table)
+
+        for lookup, table in zip(address_table_lookups, tables):
+            if table is None:
+                self.request(lookup.account_key)
+                is_resolved = False
+            elif not table.is_usable(slot):
+                if slot <= table.fetched_slot: #Our snapshot is already newer; waiting won't help
+                    self.unusable += 1
+                    return [], []
+
+                self.refetches += 1 #Deactivated in our snapshot but the chain still accepted it; the table was likely recreated
+                self.request(lookup.account_key)
+                is_resolved = False
+            elif max(max(lookup.writable_indexes, default=0), max(lookup.readonly_indexes, default=0)) >= len(table.addresses):
+                if slot > table.fetched_slot: #Extended after our snapshot
+                    self.refetches += 1
+                    self.request(lookup.account_key)
+
+                is_resolved = False
+
+        if not is_resolved:
+            self.misses += 1
+            return
+
+        writable_keys = []
+        readonly_keys = []
+
+        #All writable addresses come first (table by table), then all readonly ones
+        for lookup, table in zip(address_table_lookups, tables):
+            writable_keys.extend(table.addresses[index] for index in lookup.writable_indexes)
+
+        for lookup, table in zip(address_table_lookups, tables):
+            readonly_keys.extend(table.addresses[index] for index in lookup.readonly_indexes)
+
+        self.hits += 1
+        return writable_keys, readonly_keys
+
+    def _fetch(self, table_keys: list[bytes])->bool:
+        addresses = [str(Pubkey.from_bytes(table_key)) for table_key in table_keys]
+        response = self.solana_rpc.run_rpc_method("getMultipleAccounts", [addresses, {"encoding": "base64", "commitment": "processed"}], cache_ttl=0)
+
+        if not response:
+            self.failed_fetches += 1
+            return False
+
+        fetched_slot = response.result.get('context', {}).get('slot', 0)
+        values = response.result.get('value', [])
+
+        with self.lock:
+            for table_key, value in zip(table_keys, values):
+                self.pending.pop(table_key, None)
+                table = AddressLookupTable.from_bytes(table_key, account_layouts.get_account_bytes(value), fetched_slot)
+
+                if table:
+                    self.tables[table_key] = table
+                    self.tables.move_to_end(table_key)
+                    self.failed.pop(table_key, None)
+                    self.fetched += 1
+                else:
+                    self.failed[table_key] = time.monotonic()
+                    self.failed_fetches += 1
+
+            while len(self.tables) > self.max_tables:
+                self.tables.popitem(last=False)
+                self.evictions += 1
+
+        return True
+
+    def get_stats(self)->dict:
+        return {"tables": len(self.tables), "pending": len(self.pending), "hits": self.hits, "misses": self.misses, "refetches": self.refetches,
+                "fetched": self.fetched, "failed_fetches": self.failed_fetches, "evictions": self.evictions, "unusable": self.unusable}
+
+    def run(self):
+        while not self.cancel_event.is_set():
+            self.wake_event.wait(self.poll_interval)
+            self.wake_event.clear()
+
+            with self.lock:
+                table_keys = list(self.pending.keys())[:self.max_batch_size]
+
+            if len(table_keys) == 0:
+                continue
+
+            try:
+                is_fetched = self._fetch(table_keys)
+            except Exception as e:
+                is_fetched = False
+                self.failed_fetches += 1
+                print(f"AddressLookupTableResolver: Issue fetching lookup tables {e}")
+
+            if self.on_fetched:
+                self.on_fetched()
+
+            if not is_fetched: #Back off instead of hammering an RPC that's down
+                self.cancel_event.wait(self.retry_interval)
+
+            with self.lock:
+                if len(self.pending) > 0:
+                    self.wake_event.set()
+
+    def stop(self):
+        self.cancel_event.set()
+        self.wake_event.set()
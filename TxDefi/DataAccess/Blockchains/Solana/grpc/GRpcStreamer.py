@@ -3,6 +3,8 @@ from solders.pubkey import Pubkey
 import base58
 import threading
 import json
+import time
+from collections import deque
 from pubsub import pub
 
 import os
@@ -15,200 +17,182 @@ from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
 import geyser_pb2
 import geyser_pb2_grpc
 from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
-from TxDefi.DataAccess.Blockchains.Solana.grpc.solana_storage_pb2 import TokenBalance
+from TxDefi.DataAccess.Blockchains.Solana.grpc.ProtoParsedTransaction import ProtoParsedTransaction
+from TxDefi.DataAccess.Blockchains.Solana.grpc.AddressLookupTableResolver import AddressLookupTableResolver
+from TxDefi.DataAccess.Blockchains.Solana.grpc.GeyserStreamClient import GeyserStreamClient
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
 from TxDefi.Data.TransactionInfo import *
 import TxDefi.Data.Globals as globals
 
-class SerializableUiTokenAmount:
-    def __init__(self, uiAmount: float, decimals: int, amount: int, uiAmountString: str):
-        self.uiAmount = uiAmount
-        self.decimals = decimals
-        self.amount = amount
-        self.uiAmountString = uiAmountString
-    
-    def to_json(self):
-        return json.dumps(self.__dict__)  # Convert object to JSON
-
-class SerializablePubkey:
-    def __init__(self, pubkey: str, writable: bool, signer: bool, source = 'transaction'):
-        self.pubkey = pubkey
-        self.writable = writable
-        self.signer = signer
-        self.source = source
-    
-    def to_json(self):
-        return json.dumps(self.__dict__)  # Convert object to JSON
-    
-class SerializableTokenBalance:
-    def __init__(self, accountIndex: int, mint: str, uiTokenAmount: SerializableUiTokenAmount, owner: str, programId: str):
-        self.accountIndex = accountIndex
-        self.mint = mint
-        self.uiTokenAmount = uiTokenAmount
-        self.owner = owner
-        self.programId = programId
-
-    def to_dict(self):
-        ret_dict = self.__dict__
-        ret_dict['uiTokenAmount'] = self.uiTokenAmount.__dict__
-        return ret_dict
-
-    def to_json(self):
-        return json.dumps(self, default=lambda o: o.__dict__)
-    
-def parse_token_balance(grpc_balance: TokenBalance)->SerializableTokenBalance:
-    ui_token_amount = SerializableUiTokenAmount(grpc_balance.ui_token_amount.ui_amount, grpc_balance.ui_token_amount.decimals,
-                                                 grpc_balance.ui_token_amount.amount,  grpc_balance.ui_token_amount.ui_amount_string)
-    return SerializableTokenBalance(grpc_balance.account_index, grpc_balance.mint, ui_token_amount, grpc_balance.owner,
-                                    grpc_balance.program_id)
-   
 class YellowstoneGrpcStreamReader(threading.Thread):
-    address_lookup_tables : dict[str, dict] = {}
+    max_park_time = .4 #Seconds a transaction waits on its lookup tables before it's published with only the keys we have
+    max_parked = 5000
+    max_recent_signatures = 20000 #Enough to cover the slot replayed after a reconnect
+    filter_name = "amms"
 
-    def __init__(self, endpoint, solana_rpc: SolanaRpcApi, tx_decoder: TransactionsDecoder, program_ids: list[str]):
+    def __init__(self, endpoint, solana_rpc: SolanaRpcApi, tx_decoder: TransactionsDecoder, program_ids: list[str], x_token: str = None):
         threading.Thread.__init__(self)
         self.cancel_token = threading.Event()
         self.endpoint = endpoint   
         self.solana_rpc = solana_rpc
         self.tx_decoder = tx_decoder
         self.program_ids = program_ids
+        self.stream_client = GeyserStreamClient(endpoint, geyser_pb2.CommitmentLevel.PROCESSED, x_token)
+        self.stream_client.set_transactions_filter(self.filter_name, program_ids)
+        self.release_event = threading.Event() #Set when a table fetch finishes or a transaction gets parked
+        self.lookup_table_resolver = AddressLookupTableResolver(solana_rpc, on_fetched=self.release_event.set)
+        self.parked_transactions : deque[tuple[float, any, tuple]] = deque() #(parked time, transaction update, loaded keys or None); published strictly in arrival order
+        self.parked_lock = threading.Lock() #Held while publishing so the stream and release threads can't reorder transactions
+        self.release_thread = threading.Thread(target=self._release_parked_task, name="GrpcParkedRelease", daemon=True)
+        self.recent_signatures : set[bytes] = set()
+        self.recent_signatures_order : deque[bytes] = deque()
+        self.released_unresolved = 0
+        self.duplicates = 0
         self.slot = 0
 
     def run(self):
-        # Create an insecure gRPC channel
-        channel = grpc.insecure_channel(self.endpoint)
-
-        # Create a stub (client)
-        stub = geyser_pb2_grpc.GeyserStub(channel)
-        #response = stub.GetSlot(geyser_pb2.GetSlotRequest())
-        #print(response)
-
-        # Define your subscription request
-        request = geyser_pb2.SubscribeRequest(
-            transactions={
-                "amms": geyser_pb2.SubscribeRequestFilterTransactions(
-                    failed = False,
-                    account_include = self.program_ids
-                )
-            },
-            commitment=geyser_pb2.CommitmentLevel.PROCESSED
-        )
-
-        # Create a subscription stream
-        grpc_stream = stub.Subscribe(iter([request]))
-        self._read_socket(grpc_stream)
-
-    def parse_grpc_instruction(self, grpc_instruction, all_accounts: list[dict])->InstructionInfo:
-        if len(grpc_instruction.accounts) > 0:
-            program_id_index = grpc_instruction.program_id_index
-            accounts : list[str] = []
-            data = grpc_instruction.data
-
-            for account_index in grpc_instruction.accounts:
-                if account_index < len(all_accounts):
-                    accounts.append(all_accounts[account_index].get('pubkey'))
-
-            program_account = all_accounts[program_id_index]['pubkey']
-            decoder = self.tx_decoder.get_instructions_decoder(program_account)
-
-            if decoder:
-                data_dict = {"accounts": accounts, "data": [data, MessageDecoder.no_encoding]}
+        self.lookup_table_resolver.start()
+        self.release_thread.start()
+        self._read_socket(self.stream_client.stream())
+
+    #Updates the subscription on the open stream
+    def set_program_ids(self, program_ids: list[str]):
+        self.program_ids = program_ids
+        self.stream_client.set_transactions_filter(self.filter_name, program_ids)
+
+    #A resumed stream replays the last slot; drop what was already published
+    def is_duplicate(self, transaction_update)->bool:
+        signature = transaction_update.transaction.signature
+
+        if signature in self.recent_signatures:
+            self.duplicates += 1
+            return True
+
+        self.recent_signatures.add(signature)
+        self.recent_signatures_order.append(signature)
+
+        if len(self.recent_signatures_order) > self.max_recent_signatures:
+            self.recent_signatures.discard(self.recent_signatures_order.popleft())
+
+        return False
+
+    def parse_grpc_instruction(self, grpc_instruction, transaction: ProtoParsedTransaction, program_decoders: list[MessageDecoder])->InstructionInfo:
+        program_id_index = grpc_instruction.program_id_index
+
+        if len(grpc_instruction.accounts) > 0 and program_id_index < len(program_decoders):
+            decoder = program_decoders[program_id_index]
+
+            if decoder and transaction.has_keys(grpc_instruction):
+                accounts = transaction.get_instruction_accounts(grpc_instruction.accounts)
+                data_dict = {"accounts": accounts, "data": [grpc_instruction.data, MessageDecoder.no_encoding]}
                 instruction_data = decoder.decode(data_dict)
 
                 if instruction_data and isinstance(instruction_data, InstructionData):
                     return InstructionInfo(instruction_data.get_type(), accounts, instruction_data)
-        
-    def _read_socket(self, grpc_stream):
+
+    #Decoder per account index, looked up once per key so each instruction resolves its program with a list index
+    def get_program_decoders(self, transaction: ProtoParsedTransaction)->list[MessageDecoder]:
+        decoders_by_key = self.tx_decoder.decoders_by_key
+
+        return [decoders_by_key.get(raw_key) for raw_key in transaction.raw_keys]
+
+    #(writable, readonly) keys loaded from lookup tables or None if a table isn't cached yet
+    def get_loaded_keys(self, transaction_update)->tuple[list[bytes], list[bytes]]:
+        address_table_lookups = transaction_update.transaction.transaction.message.address_table_lookups
+
+        if len(address_table_lookups) == 0:
+            return [], []
+
+        meta = transaction_update.transaction.meta
+
+        if len(meta.loaded_writable_addresses) > 0 or len(meta.loaded_readonly_addresses) > 0: #Geyser already resolved them
+            return list(meta.loaded_writable_addresses), list(meta.loaded_readonly_addresses)
+
+        return self.lookup_table_resolver.resolve(address_table_lookups, transaction_update.slot)
+
+    def process_transaction(self, transaction_update, loaded_keys: tuple[list[bytes], list[bytes]]):
+        #Wraps the protobuf as is; keys and balances are only converted when something reads them
+        transaction = ProtoParsedTransaction(transaction_update, *loaded_keys)
+        program_decoders = self.get_program_decoders(transaction)
+
+        if any(decoder is not None for decoder in program_decoders):
+            for instruction in transaction.message.instructions:
+                instruction_info = self.parse_grpc_instruction(instruction, transaction, program_decoders)
+
+                if instruction_info:
+                    transaction.instructions.append(instruction_info)
+
+            #CPI calls (aggregators, bots routing into an amm); appended after the top level ones like the websocket path does
+            for inner_instructions in transaction.meta.inner_instructions:
+                for instruction in inner_instructions.instructions:
+                    instruction_info = self.parse_grpc_instruction(instruction, transaction, program_decoders)
+
+                    if instruction_info:
+                        transaction.instructions.append(instruction_info)
+
+        self.tx_decoder.decode_program_logs(transaction)
+        pub.sendMessage(topicName=globals.topic_incoming_transactions, arg1=transaction)
+        self.stream_client.record_slot(transaction_update.slot) #Only published slots count; a reconnect replays anything still parked
+
+    #Publishes from the head of the queue until it reaches a transaction whose tables are still loading; one that waited too long goes out with only the keys we have
+    #Nothing behind the head is released early so consumers (e.g. vault reserves) never see an older transaction after a newer one
+    #Caller holds parked_lock; force publishes everything (e.g. on stop)
+    def release_parked_transactions(self, force = False):
+        while len(self.parked_transactions) > 0:
+            parked_time, transaction_update, loaded_keys = self.parked_transactions[0]
+
+            if loaded_keys is None:
+                loaded_keys = self.get_loaded_keys(transaction_update)
+
+            if loaded_keys is None:
+                if not force and time.monotonic() - parked_time < self.max_park_time and len(self.parked_transactions) <= self.max_parked:
+                    break
+
+                loaded_keys = ([], [])
+                self.released_unresolved += 1
+
+            self.parked_transactions.popleft()
+            self.process_transaction(transaction_update, loaded_keys)
+
+    def get_stats(self)->dict:
+        return {"slot": self.slot, "parked": len(self.parked_transactions), "released_unresolved": self.released_unresolved, "duplicates": self.duplicates,
+                "stream": self.stream_client.get_stats(), "lookup_tables": self.lookup_table_resolver.get_stats()}
+
+    #Releases parked transactions as soon as their tables land or the head's park time runs out, whether or not the stream is busy
+    def _release_parked_task(self):
         while not self.cancel_token.is_set():
-            # Handle incoming data
-            try:
-                for response in grpc_stream:
-                    if response.HasField("transaction"):   
-                        transaction_update: geyser_pb2.SubscribeUpdateTransaction = response.transaction
-                        self.slot = transaction_update.slot
-
-                        tx_signatures = transaction_update.transaction.transaction.signatures
-                        transaction_message = transaction_update.transaction.transaction.message
-                        account_keys = transaction_message.account_keys
-                        address_table_lookups = transaction_message.address_table_lookups #TODO use this to init account infos correctly
-                        instructions = transaction_message.instructions
-
-                        transaction_meta : geyser_pb2.TransactionStatusMeta = transaction_update.transaction.meta
-                        fee = transaction_meta.fee
-                        pre_balances = list(transaction_meta.pre_balances)
-                        post_balances = list(transaction_meta.post_balances)
-                        log_messages = list(transaction_meta.log_messages)
-                    
-                        inner_instructions : geyser_pb2.InnerInstructions = transaction_meta.inner_instructions
-                
-                        pre_token_balances_grpc = transaction_meta.pre_token_balances
-                        post_token_balances_grpc = transaction_meta.post_token_balances
-                        compute_units_consumed = transaction_meta.compute_units_consumed
-                
-                        all_accounts : list[dict] = []
-                        parsed_pre_token_balance : list[dict] = []
-                        parsed_post_token_balance : list[dict] = []
-             
-                        for i in range(len(account_keys)):
-                            pubkey = Pubkey.from_bytes(account_keys[i])               
-                            spubkey = SerializablePubkey(str(pubkey), False, False)
-            
-                            all_accounts.append(spubkey.__dict__)
-
-                            if i == 0:
-                                payer_address = spubkey.pubkey
-                                spubkey.signer = True
-
-                        for account in address_table_lookups:
-                            table_lookup_address =  base58.b58encode(account.account_key).decode('utf-8')
-
-                            account_info = self.address_lookup_tables.get(table_lookup_address)
-
-                            if not account_info:
-                                account_info = self.solana_rpc.get_account_info(table_lookup_address)
-                                
-                                if account_info:
-                                    self.address_lookup_tables[table_lookup_address] = account_info #Save for later
-
-                            if account_info:
-                                addresses = account_info.get('value', {}).get('data', {}).get('parsed', {}).get('info', {}).get('addresses')
-                                 
-                                for address in addresses:
-                                    spubkey = SerializablePubkey(str(address), False, False)
-                                    all_accounts.append(spubkey.__dict__)
-                                        
-                        for token_balance in pre_token_balances_grpc:
-                            parsed_token_balance = parse_token_balance(token_balance)
-                            parsed_pre_token_balance.append(parsed_token_balance.to_dict())
-
-                        for token_balance in post_token_balances_grpc:
-                            parsed_token_balance = parse_token_balance(token_balance)
-                            parsed_post_token_balance.append(parsed_token_balance.to_dict())
-                        
-                        all_instructions : list[InstructionInfo] = []
-                        
-                        for instruction in instructions:
-                            instruction_info = self.parse_grpc_instruction(instruction, all_accounts)
-
-                            if instruction_info:
-                                all_instructions.append(instruction_info)
-
-                        #for instructionl1 in inner_instructions:
-                        #    for instructionl2 in instructionl1.instructions:
-                        #        instruction_info = self.parse_grpc_instruction(instructionl2, all_accounts)
-
-                        #        if instruction_info:
-                        #            all_instructions.append(instruction_info)
-
-                        tx_signature = base58.b58encode(tx_signatures[0]).decode('utf-8')
-                        transaction = ParsedTransaction(tx_signature, self.slot, payer_address, all_accounts, pre_balances, post_balances, parsed_pre_token_balance, 
-                                        parsed_post_token_balance, fee, all_instructions, log_messages)
-                        
-                        pub.sendMessage(topicName=globals.topic_incoming_transactions, arg1=transaction)
-                    #else:
-                    #    print("Received update:", response)
-            except grpc.RpcError as e:
-                print(f"RPC error occurred: {e}")
+            with self.parked_lock:
+                self.release_parked_transactions()
+                wait_time = max(0, self.max_park_time - (time.monotonic() - self.parked_transactions[0][0])) if len(self.parked_transactions) > 0 else None
+
+            self.release_event.wait(wait_time)
+            self.release_event.clear()
+
+    def _read_socket(self, grpc_stream):
+        #The stream client reconnects and resumes on its own; this only ends on stop
+        for response in grpc_stream:
+            if response.HasField("transaction"):   
+                transaction_update: geyser_pb2.SubscribeUpdateTransaction = response.transaction
+
+                if self.is_duplicate(transaction_update):
+                    continue
+
+                self.slot = transaction_update.slot
+                loaded_keys = self.get_loaded_keys(transaction_update)
+
+                with self.parked_lock:
+                    #Tables are being fetched; don't hold up the stream. Anything arriving behind a parked transaction queues up behind it
+                    if loaded_keys is None or len(self.parked_transactions) > 0:
+                        self.parked_transactions.append((time.monotonic(), transaction_update, loaded_keys))
+                        self.release_event.set()
+                    else:
+                        self.process_transaction(transaction_update, loaded_keys)
     
     def stop(self):
-        self.cancel_token.set()
\ No newline at end of file
+        self.cancel_token.set()
+        self.release_event.set()
+        self.stream_client.stop()
+        self.lookup_table_resolver.stop()
+
+        with self.parked_lock: #Publish what's still parked rather than dropping it
+            self.release_parked_transactions(force=True)
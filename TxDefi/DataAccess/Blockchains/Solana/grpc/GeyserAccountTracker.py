@@ -0,0 +1,147 @@
+import threading
+from solders.pubkey import Pubkey
+import geyser_pb2
+from TxDefi.DataAccess.Blockchains.Solana.grpc.GeyserStreamClient import GeyserStreamClient
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+import TxDefi.DataAccess.Blockchains.Solana.AccountLayouts as account_layouts
+import TxDefi.DataAccess.Blockchains.Solana.SolanaUtilities as solana_utilites
+from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
+from TxDefi.Data.TransactionInfo import AccountInfo
+from TxDefi.Data.Amount import Amount
+from TxDefi.Data.MarketEnums import Value_Type
+
+#Same subscribe_to_wallet/unsubscribe_to_wallet contract as WalletTracker but fed by one Yellowstone accounts stream instead of an accountSubscribe per address
+#Token accounts hand their raw bytes to subscribers as account_data; anything else (e.g. a bonding curve) only carries its lamports
+class GeyserAccountTracker(threading.Thread):
+    filter_name = "tracked_accounts"
+    token_program_keys = {bytes(solana_utilites.TOKEN_PROGRAM_ID), bytes(solana_utilites.TOKEN_2022_PROGRAM_ID)}
+    token_program_addresses = {solana_utilites.TOKEN_PROGRAM_ADDRESS, solana_utilites.TOKEN_2022_PROGRAM_ADDRESS}
+
+    def __init__(self, endpoint: str, solana_rpc_api: SolanaRpcApi, x_token: str = None):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = GeyserAccountTracker.__name__
+        self.solana_rpc_api = solana_rpc_api
+        self.stream_client = GeyserStreamClient(endpoint, geyser_pb2.CommitmentLevel.PROCESSED, x_token)
+        self.accounts_map : dict[str, AccountInfo] = {} #key=ca
+        self.raw_accounts_map : dict[bytes, AccountInfo] = {} #key=raw 32 byte address as sent in the stream
+        self.write_versions : dict[bytes, int] = {} #key=raw address; orders writes within a slot
+        self.reverse_subscribers : dict[str, dict[int, AbstractSubscriber[AccountInfo]]] = {} #key=ca
+        self.updates_lock = threading.Lock()
+        self.updates = 0
+        self.stale_updates = 0
+
+    def run(self):
+        for update in self.stream_client.stream():
+            if update.HasField("account"):
+                self._handle_account_update(update.account)
+
+    def subscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
+        self.subscribe_to_wallets([contract_address], subscriber)
+
+    #Starting balances come from one getMultipleAccounts call; the stream filter is updated once for the whole batch
+    #New addresses are reserved before the fetch so a concurrent call doesn't fetch them again and streamed writes aren't lost while it runs
+    def subscribe_to_wallets(self, contract_addresses: list[str], subscriber: AbstractSubscriber):
+        new_addresses : list[str] = []
+
+        with self.updates_lock:
+            for contract_address in dict.fromkeys(contract_addresses):
+                if contract_address not in self.accounts_map:
+                    account_info = AccountInfo(contract_address, Amount.sol_scaled(0))
+                    self.accounts_map[contract_address] = account_info
+                    self.raw_accounts_map[bytes(Pubkey.from_string(contract_address))] = account_info
+                    new_addresses.append(contract_address)
+
+        if len(new_addresses) > 0:
+            self._update_filter()
+            account_values, snapshot_slot = self.solana_rpc_api.get_multiple_accounts_at_slot(new_addresses)
+
+            with self.updates_lock:
+                for contract_address, account_value in zip(new_addresses, account_values):
+                    account_info = self.accounts_map.get(contract_address)
+
+                    if not account_info or not account_value:
+                        continue
+
+                    lamports = account_value.get('lamports', 0)
+                    account_info.initial_balance = Amount.sol_scaled(lamports)
+
+                    if account_info.last_slot > snapshot_slot: #The stream already delivered a newer write
+                        self.stale_updates += 1
+                        continue
+
+                    account_info.last_slot = snapshot_slot
+                    account_info.balance.set_amount2(lamports, Value_Type.SCALED)
+                    account_info.account_data = account_layouts.get_account_bytes(account_value) if account_value.get('owner') in self.token_program_addresses else None
+
+        with self.updates_lock:
+            for contract_address in contract_addresses:
+                contract_subs = self.reverse_subscribers.setdefault(contract_address, {})
+                contract_subs[subscriber.get_id()] = subscriber
+                subscriber.subription_keys.add(contract_address)
+
+    def unsubscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
+        with self.updates_lock:
+            contract_subs = self.reverse_subscribers.get(contract_address, {})
+            contract_subs.pop(subscriber.get_id(), None)
+            subscriber.remove_key(contract_address)
+
+            if len(contract_subs) > 0 or contract_address not in self.accounts_map:
+                return
+
+            self.reverse_subscribers.pop(contract_address, None)
+            self.accounts_map.pop(contract_address)
+            raw_address = bytes(Pubkey.from_string(contract_address))
+            self.raw_accounts_map.pop(raw_address, None)
+            self.write_versions.pop(raw_address, None)
+
+        self._update_filter()
+
+    def _update_filter(self):
+        addresses = list(self.accounts_map.keys())
+
+        if len(addresses) > 0:
+            self.stream_client.set_accounts_filter(self.filter_name, addresses)
+        else: #An empty account list would subscribe to every account
+            self.stream_client.remove_filter(self.filter_name)
+
+    def get_account_balance(self, contract_address: str)->Amount:
+        account_info = self.accounts_map.get(contract_address)
+
+        if not account_info:
+            return self.solana_rpc_api.get_account_balance_Amount(contract_address)
+
+        return account_info.balance
+
+    def _handle_account_update(self, account_update):
+        update_info = account_update.account
+        raw_address = update_info.pubkey
+        slot = account_update.slot
+
+        with self.updates_lock:
+            account_info = self.raw_accounts_map.get(raw_address)
+
+            if not account_info:
+                return
+
+            #A resumed stream replays its first slot and writes can arrive out of order across slots
+            if slot < account_info.last_slot or (slot == account_info.last_slot and update_info.write_version <= self.write_versions.get(raw_address, 0)):
+                self.stale_updates += 1
+                return
+
+            account_info.last_slot = slot
+            self.write_versions[raw_address] = update_info.write_version
+            account_info.balance.set_amount2(update_info.lamports, Value_Type.SCALED)
+            account_info.account_data = update_info.data if update_info.owner in self.token_program_keys else None
+            subscribers = list(self.reverse_subscribers.get(account_info.account_address, {}).values())
+
+        self.updates += 1
+        self.stream_client.record_slot(slot)
+
+        for subscriber in subscribers:
+            subscriber.update(account_info)
+
+    def get_stats(self)->dict:
+        return {"accounts": len(self.accounts_map), "updates": self.updates, "stale_updates": self.stale_updates, "stream": self.stream_client.get_stats()}
+
+    def stop(self):
+        self.stream_client.stop()
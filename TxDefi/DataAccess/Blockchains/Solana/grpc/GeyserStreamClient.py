@@ -0,0 +1,236 @@
+import queue
+import threading
+import time
+from typing import Iterator
+import grpc
+import geyser_pb2
+import geyser_pb2_grpc
+
+#Owns a Yellowstone Subscribe stream: keepalive, reconnect with exponential backoff, resume from the last processed slot and ping/pong
+#Filters can change while connected; the full request is resent on the open stream since the server replaces the subscription on every request
+class GeyserStreamClient:
+    channel_options = [("grpc.keepalive_time_ms", 10000), #http2 pings so a dead connection is noticed even when no data flows
+                       ("grpc.keepalive_timeout_ms", 5000),
+                       ("grpc.keepalive_permit_without_calls", 1),
+                       ("grpc.http2.max_pings_without_data", 0),
+                       ("grpc.max_receive_message_length", 64*1024*1024)]
+    ping_interval = 10 #Seconds of request silence before a stream ping is sent; keeps proxies from closing an idle stream
+    min_backoff = .5
+    max_backoff = 30
+    resume_error_codes = (grpc.StatusCode.INVALID_ARGUMENT, grpc.StatusCode.UNIMPLEMENTED, grpc.StatusCode.OUT_OF_RANGE) #Server refused from_slot
+
+    def __init__(self, endpoint: str, commitment = geyser_pb2.CommitmentLevel.PROCESSED, x_token: str = None):
+        self.endpoint = endpoint
+        self.commitment = commitment
+        self.metadata = (("x-token", x_token),) if x_token else None
+        self.transactions_filters : dict[str, geyser_pb2.SubscribeRequestFilterTransactions] = {}
+        self.accounts_filters : dict[str, geyser_pb2.SubscribeRequestFilterAccounts] = {}
+        self.filters_lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.channel : grpc.Channel = None
+        self.call = None
+        self.request_queue : queue.Queue = None #Requests for the open stream; None when disconnected
+        self.last_slot = 0 #Last slot the consumer finished; the stream resumes here after a reconnect
+        self.supports_from_slot = True
+        self.is_connected = False
+        self.next_ping_id = 1
+        self.ping_times : dict[int, float] = {} #key=ping id, value=time sent
+
+        #Metrics
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.pings = 0
+        self.pongs = 0
+        self.round_trip_time = None
+        self.window_start = time.monotonic()
+        self.window_messages = 0
+        self.window_lag_total = 0
+        self.window_lag_count = 0
+        self.window_max_lag = 0
+        self.messages_per_second = 0
+        self.average_lag = None
+        self.max_lag = None
+
+    def set_transactions_filter(self, name: str, account_include: list[str], failed = False):
+        with self.filters_lock:
+            self.transactions_filters[name] = geyser_pb2.SubscribeRequestFilterTransactions(failed=failed, account_include=account_include)
+
+        self._resend_request()
+
+    def set_accounts_filter(self, name: str, accounts: list[str] = [], owners: list[str] = []):
+        with self.filters_lock:
+            self.accounts_filters[name] = geyser_pb2.SubscribeRequestFilterAccounts(account=accounts, owner=owners)
+
+        self._resend_request()
+
+    def remove_filter(self, name: str):
+        with self.filters_lock:
+            self.transactions_filters.pop(name, None)
+            self.accounts_filters.pop(name, None)
+
+        self._resend_request()
+
+    def get_subscribe_request(self, from_slot: int = None)->geyser_pb2.SubscribeRequest:
+        with self.filters_lock:
+            request = geyser_pb2.SubscribeRequest(transactions=self.transactions_filters, accounts=self.accounts_filters, commitment=self.commitment)
+
+        if from_slot:
+            request.from_slot = from_slot
+
+        return request
+
+    def _resend_request(self):
+        request_queue = self.request_queue
+
+        if request_queue:
+            request_queue.put(self.get_subscribe_request())
+
+    def _get_ping_request(self)->geyser_pb2.SubscribeRequest:
+        ping_id = self.next_ping_id
+        self.next_ping_id += 1
+        self.ping_times[ping_id] = time.monotonic()
+        self.pings += 1
+
+        return geyser_pb2.SubscribeRequest(ping=geyser_pb2.SubscribeRequestPing(id=ping_id))
+
+    #Feeds the bidirectional stream; pings fill in whenever nothing else was sent for a while
+    def _request_iterator(self, request_queue: queue.Queue):
+        while not self.cancel_event.is_set():
+            try:
+                request = request_queue.get(timeout=self.ping_interval)
+            except queue.Empty:
+                request = self._get_ping_request()
+
+            if request is None:
+                return
+
+            yield request
+
+    #Called by the consumer once everything up to this slot has been handled
+    def record_slot(self, slot: int):
+        if slot > self.last_slot:
+            self.last_slot = slot
+
+    def _record_update(self, update):
+        now = time.monotonic()
+        self.messages += 1
+        self.window_messages += 1
+
+        if update.HasField("created_at"): #Stamped by the node's plugin when the update was produced
+            lag = time.time() - (update.created_at.seconds + update.created_at.nanos/1e9)
+            self.window_lag_total += lag
+            self.window_lag_count += 1
+            self.window_max_lag = max(self.window_max_lag, lag)
+
+        elapsed = now - self.window_start
+
+        if elapsed >= 1:
+            self.messages_per_second = self.window_messages/elapsed
+
+            if self.window_lag_count > 0:
+                self.average_lag = self.window_lag_total/self.window_lag_count
+                self.max_lag = self.window_max_lag
+
+            self.window_start = now
+            self.window_messages = 0
+            self.window_lag_total = 0
+            self.window_lag_count = 0
+            self.window_max_lag = 0
+
+    def _record_pong(self, ping_id: int):
+        sent_time = self.ping_times.pop(ping_id, None)
+        self.pongs += 1
+
+        if sent_time is not None:
+            self.round_trip_time = time.monotonic() - sent_time
+
+        if len(self.ping_times) > 100: #Pongs that never came back
+            self.ping_times.clear()
+
+    def _open_channel(self)->grpc.Channel:
+        if self.endpoint.startswith("https://"):
+            return grpc.secure_channel(self.endpoint[len("https://"):], grpc.ssl_channel_credentials(), options=self.channel_options)
+
+        return grpc.insecure_channel(self.endpoint.removeprefix("http://"), options=self.channel_options)
+
+    def _close_channel(self):
+        if self.channel:
+            try:
+                self.channel.close()
+            except Exception:
+                pass
+
+            self.channel = None
+
+    #Yields data updates until stop is called; pings and pongs are handled here and never reach the consumer
+    def stream(self)->Iterator:
+        backoff = self.min_backoff
+
+        while not self.cancel_event.is_set():
+            from_slot = self.last_slot if self.supports_from_slot and self.last_slot > 0 else None #Replays the last slot; consumers drop the duplicates
+            request_queue = queue.Queue()
+            request_queue.put(self.get_subscribe_request(from_slot))
+
+            try:
+                if self.channel is None:
+                    self.channel = self._open_channel()
+
+                stub = geyser_pb2_grpc.GeyserStub(self.channel)
+                self.request_queue = request_queue
+                self.call = stub.Subscribe(self._request_iterator(request_queue), metadata=self.metadata)
+                self.connects += 1
+
+                for update in self.call:
+                    if not self.is_connected:
+                        self.is_connected = True
+                        backoff = self.min_backoff
+
+                    self._record_update(update)
+
+                    if update.HasField("ping"): #Server keepalive; answering it keeps load balancers from dropping the stream
+                        request_queue.put(self._get_ping_request())
+                    elif update.HasField("pong"):
+                        self._record_pong(update.pong.id)
+                    else:
+                        yield update
+
+                print("GeyserStreamClient: Stream closed by server")
+            except grpc.RpcError as e:
+                if self.cancel_event.is_set():
+                    break
+
+                if from_slot and not self.is_connected and e.code() in self.resume_error_codes:
+                    print(f"GeyserStreamClient: Server doesn't support from_slot; resubscribing at the tip {e.details()}")
+                    self.supports_from_slot = False
+                    continue
+
+                print(f"GeyserStreamClient: Stream error {e.code()} {e.details()}")
+                self._close_channel() #A fresh channel in case the connection itself is bad
+            finally:
+                self.is_connected = False
+                self.request_queue = None
+                self.call = None
+                request_queue.put(None)
+
+            if self.cancel_event.is_set():
+                break
+
+            self.reconnects += 1
+            print(f"GeyserStreamClient: Reconnecting in {backoff}s from slot {self.last_slot}")
+            self.cancel_event.wait(backoff)
+            backoff = min(backoff*2, self.max_backoff)
+
+    def get_stats(self)->dict:
+        return {"connected": self.is_connected, "connects": self.connects, "reconnects": self.reconnects, "messages": self.messages,
+                "messages_per_second": self.messages_per_second, "average_lag": self.average_lag, "max_lag": self.max_lag,
+                "round_trip_time": self.round_trip_time, "pings": self.pings, "pongs": self.pongs, "last_slot": self.last_slot}
+
+    def stop(self):
+        self.cancel_event.set()
+        call = self.call
+
+        if call:
+            call.cancel() #Unblocks the thread iterating the stream
+
+        self._close_channel()
@@ -0,0 +1,141 @@
+from collections.abc import Sequence
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from TxDefi.Data.TransactionInfo import *
+
+#Instruction account list over the transaction's keys; a key is base58 encoded the first time any instruction reads it
+class ProtoInstructionAccounts(Sequence):
+    def __init__(self, transaction: "ProtoParsedTransaction", account_indexes: bytes):
+        self.transaction = transaction
+        self.account_indexes = account_indexes #One byte per account, as sent in the protobuf
+
+    def __len__(self):
+        return len(self.account_indexes)
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return [self.transaction.get_address(account_index) for account_index in self.account_indexes[index]]
+
+        return self.transaction.get_address(self.account_indexes[index])
+
+#ParsedTransaction view over a geyser SubscribeUpdateTransaction; account keys stay raw 32 byte values and balances are read from the protobuf
+#Consumers that index accounts or token balances as dicts still work; the dicts are only built when those attributes are accessed
+class ProtoParsedTransaction(ParsedTransaction):
+    def __init__(self, transaction_update, loaded_writable_keys: list[bytes] = [], loaded_readonly_keys: list[bytes] = []):
+        TransactionInfo.__init__(self, None, transaction_update.slot)
+        self.transaction_update = transaction_update
+        transaction = transaction_update.transaction.transaction
+        self.meta = transaction_update.transaction.meta
+        self.message = transaction.message
+        self.raw_signature = transaction.signatures[0]
+        self.num_static_keys = len(self.message.account_keys)
+        self.num_loaded_writable_keys = len(loaded_writable_keys)
+        self.raw_keys = list(self.message.account_keys) + loaded_writable_keys + loaded_readonly_keys #Same order the runtime uses
+        self.addresses : list[str] = [None]*len(self.raw_keys)
+        self.fees = self.meta.fee
+        self.pre_sol_balances = self.meta.pre_balances
+        self.post_sol_balances = self.meta.post_balances
+        self.log_messages = self.meta.log_messages
+        self.instructions : list[InstructionInfo] = []
+        self.log_alerts = None
+        self._accounts : list[dict] = None
+        self._pre_token_balances : list[dict] = None
+        self._post_token_balances : list[dict] = None
+
+    @property
+    def tx_signature(self)->str:
+        if self._tx_signature is None:
+            self._tx_signature = str(Signature.from_bytes(self.raw_signature))
+
+        return self._tx_signature
+
+    @tx_signature.setter
+    def tx_signature(self, tx_signature: str):
+        self._tx_signature = tx_signature
+
+    @property
+    def payer_address(self)->str:
+        return self.get_address(0)
+
+    @property
+    def accounts(self)->list[dict]:
+        if self._accounts is None:
+            num_required_signatures = self.message.header.num_required_signatures
+            self._accounts = [{"pubkey": self.get_address(index), "writable": self.is_writable(index), "signer": index < num_required_signatures,
+                               "source": "transaction" if index < self.num_static_keys else "lookupTable"} for index in range(len(self.raw_keys))]
+
+        return self._accounts
+
+    @property
+    def pre_token_balances(self)->list[dict]:
+        if self._pre_token_balances is None:
+            self._pre_token_balances = [self.to_token_balance_dict(token_balance) for token_balance in self.meta.pre_token_balances]
+
+        return self._pre_token_balances
+
+    @property
+    def post_token_balances(self)->list[dict]:
+        if self._post_token_balances is None:
+            self._post_token_balances = [self.to_token_balance_dict(token_balance) for token_balance in self.meta.post_token_balances]
+
+        return self._post_token_balances
+
+    def get_address(self, index: int)->str:
+        address = self.addresses[index]
+
+        if address is None:
+            address = str(Pubkey.from_bytes(self.raw_keys[index]))
+            self.addresses[index] = address
+
+        return address
+
+    #False if the instruction uses loaded keys from a lookup table that couldn't be resolved
+    def has_keys(self, grpc_instruction)->bool:
+        num_keys = len(self.raw_keys)
+
+        return grpc_instruction.program_id_index < num_keys and max(grpc_instruction.accounts, default=0) < num_keys
+
+    def is_writable(self, index: int)->bool:
+        header = self.message.header
+
+        if index >= self.num_static_keys:
+            return index < self.num_static_keys + self.num_loaded_writable_keys
+        elif index < header.num_required_signatures:
+            return index < header.num_required_signatures - header.num_readonly_signed_accounts
+        else:
+            return index < self.num_static_keys - header.num_readonly_unsigned_accounts
+
+    def get_size_estimate(self)->int:
+        return 512 + 256*len(self.instructions) + self.transaction_update.ByteSize()
+
+    def get_instruction_accounts(self, account_indexes: bytes)->ProtoInstructionAccounts:
+        return ProtoInstructionAccounts(self, account_indexes)
+
+    def get_account_index(self, account_address: str)->int:
+        try:
+            return self.raw_keys.index(bytes(Pubkey.from_string(account_address)))
+        except ValueError:
+            pass
+
+    def get_sol_balance(self, account_address: str):
+        account_index = self.get_account_index(account_address)
+
+        if account_index is not None and account_index < len(self.post_sol_balances):
+            return self.post_sol_balances[account_index]
+
+    def get_pool_info(self, account_address: str)->dict[str, any]:
+        account_index = self.get_account_index(account_address)
+
+        if account_index is not None:
+            for token_balance in self.meta.post_token_balances:
+                if token_balance.account_index == account_index:
+                    return self.to_token_balance_dict(token_balance)
+
+    #Same shape as a jsonParsed token balance
+    @staticmethod
+    def to_token_balance_dict(token_balance)->dict:
+        ui_token_amount = token_balance.ui_token_amount
+
+        return {"accountIndex": token_balance.account_index, "mint": token_balance.mint, "owner": token_balance.owner, "programId": token_balance.program_id,
+                "uiTokenAmount": {"uiAmount": ui_token_amount.ui_amount, "decimals": ui_token_amount.decimals, "amount": ui_token_amount.amount,
+                                  "uiAmountString": ui_token_amount.ui_amount_string}}
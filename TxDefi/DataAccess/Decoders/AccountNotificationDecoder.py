@@ -1,4 +1,5 @@
 from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.NotificationSchemas import AccountNotificationSchema
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
 
 class AccountNotification:
@@ -14,8 +15,13 @@ class AccountNotificationDecoder(MessageDecoder[AccountNotification]):
         self.contract_address = contract_address
         self.solana_api = solana_api
 
-    def decode(self, data: dict)->AccountNotification:
-        try:            
+    def decode(self, data: dict | AccountNotificationSchema)->AccountNotification:
+        try:
+            if isinstance(data, AccountNotificationSchema):
+                result = data.params.result
+
+                return AccountNotification(data.params.subscription, result.context.slot, self.contract_address, result.value.lamports, result.value.data)
+
             slot = data['params']['result']['context']['slot']
             value = data['params']['result']['value']
             subscription_id = data['params']['subscription']
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import struct
+from collections import namedtuple
+from pathlib import Path
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout, DataType
+
+class DecodedEvent:
+    def __init__(self, name: str, data = None):
+        self.name = name
+        self.data = data
+
+#Compiles an Anchor IDL field list into fixed-size BinaryLayout runs split by borsh strings
+#Records keep anchorpy's snake_case field names so callers can use event.data.<field> either way; pubkeys stay raw bytes
+class AnchorIdlLayout:
+    type_mapping = {"u8": DataType.BYTE,
+                    "u16": DataType.UINT16,
+                    "u32": DataType.UINT32,
+                    "i32": DataType.INT32,
+                    "u64": DataType.UINT64,
+                    "i64": DataType.INT64,
+                    "f32": DataType.FLOAT32,
+                    "f64": DataType.FLOAT64,
+                    "bool": DataType.BOOL,
+                    "publicKey": DataType.PUBKEY,
+                    "pubkey": DataType.PUBKEY}
+    string_length_struct = struct.Struct("<I")
+
+    def __init__(self, name: str, fields: list[dict]):
+        self.name = name
+        self.segments : list[BinaryLayout] = [] #None marks a string
+        field_names = []
+        fixed_fields = []
+
+        for field in fields:
+            field_name = AnchorIdlLayout.to_snake_case(field['name'])
+            field_type = field['type']
+            field_names.append(field_name)
+
+            if field_type == "string":
+                self._flush_fixed_fields(fixed_fields)
+                self.segments.append(None)
+            elif isinstance(field_type, str) and field_type in self.type_mapping: #Composite types (vec, defined, option) come as dicts
+                fixed_fields.append((field_name, self.type_mapping[field_type]))
+            else:
+                raise ValueError(f"AnchorIdlLayout: Unsupported type {field_type} for {name}.{field['name']}")
+
+        self._flush_fixed_fields(fixed_fields)
+        self.record_type = namedtuple(name, field_names)
+
+    def _flush_fixed_fields(self, fixed_fields: list):
+        if len(fixed_fields) > 0:
+            self.segments.append(BinaryLayout(f"{self.name}{len(self.segments)}", fixed_fields))
+            fixed_fields.clear()
+
+    #Named record or None if the data is too short
+    def decode(self, data: bytes, offset = 0):
+        values = []
+        data_length = len(data)
+
+        for segment in self.segments:
+            if segment:
+                if data_length - offset < segment.size:
+                    return
+
+                values.extend(segment.struct.unpack_from(data, offset))
+                offset += segment.size
+            else:
+                if data_length - offset < 4:
+                    return
+
+                string_length = self.string_length_struct.unpack_from(data, offset)[0]
+                offset += 4
+
+                if data_length - offset < string_length:
+                    return
+
+                values.append(data[offset:offset+string_length].decode("utf-8", errors="replace"))
+                offset += string_length
+
+        return self.record_type._make(values)
+
+    @staticmethod
+    def to_snake_case(name: str)->str:
+        return "".join("_" + char.lower() if char.isupper() else char for char in name).lstrip("_")
+
+    @staticmethod
+    def get_discriminator(namespace: str, name: str)->bytes:
+        return hashlib.sha256(f"{namespace}:{name}".encode()).digest()[:8]
+
+    #Maps each wanted instruction/account/event's 8 byte discriminator to (name, layout) so a payload is parsed once with no trial decoding
+    @staticmethod
+    def build_dispatch_table(idl_path: str, instruction_names: list[str], account_names: list[str], event_names: list[str])->dict[bytes, tuple[str, "AnchorIdlLayout"]]:
+        with Path(idl_path).open('r') as idl_file:
+            idl = json.load(idl_file)
+
+        dispatch_table = {}
+        entries = [("global", idl.get('instructions', []), instruction_names), ("account", idl.get('accounts', []), account_names),
+                   ("event", idl.get('events', []), event_names)]
+
+        for namespace, idl_entries, wanted_names in entries:
+            for idl_entry in idl_entries:
+                name = idl_entry['name']
+
+                if name not in wanted_names:
+                    continue
+
+                if namespace == "global":
+                    fields = idl_entry.get('args', [])
+                    discriminator_name = AnchorIdlLayout.to_snake_case(name)
+                elif namespace == "account":
+                    fields = idl_entry['type']['fields']
+                    discriminator_name = name
+                else:
+                    fields = idl_entry['fields']
+                    discriminator_name = name
+
+                discriminator = idl_entry.get('discriminator') #Newer IDLs ship it, older ones don't
+
+                if discriminator:
+                    discriminator = bytes(discriminator)
+                else:
+                    discriminator = AnchorIdlLayout.get_discriminator(namespace, discriminator_name)
+
+                dispatch_table[discriminator] = (name, AnchorIdlLayout(name, fields))
+
+        return dispatch_table
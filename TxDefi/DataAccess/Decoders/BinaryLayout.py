@@ -0,0 +1,55 @@
+import struct
+from collections import namedtuple
+from enum import Enum
+from solders.pubkey import Pubkey
+
+class DataType(Enum):
+    BYTE = 0
+    UINT16 = 1
+    UINT32 = 2
+    INT32 = 3
+    FLOAT32 = 4
+    INT64 = 5
+    UINT64 = 6
+    FLOAT64 = 7
+    PUBKEY = 8
+    BOOL = 9
+
+#Compiles a field list into a single struct.Struct so a whole record is unpacked in one C call
+#Pubkeys come back as raw 32 byte strings; call to_address/to_pubkey only on the fields that are actually read
+class BinaryLayout:
+    formats = {DataType.BYTE: "B",
+               DataType.UINT16: "H",
+               DataType.UINT32: "I",
+               DataType.INT32: "i",
+               DataType.FLOAT32: "f",
+               DataType.INT64: "q",
+               DataType.UINT64: "Q",
+               DataType.FLOAT64: "d",
+               DataType.PUBKEY: "32s",
+               DataType.BOOL: "?"}
+
+    def __init__(self, name: str, fields: list[tuple[str, DataType]], is_little_endian = True):
+        self.name = name
+        self.field_names = [field_name for field_name, _ in fields]
+        self.struct = struct.Struct(("<" if is_little_endian else ">") + "".join(self.formats[data_type] for _, data_type in fields))
+        self.size = self.struct.size
+        self.record_type = namedtuple(name, self.field_names)
+
+    #Plain tuple in field order; None if data is too short
+    def unpack(self, data: bytes, offset = 0)->tuple:
+        if len(data) - offset >= self.size:
+            return self.struct.unpack_from(data, offset)
+
+    #Named record (e.g. record.base_amount); None if data is too short
+    def decode(self, data: bytes, offset = 0):
+        if len(data) - offset >= self.size:
+            return self.record_type._make(self.struct.unpack_from(data, offset))
+
+    @staticmethod
+    def to_pubkey(raw_key: bytes)->Pubkey:
+        return Pubkey.from_bytes(raw_key)
+
+    @staticmethod
+    def to_address(raw_key: bytes)->str:
+        return str(Pubkey.from_bytes(raw_key))
@@ -0,0 +1,143 @@
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Callable
+from pubsub import pub
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+import TxDefi.DataAccess.Decoders.NotificationSchemas as notification_schemas
+
+#Runs in each decode process; the decoder is built there so nothing unpicklable has to cross the process boundary
+def _decode_frames(decoder_factory: Callable[[], MessageDecoder], input_queue: multiprocessing.Queue, output_queue: multiprocessing.Queue):
+    decoder = decoder_factory()
+
+    while True:
+        item = input_queue.get()
+
+        if item is None:
+            break
+
+        sequence, frame = item
+        decoded_items = []
+        error = None
+
+        try:
+            json_data = notification_schemas.decode_notification(frame)
+            json_items = json_data if isinstance(json_data, list) else [json_data]
+
+            for json_item in json_items:
+                if json_item:
+                    decoded_data = decoder.decode(json_item)
+
+                    if decoded_data:
+                        decoded_items.append(decoded_data)
+        except Exception as e:
+            error = str(e)
+
+        output_queue.put((sequence, decoded_items, error))
+
+#Decodes raw socket frames in separate processes so decoding isn't bound by the GIL of the socket's process
+#Frames are numbered on submit and results are published in that order, so updates for a mint never overtake each other
+class DecodeProcessPool(threading.Thread):
+    default_max_pending = 10000 #Frames waiting for a decode process before submit blocks
+    reorder_timeout = 2 #Seconds to wait on a missing result (e.g. a crashed process) before publishing past it
+    poll_interval = .1
+
+    def __init__(self, decoder_factory: Callable[[], MessageDecoder], out_topic: str, num_processes = 2, max_pending = default_max_pending, start_method = "spawn"):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = DecodeProcessPool.__name__
+        self.decoder_factory = decoder_factory #Must be picklable, e.g. a module level function
+        self.out_topic = out_topic
+        self.num_processes = max(1, num_processes)
+        self.context = multiprocessing.get_context(start_method)
+        self.input_queue = self.context.Queue(max_pending)
+        self.output_queue = self.context.Queue()
+        self.processes : list[multiprocessing.Process] = []
+        self.submit_lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.next_submit_sequence = 0
+        self.next_publish_sequence = 0
+        self.reorder_buffer : dict[int, list] = {} #key=sequence; results that arrived ahead of an earlier frame
+        self.blocked_since = None
+        self.submitted = 0
+        self.published = 0
+        self.skipped = 0
+        self.decode_errors = 0
+
+    def start(self):
+        for index in range(self.num_processes):
+            process = self.context.Process(target=_decode_frames, args=(self.decoder_factory, self.input_queue, self.output_queue),
+                                           name=f"{self.name}{index}", daemon=True)
+            process.start()
+            self.processes.append(process)
+
+        threading.Thread.start(self)
+
+    #Called from the socket's decode worker; blocks when every process is backed up so the socket's overflow policy applies
+    def submit(self, frame: str | bytes):
+        with self.submit_lock:
+            sequence = self.next_submit_sequence
+            self.next_submit_sequence += 1
+            self.input_queue.put((sequence, frame))
+            self.submitted += 1
+
+    def _publish_ready(self):
+        start_sequence = self.next_publish_sequence
+
+        while self.next_publish_sequence in self.reorder_buffer:
+            decoded_items = self.reorder_buffer.pop(self.next_publish_sequence)
+            self.next_publish_sequence += 1
+
+            for decoded_data in decoded_items:
+                try:
+                    pub.sendMessage(topicName=self.out_topic, arg1=decoded_data)
+                    self.published += 1
+                except Exception as e:
+                    print(f"{self.name}: Issue publishing {e}")
+
+        if len(self.reorder_buffer) == 0:
+            self.blocked_since = None
+        elif self.blocked_since is None or self.next_publish_sequence != start_sequence: #Only time a head that isn't moving
+            self.blocked_since = time.monotonic()
+        elif time.monotonic() - self.blocked_since > self.reorder_timeout: #Give up on the missing frame
+            next_sequence = min(self.reorder_buffer.keys())
+            self.skipped += next_sequence - self.next_publish_sequence
+            self.next_publish_sequence = next_sequence
+            self.blocked_since = None
+            self._publish_ready()
+
+    def get_stats(self)->dict:
+        return {"processes": sum(1 for process in self.processes if process.is_alive()), "submitted": self.submitted, "published": self.published,
+                "reorder_depth": len(self.reorder_buffer), "skipped": self.skipped, "decode_errors": self.decode_errors}
+
+    def run(self):
+        while not self.cancel_event.is_set():
+            try:
+                sequence, decoded_items, error = self.output_queue.get(timeout=self.poll_interval)
+
+                if error:
+                    self.decode_errors += 1
+
+                if sequence >= self.next_publish_sequence:
+                    self.reorder_buffer[sequence] = decoded_items
+            except queue.Empty:
+                pass
+            except Exception as e:
+                print(f"{self.name}: Issue reading results {e}")
+
+            self._publish_ready()
+
+    def stop(self):
+        self.cancel_event.set()
+
+        for _ in self.processes:
+            try:
+                self.input_queue.put_nowait(None)
+            except queue.Full:
+                break
+
+        for process in self.processes:
+            process.join(1)
+
+            if process.is_alive():
+                process.terminate()
@@ -10,6 +10,7 @@ T = TypeVar("T", bound=object)  # Generic type Key Pair Type
 class MessageDecoder(Generic[T]): #Low priority Fix; need a generic for the output of decode
     base64_encoding = 'base64'
     base58_encoding = 'base58'
+    no_encoding = 'none' #Already raw bytes (e.g. from a gRPC stream)
         
     @abstractmethod
     def decode(self, data: T)->any:
@@ -24,6 +25,8 @@ class MessageDecoder(Generic[T]): #Low priority Fix; need a generic for the outp
                 decoded_bytes = b64decode(program_data)
             elif encoding == MessageDecoder.base58_encoding:
                 decoded_bytes = base58.b58decode(program_data)
+            elif encoding == MessageDecoder.no_encoding:
+                decoded_bytes = program_data
 
         except Exception as e:
             print("Problem parsing program data " + program_data)
@@ -40,4 +43,8 @@ class LogsDecoder(MessageDecoder[T]):
     
     @abstractmethod
     def decode_log(self, log: str)->object:
-        pass
\ No newline at end of file
+        pass
+
+    #Raw frame substrings of events that must always reach the decoder (see NotificationFilter)
+    def get_prefilter_markers(self)->list[str]:
+        return []
\ No newline at end of file
@@ -0,0 +1,110 @@
+import threading
+from base64 import b64encode
+from solders.pubkey import Pubkey
+
+#Cheap substring gate that runs on the raw frame before it's parsed; frames that mention neither a watched address nor an event marker are dropped
+#Watched addresses are matched as base58 (parsed transactions) and as base64 fingerprints (program data inside logs)
+class NotificationFilter:
+    notification_marker = '"subscription":'
+
+    def __init__(self, markers: list[str] = []):
+        self.markers : set[str] = set(markers)
+        self.watched_patterns : dict[str, list[str]] = {} #key=address
+        self.lock = threading.Lock()
+        self.str_patterns : tuple[str] = ()
+        self.bytes_patterns : tuple[bytes] = ()
+        self.checked = 0
+        self.dropped = 0
+        self._rebuild()
+
+    #Rebuilt on every change and swapped in whole so readers never need the lock
+    def _rebuild(self):
+        patterns = list(self.markers)
+
+        for address_patterns in self.watched_patterns.values():
+            patterns.extend(address_patterns)
+
+        self.str_patterns = tuple(patterns)
+        self.bytes_patterns = tuple(pattern.encode() for pattern in patterns)
+
+    def add_markers(self, markers: list[str]):
+        with self.lock:
+            self.markers.update(markers)
+            self._rebuild()
+
+    def watch(self, addresses: list[str]):
+        with self.lock:
+            new_addresses = [address for address in addresses if address and address not in self.watched_patterns]
+
+            for address in new_addresses:
+                self.watched_patterns[address] = NotificationFilter.get_address_patterns(address)
+
+            if len(new_addresses) > 0:
+                self._rebuild()
+
+    def unwatch(self, addresses: list[str]):
+        with self.lock:
+            removed_patterns = [self.watched_patterns.pop(address, None) for address in addresses]
+
+            if any(removed_patterns):
+                self._rebuild()
+
+    def is_watched(self, address: str)->bool:
+        return address in self.watched_patterns
+
+    def is_relevant(self, data: str | bytes)->bool:
+        if isinstance(data, bytes):
+            if self.notification_marker.encode() not in data: #Subscription acks and rpc responses always pass
+                return True
+
+            patterns = self.bytes_patterns
+        else:
+            if self.notification_marker not in data:
+                return True
+
+            patterns = self.str_patterns
+
+        self.checked += 1
+
+        for pattern in patterns:
+            if pattern in data:
+                return True
+
+        self.dropped += 1
+        return False
+
+    def get_stats(self)->dict:
+        return {"watched": len(self.watched_patterns), "markers": len(self.markers), "checked": self.checked, "dropped": self.dropped}
+
+    #base58 string plus one base64 fingerprint per 3-byte alignment the key can land on inside an encoded payload
+    @staticmethod
+    def get_address_patterns(address: str)->list[str]:
+        patterns = [address]
+
+        try:
+            key_bytes = bytes(Pubkey.from_string(address))
+        except Exception:
+            return patterns
+
+        for start in range(3):
+            end = start + (len(key_bytes) - start)//3*3
+            patterns.append(b64encode(key_bytes[start:end]).decode())
+
+        return patterns
+
+    #Every base64 text prefix that can encode lead_bytes; a trailing partial group expands to the few characters its free bits allow
+    @staticmethod
+    def get_base64_markers(prefix: str, lead_bytes: bytes)->list[str]:
+        full_length = len(lead_bytes)//3*3
+        head = b64encode(lead_bytes[:full_length]).decode()
+        remainder = lead_bytes[full_length:]
+
+        if len(remainder) == 0:
+            return [prefix + head]
+
+        tails = set()
+
+        for filler in range(256):
+            tails.add(b64encode((remainder + bytes([filler]) + bytes(2 - len(remainder)))[:3]).decode()[:len(remainder) + 1])
+
+        return [prefix + head + tail for tail in sorted(tails)]
@@ -0,0 +1,100 @@
+import TxDefi.Utilities.JsonUtil as json_util
+
+#Typed schemas for the hot websocket notifications; msgspec decodes straight into these without building nested dicts
+#Without msgspec installed every frame goes through json_util.loads and the decoders take their dict path
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec:
+    class NotificationContext(msgspec.Struct):
+        slot: int
+
+    class LogsValue(msgspec.Struct):
+        signature: str
+        logs: list[str]
+        err: object = None
+
+    class LogsResult(msgspec.Struct):
+        context: NotificationContext
+        value: LogsValue
+
+    class LogsParams(msgspec.Struct):
+        result: LogsResult
+        subscription: int
+
+    class LogsNotificationSchema(msgspec.Struct):
+        method: str
+        params: LogsParams
+
+    class AccountValue(msgspec.Struct):
+        lamports: int
+        data: object #[data, encoding] list or a jsonParsed dict
+        owner: str = ""
+        executable: bool = False
+
+    class AccountResult(msgspec.Struct):
+        context: NotificationContext
+        value: AccountValue
+
+    class AccountParams(msgspec.Struct):
+        result: AccountResult
+        subscription: int
+
+    class AccountNotificationSchema(msgspec.Struct):
+        method: str
+        params: AccountParams
+
+    class TransactionResult(msgspec.Struct):
+        transaction: dict #jsonParsed transaction + meta; instruction decoders consume it as a dict
+        slot: int
+        signature: str = ""
+
+    class TransactionParams(msgspec.Struct):
+        result: TransactionResult
+        subscription: int
+
+    class TransactionNotificationSchema(msgspec.Struct):
+        method: str
+        params: TransactionParams
+
+    _schema_decoders = {
+        "logsNotification": msgspec.json.Decoder(LogsNotificationSchema),
+        "accountNotification": msgspec.json.Decoder(AccountNotificationSchema),
+        "transactionNotification": msgspec.json.Decoder(TransactionNotificationSchema),
+    }
+else:
+    #Placeholders so isinstance checks in the decoders stay valid
+    class LogsNotificationSchema:
+        pass
+
+    class AccountNotificationSchema:
+        pass
+
+    class TransactionNotificationSchema:
+        pass
+
+    _schema_decoders = {}
+
+schemas_available = msgspec is not None
+_str_markers = [(f'"{method}"', method) for method in _schema_decoders.keys()]
+_bytes_markers = [(marker.encode(), method) for marker, method in _str_markers]
+
+#Typed schema object for known notifications, plain json for everything else (subscription acks, batch responses, unknown methods)
+def decode_notification(data: str | bytes):
+    markers = _bytes_markers if isinstance(data, bytes) else _str_markers
+
+    for marker, method in markers:
+        if marker in data:
+            try:
+                decoded = _schema_decoders[method].decode(data)
+
+                if decoded.method == method: #The marker could have matched inside a payload
+                    return decoded
+            except msgspec.ValidationError:
+                pass
+
+            break
+
+    return json_util.loads(data)
@@ -1,93 +1,97 @@
-from solders.pubkey import Pubkey
 import struct
 from MessageDecoder import LogsDecoder
+from TxDefi.DataAccess.Decoders.NotificationFilter import NotificationFilter
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout, DataType
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TransactionInfo import *
-   
-class DataType(Enum):
-    BYTE = 0
-    UINT16 = 1
-    UINT32 = 2
-    INT32 = 3
-    FLOAT32 = 4
-    INT64 = 5
-    UINT64 = 6
-    FLOAT64 = 7
-    PUBKEY = 8
-
-class DataSpec:
-    def __init__(self, format: str, size: int, is_little_endian: bool):
-        if is_little_endian:
-            endianness = "<"
-        else:
-            endianness = ">"
-
-        self.format = endianness + format
-        self.size = size
-
-class DataSpecContainer:
-    spec_mapping = {DataType.BYTE : DataSpec("B", 1, True), 
-                    DataType.UINT16 : DataSpec("H", 4, True),
-                    DataType.UINT32 : DataSpec("I", 4, True),
-                    DataType.INT32 : DataSpec("i", 4, True),
-                    DataType.FLOAT32 : DataSpec("f", 8, True),
-                    DataType.INT64 : DataSpec("q", 8, True),
-                    DataType.UINT64 : DataSpec("Q", 8, True),
-                    DataType.FLOAT64 : DataSpec("d", 8, True),
-                    DataType.PUBKEY : DataSpec("NA", 32, True)
-                    }
-    
-    def __init__(self, spec_list: list[DataType]):
-        self.spec_list = spec_list
-        self.size = 0
-
-        for data_type in spec_list:
-            self.size += self.spec_mapping.get(data_type).size
-
-    def decode(self, start_index: int, data: bytes)->list[any]:
-        if len(data) < self.size:
-            return 
-        
-        offset = start_index
-        ret_list : list[ int | float ] = []
 
-        for element in self.spec_list:
-            spec = self.spec_mapping.get(element)
-
-            if element != DataType.PUBKEY:
-                decoded_value = struct.unpack_from(spec.format, data, offset)[0]
-            else:
-                decoded_value = Pubkey(data[offset:offset+32])
-
-            ret_list.append(decoded_value)
-            offset += spec.size
-
-        return ret_list
-
-deposit_message_types = [
-    DataType.UINT64,
-    DataType.UINT64,
-    DataType.UINT64
-]
-
-logs_deposit_message_types = [
-    DataType.INT64, #timestamp
-    DataType.UINT64, #lp_token_amount_out
-    DataType.UINT64, #max_base_amount_in
-    DataType.UINT64, #max_quote_amount_in
-    DataType.UINT64, #user_base_token_reserves
-    DataType.UINT64, #user_quote_token_reserves
-    DataType.UINT64, #pool_base_token_reserves
-    DataType.UINT64, #pool_quote_token_reserves
-    DataType.UINT64, #base_amount_in
-    DataType.UINT64, #quote_amount_in
-    DataType.UINT64, #lp_mint_supply
-    DataType.PUBKEY, #pool
-    DataType.PUBKEY, #user
-    DataType.PUBKEY, #user_base_token_account
-    DataType.PUBKEY, #user_quote_token_account
-    DataType.PUBKEY, #user_pool_token_account
-]
+#Layouts start right after the discriminator(s)
+add_liquidity_layout = BinaryLayout("AddLiquidity", [
+    ("index", DataType.UINT16),
+    ("init_coin_amount", DataType.UINT64),
+    ("init_pc_amount", DataType.UINT64)
+])
+
+swap_layout = BinaryLayout("Swap", [
+    ("base_amount", DataType.UINT64),
+    ("quote_amount", DataType.UINT64)
+])
+
+pool_account_layout = BinaryLayout("PoolAccount", [
+    ("pool_bump", DataType.BYTE),
+    ("index", DataType.UINT16),
+    ("creator", DataType.PUBKEY),
+    ("base_mint", DataType.PUBKEY),
+    ("quote_mint", DataType.PUBKEY),
+    ("lp_mint", DataType.PUBKEY),
+    ("pool_base_token_account", DataType.PUBKEY),
+    ("pool_quote_token_account", DataType.PUBKEY),
+    ("lp_supply", DataType.UINT64)
+])
+
+logs_deposit_layout = BinaryLayout("DepositEvent", [
+    ("timestamp", DataType.INT64),
+    ("lp_token_amount_out", DataType.UINT64),
+    ("max_base_amount_in", DataType.UINT64),
+    ("max_quote_amount_in", DataType.UINT64),
+    ("user_base_token_reserves", DataType.UINT64),
+    ("user_quote_token_reserves", DataType.UINT64),
+    ("pool_base_token_reserves", DataType.UINT64),
+    ("pool_quote_token_reserves", DataType.UINT64),
+    ("base_amount_in", DataType.UINT64),
+    ("quote_amount_in", DataType.UINT64),
+    ("lp_mint_supply", DataType.UINT64),
+    ("pool", DataType.PUBKEY),
+    ("user", DataType.PUBKEY),
+    ("user_base_token_account", DataType.PUBKEY),
+    ("user_quote_token_account", DataType.PUBKEY),
+    ("user_pool_token_account", DataType.PUBKEY)
+])
+
+logs_create_layout = BinaryLayout("CreatePoolEvent", [
+    ("timestamp", DataType.UINT64),
+    ("index", DataType.UINT16),
+    ("creator", DataType.PUBKEY),
+    ("base_mint", DataType.PUBKEY),
+    ("quote_mint", DataType.PUBKEY),
+    ("base_mint_decimals", DataType.BYTE),
+    ("quote_mint_decimals", DataType.BYTE),
+    ("base_amount_in", DataType.UINT64),
+    ("quote_amount_in", DataType.UINT64),
+    ("pool_base_amount", DataType.UINT64),
+    ("pool_quote_amount", DataType.UINT64),
+    ("minimum_liquidity", DataType.UINT64),
+    ("initial_liquidity", DataType.UINT64),
+    ("lp_token_amount_out", DataType.UINT64),
+    ("pool_bump", DataType.BYTE),
+    ("pool", DataType.PUBKEY),
+    ("lp_mint", DataType.PUBKEY),
+    ("user_base_token_account", DataType.PUBKEY),
+    ("user_quote_token_account", DataType.PUBKEY)
+])
+
+logs_exchange_layout = BinaryLayout("ExchangeEvent", [
+    ("timestamp", DataType.UINT64),
+    ("base_amount", DataType.UINT64),
+    ("slippage_quote_amount", DataType.UINT64),
+    ("user_base_token_reserves", DataType.UINT64),
+    ("user_quote_token_reserves", DataType.UINT64),
+    ("pool_base_token_reserves", DataType.UINT64),
+    ("pool_quote_token_reserves", DataType.UINT64),
+    ("quote_amount", DataType.UINT64),
+    ("lp_fee_basis_points", DataType.UINT64),
+    ("lp_fee", DataType.UINT64),
+    ("protocol_fee_basis_points", DataType.UINT64),
+    ("protocol_fee", DataType.UINT64),
+    ("quote_amount_with_lp_fee", DataType.UINT64),
+    ("user_quote_amount", DataType.UINT64),
+    ("pool", DataType.PUBKEY),
+    ("user", DataType.PUBKEY),
+    ("user_base_token_account", DataType.PUBKEY),
+    ("user_quote_token_account", DataType.PUBKEY),
+    ("protocol_fee_recipient", DataType.PUBKEY),
+    ("protocol_fee_recipient_token_account", DataType.PUBKEY)
+])
 
 class PumpAmmDataDecoder(LogsDecoder):
     total_bonded = 0
@@ -106,8 +110,6 @@ class PumpAmmDataDecoder(LogsDecoder):
     log_buy_discriminator = 0x67F4521F2CF57777
     log_sell_discriminator = 0x3E2F370AA503DC2A
     log_withdraw_discriminator = 0x1609851AA02C47C0
-    deposit_spec = DataSpecContainer(deposit_message_types)
-    logs_deposit_spec = DataSpecContainer(logs_deposit_message_types)
 
     def __init__(self, program_address: str, encoding: str):
         self.program_address = program_address
@@ -116,6 +118,14 @@ class PumpAmmDataDecoder(LogsDecoder):
         
     def get_log_data_prefixes(self):
         return PumpAmmDataDecoder.log_data_prefixes
+
+    def get_prefilter_markers(self)->list[str]:
+        markers = ["Instruction: CreatePool", "Instruction: Deposit"]
+
+        for discriminator in [self.log_create_discriminator, self.log_deposit_discriminator]:
+            markers.extend(NotificationFilter.get_base64_markers(LogsDecoder.program_data_prefix + " ", discriminator.to_bytes(8, byteorder='big')[:6]))
+
+        return markers
     
     def decode_log(self, log: str)->InstructionData:
         if log.startswith(LogsDecoder.program_data_prefix):   
@@ -128,194 +138,62 @@ class PumpAmmDataDecoder(LogsDecoder):
 
     @staticmethod
     def parse_account_message(start_index: int, data: bytes)->LiquidityPoolData:
-        offset = start_index
-        pool_bump = struct.unpack_from('<B', data, offset)[0]
-        offset += 1
-        index = struct.unpack_from('<H', data, offset)[0]
-        offset += 2
-        creator = Pubkey(data[offset:offset+32])
-        offset += 32
-        base_mint = Pubkey(data[offset:offset+32])
-        offset += 32
-        quote_mint = Pubkey(data[offset:offset+32])
-        offset += 32
-        lp_mint = Pubkey(data[offset:offset+32])
-        offset += 32
-        pool_base_token_account = Pubkey(data[offset:offset+32])
-        offset += 32
-        pool_quote_token_account = Pubkey(data[offset:offset+32])
-        offset += 32
-        lp_supply = struct.unpack_from('<Q', data, offset)[0]
-        
-        ret_data = LiquidityPoolData(TradeEventType.ACCOUNT_INFO, 0, 0)
-        ret_data.token_address = str(base_mint)
-        ret_data.trader_address = str(creator)
-        ret_data.pool_base_address = str(pool_base_token_account)
-        ret_data.pool_quote_address = str(pool_quote_token_account)
-        ret_data.quote_mint_address = str(quote_mint)
-        ret_data.lp_supply = lp_supply        
+        record = pool_account_layout.decode(data, start_index)
 
-        return ret_data
+        if record:
+            ret_data = LiquidityPoolData(TradeEventType.ACCOUNT_INFO, 0, 0)
+            ret_data.token_address = BinaryLayout.to_address(record.base_mint)
+            ret_data.trader_address = BinaryLayout.to_address(record.creator)
+            ret_data.pool_base_address = BinaryLayout.to_address(record.pool_base_token_account)
+            ret_data.pool_quote_address = BinaryLayout.to_address(record.pool_quote_token_account)
+            ret_data.quote_mint_address = BinaryLayout.to_address(record.quote_mint)
+            ret_data.lp_supply = record.lp_supply        
+
+            return ret_data
     
     @staticmethod
     def parse_logs_deposit_message(start_index: int, data: bytes)->LiquidityPoolData:
-        offset = start_index
-
-        decoded_data = PumpAmmDataDecoder.logs_deposit_spec.decode(offset, data)
-
-        if decoded_data:
-            timestamp = decoded_data[0]
-            lpTokenAmountOut = decoded_data[1]
-            max_base_amount_in = decoded_data[2]
-            max_quote_amount_in = decoded_data[3]
-            user_base_token_reserves = decoded_data[4]
-            user_quote_token_reserves = decoded_data[5]
-            pool_base_token_reserves = decoded_data[6]
-            pool_quote_token_reserves = decoded_data[7]
-            base_amount_in = decoded_data[8]
-            quote_amount_in = decoded_data[9]
-            lp_mint_supply = decoded_data[10]
-            pool = decoded_data[11]
-            user = decoded_data[12]
-            user_base_token_account = decoded_data[13]
-            user_quote_token_account = decoded_data[14]
-            user_pool_token_account = decoded_data[15]
-
-            ret_data = LiquidityPoolData(TradeEventType.DEPOSIT_LIQUIDITY, user_quote_token_reserves, user_base_token_reserves)
-            ret_data.market_address = str(pool) #This message is missing a lot of vital data including the mint address; will have to derive it later from this
+        record = logs_deposit_layout.decode(data, start_index)
+
+        if record:
+            ret_data = LiquidityPoolData(TradeEventType.DEPOSIT_LIQUIDITY, record.user_quote_token_reserves, record.user_base_token_reserves)
+            ret_data.market_address = BinaryLayout.to_address(record.pool) #This message is missing a lot of vital data including the mint address; will have to derive it later from this
 
             return ret_data
     
     @staticmethod
     def parse_create_message(start_index: int, data: bytes)->LiquidityPoolData:
-        offset = start_index
+        record = logs_create_layout.decode(data, start_index)
+
+        if record:
+            ret_data = LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, record.pool_quote_amount, record.pool_base_amount)
+            ret_data.market_address = BinaryLayout.to_address(record.pool)
+            ret_data.trader_address = BinaryLayout.to_address(record.creator)
+            ret_data.base_mint_address = BinaryLayout.to_address(record.base_mint)
+            ret_data.quote_mint_address = BinaryLayout.to_address(record.quote_mint)
+            #ret_data.pool_base_address = None
+            #ret_data.pool_quote_address = None #Not here
+            ret_data.lp_mint_address = BinaryLayout.to_address(record.lp_mint)
+            ret_data.base_mint_decimals = record.base_mint_decimals
+            ret_data.quote_mint_decimals = record.quote_mint_decimals
 
-        timestamp = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        index = struct.unpack_from('<H', data, offset)[0]
-        offset += 2
-        creator = Pubkey(data[offset:offset+32])
-        offset += 32
-        baseMint = Pubkey(data[offset:offset+32])
-        offset += 32
-        quoteMint = Pubkey(data[offset:offset+32])
-        offset += 32
-        baseMintDecimals = struct.unpack_from('<B', data, offset)[0]
-        offset += 1
-        quoteMintDecimals = struct.unpack_from('<B', data, offset)[0]
-        offset += 1
-        baseAmountIn = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        quoteAmountIn = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        poolBaseAmount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        poolQuoteAmount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        minimumLiquidity = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        initialLiquidity = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        lpTokenAmountOut = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        poolBump = struct.unpack_from('<B', data, offset)[0]
-        offset += 1
-        pool = Pubkey(data[offset:offset+32])
-        offset += 32
-        lpMint = Pubkey(data[offset:offset+32])
-        offset += 32
-        userBaseTokenAccount = Pubkey(data[offset:offset+32])
-        offset += 32
-        userQuoteTokenAccount = Pubkey(data[offset:offset+32])
-        
-        ret_data = LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, poolQuoteAmount, poolBaseAmount)
-        ret_data.market_address = str(pool)
-        ret_data.trader_address = str(creator)
-        ret_data.base_mint_address = str(baseMint)
-        ret_data.quote_mint_address = str(quoteMint)
-        #ret_data.pool_base_address = None
-        #ret_data.pool_quote_address = None #Not here
-        ret_data.lp_mint_address = str(lpMint)
-        ret_data.base_mint_decimals = baseMintDecimals
-        ret_data.quote_mint_decimals = quoteMintDecimals
-        return ret_data
+            return ret_data
     
-    #TODO load these from specs to cleanup the code; this is what the idls are for
     @staticmethod
     def parse_exchange_message(is_buy: bool, start_index: int, data: bytes)->LiquidityPoolData:
-        offset = start_index
-
-        timestamp = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        base_amount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        
-        slippage_quote_amount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        user_base_token_reserves = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
+        record = logs_exchange_layout.decode(data, start_index)
 
-        user_quote_token_reserves = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        pool_base_token_reserves = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        pool_quote_token_reserves = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        quote_amount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        lp_fee_basis_points = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        lp_fee = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        protocol_fee_basis_points = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        protocol_fee = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        quote_amount_with_lp_fee = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-        
-        user_quote_amount = struct.unpack_from('<Q', data, offset)[0]
-        offset += 8
-
-        pool = Pubkey(data[offset:offset+32])
-        offset += 32
-
-        user = Pubkey(data[offset:offset+32])
-        offset += 32
-
-        user_base_token_account = Pubkey(data[offset:offset+32])
-        offset += 32
-       
-        user_quote_token_account = Pubkey(data[offset:offset+32])
-        offset += 32
-
-        protocol_fee_recipient = Pubkey(data[offset:offset+32])
-        offset += 32
-
-        protocol_fee_recipient_token_account = Pubkey(data[offset:offset+32])
-
-        if is_buy:
-            trade_type = TradeEventType.BUY
-            amount_in = quote_amount
-            amount_out = base_amount
-        else:
-            trade_type = TradeEventType.SELL
-            amount_in = base_amount 
-            amount_out = quote_amount
-
-        ret_data = AmmSwapData(trade_type, amount_in, amount_out)
+        if record:
+            if is_buy:
+                trade_type = TradeEventType.BUY
+                amount_in = record.quote_amount
+                amount_out = record.base_amount
+            else:
+                trade_type = TradeEventType.SELL
+                amount_in = record.base_amount 
+                amount_out = record.quote_amount
 
-        return ret_data
+            return AmmSwapData(trade_type, amount_in, amount_out)
     
     def parse_pump_bytes(self, data: bytes)->InstructionData:
         offset = 0
@@ -325,39 +203,31 @@ class PumpAmmDataDecoder(LogsDecoder):
         offset += 8
 
         if discriminator == self.add_liquidity_discriminator:
-            #index = struct.unpack_from('<B', data, offset)[0]
-            offset += 2
+            record = add_liquidity_layout.decode(data, offset)
 
-            # Parse initPcAmount (8 bytes, u64)
-            init_coin_amount = struct.unpack_from('<Q', data, offset)[0]
-            offset += 8
-            # Parse initCoinAmount (8 bytes, u64)
-            init_pc_amount = struct.unpack_from('<Q', data, offset)[0]
-            ret_data = LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, init_pc_amount, init_coin_amount)
+            if record:
+                ret_data = LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, record.init_pc_amount, record.init_coin_amount)
 
-            if init_pc_amount >= self.bonding_token_amount:
-                self.total_bonded += 1
-                print(f"Add Liquidity Pump Token: PC: {init_pc_amount} Coin: {init_coin_amount} total: {self.total_bonded}")
+                if record.init_pc_amount >= self.bonding_token_amount:
+                    self.total_bonded += 1
+                    print(f"Add Liquidity Pump Token: PC: {record.init_pc_amount} Coin: {record.init_coin_amount} total: {self.total_bonded}")
         elif discriminator == self.remove_liquidity_id:
             #index = struct.unpack_from('<B', data, offset)[0]
             offset += 2
         elif discriminator == self.buy_discriminator or discriminator == self.sell_discriminator:
-            # Parse amountIn (8 bytes, u64)
-            amount_base = struct.unpack_from('<Q', data, offset)[0]  # '<Q' for little-endian unsigned long long (8 bytes)
-            offset += 8        
-            # Parse minimumAmountOut (8 bytes, u64)
-            quote_amount = struct.unpack_from('<Q', data, offset)[0]
-
-            if discriminator == self.buy_discriminator:
-                event_type = TradeEventType.BUY
-                amount_in = quote_amount
-                amount_out = amount_base
-            else:
-                event_type = TradeEventType.SELL
-                amount_in = amount_base
-                amount_out = quote_amount
-
-            ret_data = AmmSwapData(event_type, amount_in, amount_out)
+            record = swap_layout.decode(data, offset) #base amount, max/min quote amount
+
+            if record:
+                if discriminator == self.buy_discriminator:
+                    event_type = TradeEventType.BUY
+                    amount_in = record.quote_amount
+                    amount_out = record.base_amount
+                else:
+                    event_type = TradeEventType.SELL
+                    amount_in = record.base_amount
+                    amount_out = record.quote_amount
+
+                ret_data = AmmSwapData(event_type, amount_in, amount_out)
 
         else:
             if discriminator == self.cpi_log_info:
@@ -1,7 +1,6 @@
-from construct import Adapter
-import time
-from anchorpy.coder.coder import Coder
 from MessageDecoder import LogsDecoder
+from TxDefi.DataAccess.Decoders.AnchorIdlLayout import AnchorIdlLayout, DecodedEvent
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TransactionInfo import *
 
@@ -19,10 +18,6 @@ class BondimgCurveData:
     def get_type(self):
         return TradeEventType.DATA
     
-class Event:
-    def __init__(self, name: str):
-        self.name = name
-
 class PumpDataDecoder(LogsDecoder):
     total_created = 0
     log_data_prefixes = [LogsDecoder.program_data_prefix, LogsDecoder.program_instruction_prefix]
@@ -30,19 +25,28 @@ class PumpDataDecoder(LogsDecoder):
     pump_migration_id_bytes = 0x9beae792ec9ea21e.to_bytes(8, byteorder='big')
     pump_amm_migration_event_bytes = 0xbde95db95c94ea94.to_bytes(8, byteorder='big')
     instruction_withdraw = "Withdraw"
+    prefilter_markers = ["Instruction: Create", "Instruction: Migrate", "Instruction: Withdraw"]
 
     program_data_index = len(LogsDecoder.program_data_prefix)
+    instruction_names = ["buy", "sell", "create", "withdraw"]
+    account_names = ["BondingCurve"]
+    event_names = ["TradeEvent", "CreateEvent"]
 
-    def __init__(self, program_address: str, coders: Coder, encoding: str):
+    def __init__(self, program_address: str, idl_path: str, encoding: str):
         self.program_address = program_address
-        self.coders = coders
         self.encoding = encoding
         self.last_event = None
+        self.dispatch_table = AnchorIdlLayout.build_dispatch_table(idl_path, self.instruction_names, self.account_names, self.event_names)
 
-        self.coder_list = [self.coders.instruction, self.coders.accounts, self.coders.events]
+        #Migration instruction/event carry no fields we use
+        self.dispatch_table[self.pump_migration_id_bytes] = ("withdraw", None)
+        self.dispatch_table[self.pump_amm_migration_event_bytes] = ("withdraw", None)
         
     def get_log_data_prefixes(self):
         return PumpDataDecoder.log_data_prefixes
+
+    def get_prefilter_markers(self)->list[str]:
+        return PumpDataDecoder.prefilter_markers
     
     def decode_log(self, log: str)->InstructionData:
         if self.instruction_withdraw in log or self.log_migrate in log:
@@ -53,40 +57,30 @@ class PumpDataDecoder(LogsDecoder):
 
             decoded_bytes = self.get_bytes(program_data, LogsDecoder.base64_encoding)
     
-            return self.decode_bytes_data(decoded_bytes, self.coders.events) #Use events decoder
-    
-    def _retry_decode_event(self, data: bytes, exclude_coder = None):
-        ret_event = None
-        for coder in self.coder_list:
-            try:
-                if coder != exclude_coder:
-                    ret_event = coder.parse(data)
-                    break 
-            except Exception as e:
-                pass
-        
-        return ret_event
+            if decoded_bytes:
+                return self.decode_bytes_data(decoded_bytes)
 
-    def decode_bytes_data(self, data: bytes, coder: Adapter)->InstructionData:
-        ret_data = None
+    #Single lookup on the 8 byte discriminator; anything we don't consume is dropped without attempting a parse
+    def parse_event(self, data: bytes)->DecodedEvent:
+        dispatch_entry = self.dispatch_table.get(data[:8])
 
-        try:
-            event = coder.parse(data)
-        except Exception as e:
-            data_bytes = None
-            event = None
-            if len(data) >= 8:
-                data_bytes = data[:8]
-                if data_bytes == self.pump_migration_id_bytes or data_bytes == self.pump_amm_migration_event_bytes:
-                    event = Event("withdraw")            
-            
-            if not event:
-                #Try with all the other coders
-                event = self._retry_decode_event(data, coder)
+        if dispatch_entry:
+            name, layout = dispatch_entry
+
+            if layout is None:
+                return DecodedEvent(name)
+
+            record = layout.decode(data, 8)
+
+            if record is not None: #Records without fields (e.g. withdraw) are empty tuples
+                return DecodedEvent(name, record)
 
-                if not event:
-                    #print("PumpDataDecoder: Bad data " + data.hex())   
-                    return
+    def decode_bytes_data(self, data: bytes)->InstructionData:
+        ret_data = None
+        event = self.parse_event(data)
+
+        if not event:
+            return
             
         if event:                                                                                           
             if event.name == "buy":
@@ -107,27 +101,20 @@ class PumpDataDecoder(LogsDecoder):
                 if event.name == "create":
                     ret_data.inner_metadata_uri = event.data.uri
                 else:
-                    ret_data.token_address = str(event.data.mint)               
-                    ret_data.sol_vault_address = str(event.data.bonding_curve) #This goes nowhere
-                    ret_data.creator_address = str(event.data.user)
+                    ret_data.token_address = BinaryLayout.to_address(event.data.mint)               
+                    ret_data.sol_vault_address = BinaryLayout.to_address(event.data.bonding_curve) #This goes nowhere
+                    ret_data.creator_address = BinaryLayout.to_address(event.data.user)
                     ret_data.inner_metadata_uri = event.data.uri        
             elif event.name == "BondingCurve":
-                ret_data = BondimgCurveData()
-                ret_data.complete = event.data.complete
-                ret_data.real_sol_reserves = event.data.real_sol_reserves
-                ret_data.real_token_reserves = event.data.real_token_reserves
-                ret_data.token_total_supply = event.data.token_total_supply
-                ret_data.virtual_sol_reserves = event.data.virtual_sol_reserves
-                ret_data.virtual_token_reserves = event.data.virtual_token_reserves
-                ret_data.token_program_address = solana_utilites.TOKEN_PROGRAM_ADDRESS
+                ret_data = self.to_bonding_curve_data(event)
             elif (event.name == "TradeEvent" and (self.last_event == None or event.name != self.last_event.name or
                                                     not (event.data.mint == self.last_event.data.mint and 
                                                         event.data.virtual_token_reserves == self.last_event.data.virtual_token_reserves))):
-                ret_data = RetailTransaction(str(event.data.mint))
+                ret_data = RetailTransaction(BinaryLayout.to_address(event.data.mint))
                 ret_data.is_buy = event.data.is_buy
                 ret_data.trade_amt_sol = event.data.sol_amount
                 ret_data.token_quantity = event.data.token_amount
-                ret_data.trader_address = str(event.data.user) 
+                ret_data.trader_address = BinaryLayout.to_address(event.data.user) 
                 ret_data.transaction_timestamp = event.data.timestamp
                 ret_data.sol_reserves = event.data.virtual_sol_reserves
                 ret_data.token_reserves = event.data.virtual_token_reserves
@@ -138,14 +125,29 @@ class PumpDataDecoder(LogsDecoder):
         self.last_event = event
         return ret_data
 
+    @staticmethod
+    def to_bonding_curve_data(event: DecodedEvent)->BondimgCurveData:
+        ret_data = BondimgCurveData()
+        ret_data.complete = event.data.complete
+        ret_data.real_sol_reserves = event.data.real_sol_reserves
+        ret_data.real_token_reserves = event.data.real_token_reserves
+        ret_data.token_total_supply = event.data.token_total_supply
+        ret_data.virtual_sol_reserves = event.data.virtual_sol_reserves
+        ret_data.virtual_token_reserves = event.data.virtual_token_reserves
+        ret_data.token_program_address = solana_utilites.TOKEN_PROGRAM_ADDRESS
+
+        return ret_data
+
+    #Decodes raw BondingCurve account bytes (e.g. from getMultipleAccounts) with the IDL layout; anything else is ignored
+    def decode_bonding_curve(self, data: bytes)->BondimgCurveData:
+        event = self.parse_event(data) if data else None
+
+        if event and event.name == "BondingCurve":
+            return self.to_bonding_curve_data(event)
+
     def decode(self, program_data: dict)->InstructionData:   
         instruction_data = program_data.get('data')
         encoding = self.encoding
-                  
-        if encoding == self.base64_encoding:
-            coder = self.coders.events
-        else:
-            coder = self.coders.instruction
 
         if isinstance(instruction_data, list) and len(instruction_data) >= 2: #remove check if confident
             encoding = instruction_data[1]
@@ -154,7 +156,7 @@ class PumpDataDecoder(LogsDecoder):
         if instruction_data:
             decoded_bytes = self.get_bytes(instruction_data, encoding) 
         
-            ret_object = self.decode_bytes_data(decoded_bytes, coder)      
+            ret_object = self.decode_bytes_data(decoded_bytes)      
             
             #Create a filled out MintMetadata object
             if ret_object and (ret_object.get_type() == TradeEventType.NEW_MINT or ret_object.get_type() == TradeEventType.BONDING_COMPLETE):
@@ -1,9 +1,49 @@
 from solders.pubkey import Pubkey
 import struct
 from MessageDecoder import LogsDecoder
+from TxDefi.DataAccess.Decoders.NotificationFilter import NotificationFilter
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout, DataType
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TransactionInfo import *
 
+#Layouts include the leading u8 discriminator/log type
+log_init2_layout = BinaryLayout("Init2Log", [
+    ("log_type", DataType.BYTE),
+    ("open_time", DataType.UINT64),
+    ("quote_decimals", DataType.BYTE),
+    ("base_decimals", DataType.BYTE),
+    ("quote_lot_size", DataType.UINT64),
+    ("base_lot_size", DataType.UINT64),
+    ("init_pc_amount", DataType.UINT64),
+    ("init_coin_amount", DataType.UINT64)
+])
+
+init2_layout = BinaryLayout("Init2", [
+    ("discriminator", DataType.BYTE),
+    ("nonce", DataType.BYTE),
+    ("open_time", DataType.UINT64),
+    ("init_pc_amount", DataType.UINT64),
+    ("init_coin_amount", DataType.UINT64)
+])
+
+swap_layout = BinaryLayout("SwapBaseIn", [
+    ("discriminator", DataType.BYTE),
+    ("amount_in", DataType.UINT64),
+    ("minimum_amount_out", DataType.UINT64)
+])
+
+add_liquidity_layout = BinaryLayout("AddLiquidity", [
+    ("discriminator", DataType.BYTE),
+    ("max_coin_amount", DataType.UINT64),
+    ("max_pc_amount", DataType.UINT64),
+    ("base_side", DataType.UINT64)
+])
+
+withdraw_liquidity_layout = BinaryLayout("WithdrawLiquidity", [
+    ("discriminator", DataType.BYTE),
+    ("lp_token_amount", DataType.UINT64)
+])
+
 class RaydiumDataDecoder(LogsDecoder):
     initialize2_id = 0x1
     add_lq_id = 0x3
@@ -23,6 +63,15 @@ class RaydiumDataDecoder(LogsDecoder):
 
     def get_log_data_prefixes(self):
         return self.log_prefixes
+
+    #New pools and added liquidity; swaps are dropped unless they touch a watched address
+    def get_prefilter_markers(self)->list[str]:
+        markers = ["initialize2"]
+
+        for log_type in [self.log_type_initialize2_id, self.log_type_add_lq_id]:
+            markers.extend(NotificationFilter.get_base64_markers(self.ray_log_prefix, bytes([log_type])))
+
+        return markers
     
     #TODO Future Dev to get market data info from the market account
     #Not working 
@@ -196,65 +245,46 @@ class RaydiumDataDecoder(LogsDecoder):
 
     @staticmethod
     def parse_base64_data_init2(start_index: int, decoded_bytes: bytes)->LiquidityPoolData:      
-        # Parse openTime (8 bytes, u64)
-        open_time = struct.unpack_from('<Q', decoded_bytes, start_index+1)[0]  # '<Q' for little-endian unsigned long long (8 bytes)
-        
-        # Parse initPcAmount (8 bytes, u64)
-        init_pc_amount = struct.unpack_from('<Q', decoded_bytes, start_index+27)[0]
-        
-        # Parse initCoinAmount (8 bytes, u64)
-        init_coin_amount = struct.unpack_from('<Q', decoded_bytes, start_index+35)[0]
-        
-        return LiquidityPoolData(TradeEventType.NEW_MINT, init_pc_amount, init_coin_amount)
+        record = log_init2_layout.decode(decoded_bytes, start_index)
+
+        if record:
+            return LiquidityPoolData(TradeEventType.NEW_MINT, record.init_pc_amount, record.init_coin_amount)
 
     @staticmethod
     def parse_base58_data_withdraw_liquidity(start_index: int, decoded_bytes: bytes)->WithdrawLiquidity:
-        lp_token_amount = struct.unpack_from('<Q', decoded_bytes, start_index+1)[0]
+        record = withdraw_liquidity_layout.decode(decoded_bytes, start_index)
 
-        return WithdrawLiquidity(lp_token_amount)
+        if record:
+            return WithdrawLiquidity(record.lp_token_amount)
         
     @staticmethod
     def parse_base64_data_withdraw_liquidity(start_index: int, decoded_bytes: bytes)->WithdrawLiquidity:
-        lp_token_amount = struct.unpack_from('<Q', decoded_bytes, start_index+1)[0]
+        record = withdraw_liquidity_layout.decode(decoded_bytes, start_index)
 
         #FYI there's other info we could parse including outCoin and outPC        
-        return WithdrawLiquidity(lp_token_amount)
+        if record:
+            return WithdrawLiquidity(record.lp_token_amount)
 
     @staticmethod
     def parse_base64_data_add_liquidity(start_index: int, decoded_bytes: bytes)->LiquidityPoolData:     
-        # Parse initPcAmount (8 bytes, u64)
-        if len(decoded_bytes) >= 24:
-            max_coin_amount = struct.unpack_from('<Q', decoded_bytes, start_index+1)[0]
-            max_pc_amount = struct.unpack_from('<Q', decoded_bytes, start_index+9)[0]
-            base_side = struct.unpack_from('<Q', decoded_bytes, start_index+17)[0]
-        
-            return LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, max_pc_amount, max_coin_amount)
+        record = add_liquidity_layout.decode(decoded_bytes, start_index)
+
+        if record:
+            return LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, record.max_pc_amount, record.max_coin_amount)
     
     @staticmethod
     def parse_base58_data_init2(start_index: int, decoded_bytes: bytes)->LiquidityPoolData:      
-        # Parse the nonce (1 byte, u8)
-        nonce = struct.unpack_from('B', decoded_bytes, start_index+1)[0]
-        
-        # Parse openTime (8 bytes, u64)
-        open_time = struct.unpack_from('<Q', decoded_bytes, start_index+2)[0]  # '<Q' for little-endian unsigned long long (8 bytes)
-        
-        # Parse initPcAmount (8 bytes, u64)
-        init_pc_amount = struct.unpack_from('<Q', decoded_bytes, start_index+10)[0]
-        
-        # Parse initCoinAmount (8 bytes, u64)
-        init_coin_amount = struct.unpack_from('<Q', decoded_bytes, start_index+18)[0]
-        
-        return LiquidityPoolData(TradeEventType.NEW_MINT, init_pc_amount, init_coin_amount)
+        record = init2_layout.decode(decoded_bytes, start_index)
+
+        if record:
+            return LiquidityPoolData(TradeEventType.NEW_MINT, record.init_pc_amount, record.init_coin_amount)
 
     @staticmethod
     def parse_base58_data_swapv2(start_index: int, decoded_bytes: bytes)->AmmSwapData:
-        # Parse amountIn (8 bytes, u64)
-        amount_in = struct.unpack_from('<Q', decoded_bytes, start_index+1)[0]  # '<Q' for little-endian unsigned long long (8 bytes)
-                
-        # Parse minimumAmountOut (8 bytes, u64)
-        minimum_amount_out = struct.unpack_from('<Q', decoded_bytes, start_index+9)[0]
+        record = swap_layout.decode(decoded_bytes, start_index)
 
-        return AmmSwapData(TradeEventType.EXCHANGE, amount_in, minimum_amount_out)
+        if record:
+            return AmmSwapData(TradeEventType.EXCHANGE, record.amount_in, record.minimum_amount_out)
 
     #Data formats below for reference
     #Event Data
@@ -1,18 +1,42 @@
-import re
 from TransactionsDecoder import TransactionsDecoder
 from MessageDecoder import LogsDecoder
+from TxDefi.DataAccess.Decoders.NotificationSchemas import LogsNotificationSchema
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TransactionInfo import *
 
-def does_match(in_string: str, regx: str):
-    return bool(re.search(regx, in_string))
+program_prefix = "Program "
+invoke_marker = " invoke ["
+success_marker = " success"
+failed_marker = " failed"
 
-#Logs hierarchical container
-class ProgramLogsGroup:
-    invoke_regx = r'invoke \[\d+\]$'
-    pg_success_regx = r"^Program .* success$"   
+#Single pass over the logs with a stack of invoked programs; yields (depth, program_id, line) for every line except the invoke lines
+#program_id is the innermost program executing when the line was logged (None outside any invocation)
+def iter_log_spans(logs: list[str]):
+    program_stack : list[str] = []
+
+    for log in logs:
+        if log.startswith(program_prefix):
+            space_index = log.find(" ", len(program_prefix))
+
+            if space_index > 0 and log[space_index-1] != ":": #Skip "Program log:", "Program data:", "Program return:"
+                program_id = log[len(program_prefix):space_index]
+                remainder = log[space_index:]
+
+                if remainder.startswith(invoke_marker) and log.endswith("]"):
+                    program_stack.append(program_id)
+                    continue
+                elif remainder == success_marker or remainder.startswith(failed_marker):
+                    yield len(program_stack), program_id, log
+
+                    if program_stack:
+                        program_stack.pop()
+                    continue
 
+        yield len(program_stack), program_stack[-1] if program_stack else None, log
+
+#Logs hierarchical container; only needed for debugging now that decoding works on the flat spans
+class ProgramLogsGroup:
     def __init__(self, group_name: str, start_index: int):
         self.group_name = group_name
         self.start_index = start_index
@@ -37,31 +61,30 @@ class ProgramLogsGroup:
         for group in logs_group.inner_groups:
             ProgramLogsGroup.print_logs(group)
 
+    #Iterative so CPI heavy transactions can't hit the recursion limit
     @staticmethod
     def build_program_log_set(logs_group: "ProgramLogsGroup", logs: list[str], log_index: int)->"ProgramLogsGroup":
         if not logs_group:
             logs_group = ProgramLogsGroup("root", log_index)
 
-        if log_index >= len(logs) :
-            return logs_group
+        groups_stack = [logs_group]
 
-        log = logs[log_index]
+        for index in range(log_index, len(logs)):
+            log = logs[index]
+            current_group = groups_stack[-1]
+            current_group.end_index = index
 
-        if does_match(log, ProgramLogsGroup.pg_success_regx):
-            logs_group.logs.append(log)
-            logs_group.end_index = log_index     
-            
-            return logs_group 
-        elif(does_match(log, ProgramLogsGroup.invoke_regx)):
-            new_logs_group = ProgramLogsGroup.build_program_log_set(ProgramLogsGroup(log, log_index), logs, log_index+1)
+            if log.startswith(program_prefix) and invoke_marker in log and log.endswith("]"):
+                new_group = ProgramLogsGroup(log, index)
+                current_group.inner_groups.append(new_group)
+                groups_stack.append(new_group)
+            else:
+                current_group.logs.append(log)
 
-            if new_logs_group:
-                logs_group.inner_groups.append(new_logs_group)
-                log_index = new_logs_group.end_index
-        else:
-            logs_group.logs.append(log)
+                if log.startswith(program_prefix) and log.endswith(success_marker) and len(groups_stack) > 1:
+                    groups_stack.pop()
 
-        return ProgramLogsGroup.build_program_log_set(logs_group, logs, log_index+1)
+        return logs_group
     
 class SolanaLogsDecoder(LogsDecoder):
     def __init__(self, program_id: str, solana_api: SolanaRpcApi, logs_decoder: LogsDecoder, transactions_decoder: TransactionsDecoder, get_transaction = False):
@@ -79,8 +102,13 @@ class SolanaLogsDecoder(LogsDecoder):
     def decode_log(self, log: str)->InstructionData:
         return self.logs_decoder.decode_log(log)
     
-    def decode(self, data: dict)->list:
-        if 'method' in data and data['method'] == "logsNotification":
+    def decode(self, data: dict | LogsNotificationSchema)->list:
+        if isinstance(data, LogsNotificationSchema):
+            result = data.params.result
+
+            if len(result.value.logs) > 0:
+                return self.decode_logs(result.value.logs, result.context.slot, result.value.signature)
+        elif 'method' in data and data['method'] == "logsNotification":
             slot = data['params']['result']['context']['slot']
             logs = data['params']['result']['value']['logs']
             count = len(logs)
@@ -101,37 +129,34 @@ class SolanaLogsDecoder(LogsDecoder):
                 return self.parse_logs(slot, signature, matching_logs)
 
 
+    #Only lines logged directly by program_id (not by programs it invokes) are decoded
     def decode_logs(self, logs: list[str], slot: int, signature: str)->list:
         count = len(logs)
 
         if count > 1:
-            root_pl_set = ProgramLogsGroup.build_program_log_set(None, logs, 0)
+            matching_logs = [log for _, program_id, log in iter_log_spans(logs) if program_id == self.program_id and log.startswith(self.log_data_prefix_tuple)]
 
-            decoded_data = self.parse_program_logs_set(slot, signature, root_pl_set)
+            if len(matching_logs) > 0:
+                decoded_data = self.parse_matching_logs(slot, signature, matching_logs)
             
-            if decoded_data and len(decoded_data) > 0:                
-                return decoded_data
-                
-    def parse_program_logs_set(self, slot: int, signature: str, program_logs_set: ProgramLogsGroup)->list[InstructionData]:
-        if program_logs_set.group_name.startswith(self.program_invoke_prefix):
-            ret_data = self.parse_logs(slot, signature, program_logs_set.logs)
-        else:
-            ret_data = []
-            
-        for inner_set in program_logs_set.inner_groups:
-            inner_ret_data = self.parse_program_logs_set(slot, signature, inner_set)
-
-            if inner_ret_data:
-                ret_data.extend(inner_ret_data)
-
-        return ret_data
+                if decoded_data and len(decoded_data) > 0:                
+                    return decoded_data
 
     def get_log_data_prefixes(self):
         return self.logs_decoder.get_log_data_prefixes()
+
+    def get_prefilter_markers(self)->list[str]:
+        return self.logs_decoder.get_prefilter_markers()
    
     def parse_logs(self, slot: int, signature: str, logs: list[str])->list[InstructionData]:
-        ret_decoded_messages : list[InstructionData]  = []
         matching_logs = [log for log in logs if log.startswith(self.log_data_prefix_tuple)]
+
+        return self.parse_matching_logs(slot, signature, matching_logs)
+
+    #matching_logs must already be filtered by the log data prefixes
+    def parse_matching_logs(self, slot: int, signature: str, matching_logs: list[str])->list[InstructionData]:
+        ret_decoded_messages : list[InstructionData]  = []
+
         for log in matching_logs:    
             #Check for Add Liquidity, Remove Liquidity, and Burn Verbage
             #if any(word in log for word in self.get_log_data_prefixes()): #DELETE
@@ -1,4 +1,5 @@
 from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.NotificationSchemas import AccountNotificationSchema
 from TxDefi.Data.MarketDTOs import *
 
 class Subscription:
@@ -14,11 +15,20 @@ class SubscriptionsDataDecoder(MessageDecoder[Subscription]):
         self.message_decoders[subscription_id] = decoder
     
     def remove_decoder(self, subscription_id: int):
-        self.message_decoders.pop(subscription_id)
+        self.message_decoders.pop(subscription_id, None)
+
+    def clear(self):
+        self.message_decoders.clear()
         
-    def decode(self, data: dict)->Subscription:
+    def decode(self, data: dict | AccountNotificationSchema)->Subscription:
         try:
             decoded_data = None
+
+            if isinstance(data, AccountNotificationSchema):
+                decoder = self.message_decoders.get(data.params.subscription)
+
+                return decoder.decode(data) if decoder else None
+
             id = data.get("id", {})
 
             if id:
@@ -1,5 +1,7 @@
 from datetime import datetime
+from solders.pubkey import Pubkey
 from MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.NotificationSchemas import TransactionNotificationSchema
 from TxDefi.Data.TransactionInfo import *
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TradingDTOs import *
@@ -15,9 +17,14 @@ class TransactionsDecoder(MessageDecoder[ParsedTransaction]):
 
     def __init__(self):
         self.supported_decoders : dict[str, MessageDecoder[dict]] = {}
-
-    def decode(self, data: dict)->ParsedTransaction:
-        if data.get('method', '') == TransactionsDecoder.transaction_notification:
+        self.decoders_by_key : dict[bytes, MessageDecoder[dict]] = {} #Same decoders keyed by raw 32 byte program id for the gRPC path
+        self.logs_decoders : dict[SupportedPrograms, MessageDecoder] = {} #Decoded alongside the instructions (e.g. inside a decode process)
+
+    def decode(self, data: dict | TransactionNotificationSchema)->ParsedTransaction:
+        if isinstance(data, TransactionNotificationSchema):
+            transaction_data = data.params.result.transaction
+            slot = data.params.result.slot
+        elif data.get('method', '') == TransactionsDecoder.transaction_notification:
             transaction_data = data.get('params', {}).get('result', {}).get('transaction', {})
             slot = data.get('params', {}).get('result', {}).get('slot')
         else:
@@ -54,8 +61,12 @@ class TransactionsDecoder(MessageDecoder[ParsedTransaction]):
                 instruction_list = inner_instruction_list
 
         if instruction_list:
-            return ParsedTransaction(tx_signature, slot, payer_address, all_accounts, pre_sol_balances, post_sol_balances, pre_token_balances, 
-                                     post_token_balances, fees, instruction_list, log_messages)
+            parsed_transaction = ParsedTransaction(tx_signature, slot, payer_address, all_accounts, pre_sol_balances, post_sol_balances, pre_token_balances, 
+                                                   post_token_balances, fees, instruction_list, log_messages)
+
+            self.decode_program_logs(parsed_transaction)
+
+            return parsed_transaction
                 
     def parse_instructions(self, instructions: dict, tx_signature: str)->list[InstructionInfo]:
         instruction_infos : list[InstructionInfo] = []
@@ -90,6 +101,20 @@ class TransactionsDecoder(MessageDecoder[ParsedTransaction]):
         
     def add_data_decoder(self, program_id: str, decoder: MessageDecoder):
         self.supported_decoders[program_id] = decoder
+        self.decoders_by_key[bytes(Pubkey.from_string(program_id))] = decoder
+
+    def add_logs_decoder(self, program_type: SupportedPrograms, logs_decoder: MessageDecoder):
+        self.logs_decoders[program_type] = logs_decoder
+
+    #Fills in log_alerts when a logs decoder is registered for one of the transaction's programs
+    def decode_program_logs(self, parsed_transaction: ParsedTransaction):
+        if len(self.logs_decoders) > 0:
+            supported_programs = parsed_transaction.get_supported_programs()
+
+            for program_type, logs_decoder in self.logs_decoders.items():
+                if program_type in supported_programs:
+                    log_alerts = logs_decoder.decode_logs(parsed_transaction.log_messages, parsed_transaction.slot, parsed_transaction.tx_signature)
+                    parsed_transaction.log_alerts = log_alerts if log_alerts else []
     
     def get_instructions_decoder(self, program_id: str):
         if program_id in self.supported_decoders:
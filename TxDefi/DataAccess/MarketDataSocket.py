@@ -3,44 +3,84 @@ import asyncio
 import websockets
 import logging
 import json
+import time
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosedError
 from abc import abstractmethod
-import asyncio
-import concurrent.futures
 import TxDefi.Utilities.LoggerUtil as logger_util
+from TxDefi.Utilities.BoundedQueue import BoundedQueue, OverflowPolicy
 
 class MarketDataSocket(threading.Thread):    
-    def __init__(self, wss_uri: str, custom_ping = True):
+    max_frame_requests = 100 #Max queued requests packed into one JSON-RPC array frame
+    default_receive_queue_size = 10000
+    reconnect_delay = 1 #Seconds
+    subscription_marker = '"subscription":'
+
+    #coalesce_requests: pack requests queued together into one array frame; only enable for servers that accept JSON-RPC batches
+    #The reader only recv's into bounded receive queues; decode_workers threads drain them and run process_data
+    def __init__(self, wss_uri: str, custom_ping = True, coalesce_requests = False, receive_queue_size = default_receive_queue_size,
+                 overflow_policy = OverflowPolicy.DROP_OLDEST, decode_workers = 1):
         threading.Thread.__init__(self, daemon=True)
         self.name = MarketDataSocket.__name__
         self.wss_uri = wss_uri
         self.cancel_token = threading.Event()
-        self.receive_queue = asyncio.Queue()  # Queue for incoming messages 
-        self.write_queue = asyncio.Queue()  # Queue for outgoing messages
+        self.loop : asyncio.AbstractEventLoop = None #Long-lived loop owned by this thread; set in run()
+        self.write_queue : asyncio.Queue = None  # Queue for outgoing messages
+        self.overflow_policy = overflow_policy
+        #Queues for incoming messages; one per worker so messages of a subscription stay in order
+        self.receive_queues = [BoundedQueue(max(1, receive_queue_size//max(1, decode_workers)), overflow_policy) for _ in range(max(1, decode_workers))]
+        self.decode_threads : list[threading.Thread] = []
+        self.paused_drops = 0
+        self.decode_errors = 0
+        self.coalesce_requests = coalesce_requests
         self.custom_ping = custom_ping
         self.lock = threading.Lock()
         self.paused_event = threading.Event()
         self.paused_event.set()
         self.websocket = None
+        self.connected = False
+        self.disconnected_time = time.monotonic() #When the socket last lost (or never had) its connection
        
     def stop(self):
         self.cancel_token.set()
   
+    def get_disconnected_duration(self)->float:
+        if self.connected:
+            return 0
+
+        return time.monotonic() - self.disconnected_time
+
+    def get_stats(self)->dict:
+        queue_stats = [receive_queue.get_stats() for receive_queue in self.receive_queues]
+
+        return {"connected": self.connected, "depth": sum(stats["depth"] for stats in queue_stats), "peak_depth": max(stats["peak_depth"] for stats in queue_stats),
+                "dropped": sum(stats["dropped"] for stats in queue_stats), "coalesced": sum(stats["coalesced"] for stats in queue_stats),
+                "received": sum(stats["put"] for stats in queue_stats), "paused_drops": self.paused_drops, "decode_errors": self.decode_errors}
+
     def toggle(self):
         if self.paused_event.is_set():
             self.paused_event.clear()
         else:
             self.paused_event.set()
 
+    #Thread-safe; hands the request to the socket's own loop without blocking the caller
     def send_request_no_wait(self, request: str):
-        if self.is_alive():
+        self.send_requests_no_wait([request])
+
+    #Queue many requests with one loop wakeup so the send task can pack them into as few frames as possible
+    def send_requests_no_wait(self, requests: list[str]):
+        loop = self.loop
+
+        if loop and loop.is_running() and len(requests) > 0:
             #print("Sending request: " + request) #DELETE
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                loop = asyncio.new_event_loop()  # Create a new event loop
-                asyncio.set_event_loop(loop)  # Set it as the current loop
-                future = executor.submit(loop.run_until_complete, self.send_request(request))  # Run async_task() inside the executor
-                result = future.result()  # Get the result from the future
-    
+            if threading.current_thread() is self:
+                self._enqueue_requests(requests)
+            else:
+                loop.call_soon_threadsafe(self._enqueue_requests, requests)
+
+    def _enqueue_requests(self, requests: list[str]):
+        for request in requests:
+            self.write_queue.put_nowait(request)
+
     async def send_request(self, request: str):
         await self.write_queue.put(request)
 
@@ -59,10 +99,28 @@ class MarketDataSocket(threading.Thread):
             while not self.cancel_token.is_set():
                 request = await self.write_queue.get()
                 if request:
-                    await self.websocket.send(request)
+                    await self.websocket.send(self._get_frame(request))
         except Exception as e:
             print("Error in _send_requests " + str(e))
 
+    #Drain whatever else is already queued into one JSON-RPC array frame
+    def _get_frame(self, request: str)->str:
+        if not self.coalesce_requests or self.write_queue.empty():
+            return request
+
+        requests = [request]
+
+        while len(requests) < self.max_frame_requests and not self.write_queue.empty():
+            next_request = self.write_queue.get_nowait()
+
+            if next_request:
+                requests.append(next_request)
+
+        if len(requests) == 1:
+            return request
+
+        return "[" + ",".join(requests) + "]"
+
     async def connect(self):
         if not self.custom_ping:
             ping_interval = 30 #Set an auto ping using websocket layer
@@ -75,6 +133,7 @@ class MarketDataSocket(threading.Thread):
                 async with websockets.connect(self.wss_uri, ping_interval = ping_interval) as websocket:
                     print("Socket initialized " + self.wss_uri)
                     self.websocket = websocket
+                    self.connected = True
           
                     logging.getLogger('websockets.client').setLevel(logging.ERROR)
     
@@ -82,6 +141,10 @@ class MarketDataSocket(threading.Thread):
                     if self.custom_ping:
                         tasks.append(asyncio.create_task(self._ping()))
 
+                    #Anything still queued was meant for the dead connection; _init replays what needs replaying
+                    while not self.write_queue.empty():
+                        self.write_queue.get_nowait()
+
                     tasks.append(asyncio.create_task(self._send_requests()))
 
                     self._init()                    
@@ -93,31 +156,94 @@ class MarketDataSocket(threading.Thread):
                 print("Error with websocket " + str(e))
                 if self.cancel_token.is_set():
                     break
+                await asyncio.sleep(self.reconnect_delay) #Don't spin reconnecting to a server that keeps dropping us
+            except Exception as e:
+                print(f"Error connecting to {self.wss_uri} {e}")
+                await asyncio.sleep(self.reconnect_delay)
             finally:
+                if self.connected:
+                    self.connected = False
+                    self.disconnected_time = time.monotonic()
+
+                for task in tasks: #Tasks of a dead connection would eat requests meant for the next one
+                    task.cancel()
+                tasks.clear()
+
                 if self.cancel_token.is_set():
-                    await self.write_queue.put(None) #Make _send_requests kick out of blocking state
-                    for task in tasks:
-                        task.cancel() #TODO this doesn't work
-                        tasks.clear()
                     break
           
+    #Notifications carry their subscription id at the end; a cheap string scan avoids parsing json on the reader
+    @classmethod
+    def get_message_key(cls, data: str | bytes)->str:
+        if isinstance(data, bytes):
+            return None
+
+        index = data.rfind(cls.subscription_marker)
+
+        if index >= 0:
+            start_index = index + len(cls.subscription_marker)
+            end_index = start_index
+
+            while end_index < len(data) and data[end_index] not in ",}":
+                end_index += 1
+
+            return data[start_index:end_index].strip()
+
     async def _read_socket(self):        
         while not self.cancel_token.is_set():
-            if self.paused_event.wait():                
-                received = await self.websocket.recv()
+            received = await self.websocket.recv() #Keep reading while paused so pings and the server's buffers don't back up
+
+            if received:
+                if not self.paused_event.is_set():
+                    self.paused_drops += 1
+                    continue
+
+                key = self.get_message_key(received)
+                receive_queue = self.receive_queues[hash(key) % len(self.receive_queues)]
+
+                if not receive_queue.put_nowait(received, key): #Full under the BLOCK policy; wait off the loop so pings keep flowing
+                    while not self.cancel_token.is_set() and not await asyncio.to_thread(receive_queue.put, received, key, 1):
+                        pass
+
+    def _decode_worker(self, receive_queue: BoundedQueue):
+        while not self.cancel_token.is_set():
+            data = receive_queue.get(1)
 
-                if received:
-                    self.process_data(received)
+            if data:
+                try:
+                    self.process_data(data)
+                except Exception as e:
+                    self.decode_errors += 1
+                    print(f"{self.name}: Error processing data {e}")
+
+    def _start_decode_workers(self):
+        if len(self.decode_threads) == 0:
+            for index, receive_queue in enumerate(self.receive_queues):
+                decode_thread = threading.Thread(target=self._decode_worker, args=(receive_queue,), name=f"{self.name}Decoder{index}", daemon=True)
+                decode_thread.start()
+                self.decode_threads.append(decode_thread)
 
     def run(self):
-        asyncio.run(self.connect())
+        asyncio.run(self._run())
+
+    async def _run(self):
+        self.loop = asyncio.get_running_loop()
+        self.write_queue = asyncio.Queue()
+        self.disconnected_time = time.monotonic()
+        self._start_decode_workers()
+
+        try:
+            await self.connect()
+        finally:
+            self.loop = None
 
     @abstractmethod
     def _init(self):
         pass
     
+    #Runs on a decode worker thread, not the event loop
     @abstractmethod
-    async def process_data(self, data: str):
+    def process_data(self, data: str):
         pass
     
     @staticmethod
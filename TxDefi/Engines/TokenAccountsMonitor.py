@@ -1,19 +1,25 @@
 from pubsub import pub
-import concurrent.futures
+import threading
 import time
 from TokenInfoRetriever import TokenInfoRetriever
 from TxDefi.Data.TransactionInfo import *
 from TxDefi.Data.TokenPoolStates import TokenPoolStates
+from TxDefi.Data.TransactionStore import TransactionStore
 from TxDefi.Data.MarketDTOs import *
-from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocketPool import AccountSubscribeSocketPool
 from TxDefi.DataAccess.Blockchains.Solana.RiskAssessor import Risk, RiskAssessor
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
 from TxDefi.Managers.WalletTracker import WalletTracker
+import TxDefi.DataAccess.Blockchains.Solana.AccountLayouts as account_layouts
 from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry
 from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import SolanaLogsDecoder
+from TxDefi.DataAccess.Decoders.NotificationFilter import NotificationFilter
 import TxDefi.Utilities.LoggerUtil as logger_util
 import TxDefi.Data.Globals as globals
 
+wrapped_sol_mint_key = bytes(solana_utilites.WRAPPED_SOL_MINT)
+
 class VaultBalances:
     def __init__(self, token_address: str,  sol_vault_address: str, token_vault_address: str, sol_balance: Amount, token_balance: Amount):
         self.token_address = token_address
@@ -21,15 +27,31 @@ class VaultBalances:
         self.token_vault_address = token_vault_address
         self.sol_balance = sol_balance
         self.token_balance = token_balance
+        self.vault_slots : dict[str, int] = {} #key=vault address; slot of the newest streamed update
+
+    #False if the update is older than one already applied; 0 means the source doesn't report a slot
+    def update_slot(self, vault_address: str, slot: int)->bool:
+        if slot == 0:
+            return True
+        elif slot < self.vault_slots.get(vault_address, 0):
+            return False
+
+        self.vault_slots[vault_address] = slot
+        return True
+
+    def get_last_slot(self)->int:
+        return max(self.vault_slots.values(), default=0)
 
 class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
     max_saved_transactions = 1000
+    max_saved_transaction_bytes = 64*1024*1024
     min_pump_bonding_pc_amount = 79e9
     max_pump_tokens_at_bonding = 207000000000000
     acceptable_lp_risk = Risk.NONE #Won't pass added liquidity new mints through unless risk is acceptable
 
     def __init__(self, solana_rpc_api: SolanaRpcApi, info_retriever: TokenInfoRetriever, 
-                 pump_logs_decoder: SolanaLogsDecoder, risk_assessor: RiskAssessor):
+                 pump_logs_decoder: SolanaLogsDecoder, risk_assessor: RiskAssessor, account_socket_shards = AccountSubscribeSocketPool.default_num_shards,
+                 notification_filter: NotificationFilter = None, account_tracker: "GeyserAccountTracker" = None):
         AbstractSubscriber. __init__(self)
         self.token_pools: dict[str, TokenPoolStates] = {}
         self.monitored_tokens: dict[str, TokenInfo] = {}
@@ -41,43 +63,59 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
         self.solana_rpc_api = solana_rpc_api    
 
         self.risk_assessor = risk_assessor
-        self.token_balance_change_socket = AccountSubscribeSocket(solana_rpc_api.wss_uri, "tam_token_balance", False)
-        self.sol_balance_change_socket = AccountSubscribeSocket(solana_rpc_api.wss_uri, "tam_sol_balance", False)
-        self.token_balance_tracker = WalletTracker(self.token_balance_change_socket, solana_rpc_api)
-        self.sol_balance_tracker = WalletTracker(self.sol_balance_change_socket, solana_rpc_api)
+
+        if account_tracker: #One geyser accounts stream serves both vaults
+            self.token_balance_change_socket = None
+            self.sol_balance_change_socket = None
+            self.token_balance_tracker = account_tracker
+            self.sol_balance_tracker = account_tracker
+        else:
+            #Vault subscriptions are sharded across connections to stay under provider per-connection caps
+            self.token_balance_change_socket = AccountSubscribeSocketPool(solana_rpc_api.wss_uri, "tam_token_balance", account_socket_shards, False, solana_rpc_api)
+            self.sol_balance_change_socket = AccountSubscribeSocketPool(solana_rpc_api.wss_uri, "tam_sol_balance", account_socket_shards, False, solana_rpc_api)
+            self.token_balance_tracker = WalletTracker(self.token_balance_change_socket, solana_rpc_api)
+            self.sol_balance_tracker = WalletTracker(self.sol_balance_change_socket, solana_rpc_api)
+
         self.new_mints_paused = False
         self.pump_logs_decoder = pump_logs_decoder
         self.subbed_topics : list[str] = []
-        self.saved_transactions : dict[str, ParsedTransaction] = {} #TODO keep the list size small so reduce memory footprint
-
-    def _update_new_token_task(self, token_address: str, max_tries = 10, interval = 10):
+        self.saved_transactions = TransactionStore(self.max_saved_transactions, self.max_saved_transaction_bytes)
+        #Program sockets drop notifications that don't mention these addresses (or a new mint/migration/liquidity event)
+        self.notification_filter = notification_filter if notification_filter else NotificationFilter()
+        self.watched_tokens = set() #Tokens the prefilter must keep passing; a new mint's temporary watch isn't counted
+        self.watch_lock = threading.Lock()
+
+    #One lookup per call; a miss is retried from a timer so no io worker sleeps between tries (confirmations share that pool)
+    def _update_new_token_task(self, token_address: str, max_tries = 10, interval = 10, time_start: float = None):
         success = False
 
-        time_start = time.time()
+        if time_start is None:
+            time_start = time.time()
+
         is_token_bonding = False
+        token_pool_state = self.token_pools.get(token_address)
 
-        if token_address in self.token_pools:
-            token_info = self.token_pools.get(token_info).get_selected_pool()
+        if token_pool_state:
+            token_info = token_pool_state.get_selected_pool()
 
             if token_info:
                 is_token_bonding = token_info.phase == TokenPhase.BONDING_IN_PROGRESS
 
-        for _ in range(max_tries):    
-            token_info = self.token_info_retriever.get_token_info(token_address, is_token_bonding)
-    
-            if token_info:
-               success = True               
-               self.add_new_pool(token_info)
-               break  
+        token_info = self.token_info_retriever.get_token_info(token_address, is_token_bonding)
 
-            time.sleep(interval)     
+        if token_info:
+            success = True
+            self.add_new_pool(token_info)
+        elif max_tries > 1:
+            ExecutorRegistry.submit_after(interval, ExecutorRegistry.io_pool, self._update_new_token_task, token_address, max_tries - 1, interval, time_start)
+            return
 
         time_taken = time.time() - time_start
         message = token_address + " retrieval time " + str(time_taken) + " seconds"
         print(message)
         logger_util.logger.info(message)
         print("Success: " + str(success))
-        self.pending_token_updates.pop(token_address)
+        self.pending_token_updates.discard(token_address)
 
     def get_complete_metadata(self, token_address: str)->ExtendedMetadata:
         if token_address in self.tokens_metadata:
@@ -167,8 +205,7 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                         print(message)
                         self.pending_token_updates.add(token_address)
                         
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            executor.submit(self._update_new_token_task, (token_address))
+                        ExecutorRegistry.submit(ExecutorRegistry.io_pool, self._update_new_token_task, token_address)
 
                     token_info = None
 
@@ -181,8 +218,34 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
             if token_info:
                 self._sub_to_token_updates(token_info)           
         
+        if token_info:
+            self._watch_token(token_address, [token_info.metadata.sol_vault_address, token_info.metadata.token_vault_address])
+
         return token_info
 
+    #Every prefilter change for a token goes through these three so watched_tokens always matches what the filter passes for us
+    def _watch_token(self, token_address: str, vault_addresses: list[str] = [], is_temporary = False):
+        with self.watch_lock:
+            if not is_temporary:
+                self.watched_tokens.add(token_address)
+
+            self.notification_filter.watch([token_address] + vault_addresses)
+
+    #Ends a temporary watch unless the token has since been watched for real
+    def _release_token(self, token_address: str):
+        with self.watch_lock:
+            if token_address not in self.watched_tokens:
+                self.notification_filter.unwatch([token_address])
+
+    def _unwatch_token(self, token_address: str, vault_addresses: list[str] = []):
+        with self.watch_lock:
+            self.watched_tokens.discard(token_address)
+            self.notification_filter.unwatch([token_address] + vault_addresses)
+
+    #Payers other than the default signer (e.g. set by custom strategies) so notifications about their trades get through
+    def watch_wallets(self, wallet_addresses: list[str]):
+        self.notification_filter.watch(wallet_addresses)
+
     def _sub_to_token_updates(self, token_info: TokenInfo):
         if token_info not in self.monitored_tokens and token_info.phase == TokenPhase.BONDED: #Don't monitor Pumpfun wallets, value is retrieved from the real-time updates
             self.monitored_tokens[token_info.token_address] = token_info
@@ -195,8 +258,19 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
             self.vault_balances[token_vault_address] = vault_balances
             self.sol_balance_tracker.subscribe_to_wallet(sol_vault_address, self)
             self.token_balance_tracker.subscribe_to_wallet(token_vault_address, self) 
+            self._watch_token(token_info.token_address, [sol_vault_address, token_vault_address])
 
     def stop_monitoring_token(self, token_address: str):
+        token_info = self.monitored_tokens.get(token_address)
+
+        if not token_info and token_address in self.token_pools:
+            token_info = self.token_pools[token_address].get_selected_pool()
+
+        if token_info:
+            self._unwatch_token(token_address, [token_info.metadata.sol_vault_address, token_info.metadata.token_vault_address])
+        else:
+            self._unwatch_token(token_address)
+
         if token_address in self.monitored_tokens:
             token_info = self.monitored_tokens.pop(token_address)
 
@@ -215,8 +289,23 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
             if token_balance:
                 token_info.token_vault_amount = token_balance
 
+    #Re-sync the vault reserves of every monitored token in one getMultipleAccounts pass (e.g. in case socket updates were missed)
+    #Tokens whose streamed updates are newer than the snapshot are skipped
+    def refresh_vault_balances(self):
+        token_infos = list(self.monitored_tokens.values())
+
+        if len(token_infos) > 0:
+            for token_info in self.token_info_retriever.update_token_vaults_bulk(token_infos, self._get_vaults_slot):
+                pub.sendMessage(topicName=globals.topic_token_update_event, arg1=token_info.token_address)
+
+    def _get_vaults_slot(self, token_info: TokenInfo)->int:
+        vault_balances = self.vault_balances.get(token_info.metadata.sol_vault_address)
+
+        return vault_balances.get_last_slot() if vault_balances else 0
+
     def _init(self):
         token_addresses = list(self.monitored_tokens.keys())
+        self.refresh_vault_balances()
 
         for token_address in token_addresses:
             self.monitor_token(token_address)
@@ -227,18 +316,20 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                 return instruction.data
 
     def delete_transaction(self, tx_signature)->ParsedTransaction:
-        if tx_signature in self.saved_transactions:
-            return self.saved_transactions.pop(tx_signature)
+        return self.saved_transactions.pop(tx_signature)
 
     #Process Transactions from a geyser
     def _handle_amm_transactions(self, arg1: ParsedTransaction):
-        self.saved_transactions[arg1.tx_signature] = arg1
         trade_alerts = None
         supported_programs = arg1.get_supported_programs()
         
         #TODO: Don't process logs if we have enough info from the transaction; need to probably only do this for pump tokens
         if SupportedPrograms.PUMPFUN in supported_programs: #Need more info from Pump Logs
-            trade_alerts = self.pump_logs_decoder.decode_logs(arg1.log_messages, arg1.slot, arg1.tx_signature)
+            if arg1.log_alerts is not None: #Already decoded with the transaction
+                trade_alerts = arg1.log_alerts
+            else:
+                trade_alerts = self.pump_logs_decoder.decode_logs(arg1.log_messages, arg1.slot, arg1.tx_signature)
+                arg1.log_alerts = trade_alerts if trade_alerts else []
         
         if not trade_alerts and arg1.instructions and len(arg1.instructions) > 0:
             trade_alerts = []
@@ -247,18 +338,15 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                     or instruction.instruction_type == TradeEventType.ADD_LIQUIDITY or instruction.instruction_type == TradeEventType.REMOVE_LIQUIDITY):
                     
                     trade_alerts.append(instruction.data)
+
+        self.saved_transactions.add(arg1) #Before handing off so the executor threads can find it
        
         if trade_alerts:            
             self._handle_amm_data_task(trade_alerts)
 
-        if len(self.saved_transactions) > self.max_saved_transactions: #Cleanup Task
-            cut_amount = int(self.max_saved_transactions/2) #Remove half of the transactions
-            self.saved_transactions = dict(list(self.saved_transactions.items())[cut_amount:])
-
     #Process Transactions from a logs subscription or MarketAlerts event
     def _handle_amm_data_task(self, arg1: list[MarketAlert]): #use generics to prevent misuse
-        with concurrent.futures.ThreadPoolExecutor() as executor: 
-            executor.submit(self.process_incoming_data, arg1)
+        ExecutorRegistry.submit(ExecutorRegistry.decode_pool, self.process_incoming_data, arg1)
 
     def process_incoming_data(self, data_list: list[MarketAlert | InstructionData]):
         for data in data_list:
@@ -276,10 +364,14 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                         
         token_pool_states.add_pool(token_info)
 
-    def _get_transaction(self, tx_signature: str)->ParsedTransaction:
-        transaction = self.saved_transactions.get(tx_signature)
+    #Falls back to the newest saved transaction for token_address with event_type before asking the RPC
+    def _get_transaction(self, tx_signature: str, token_address: str = None, event_type: TradeEventType = None)->ParsedTransaction:
+        transaction = self.saved_transactions.get(tx_signature) if tx_signature else None
+
+        if not transaction and token_address:
+            transaction = self.saved_transactions.find_by_mint(token_address, lambda saved_transaction: self.find_instruction(saved_transaction, event_type) is not None)
 
-        if not transaction:
+        if not transaction and tx_signature:
             transaction = self.token_info_retriever.get_transaction_from_tx(tx_signature)
         
         return transaction
@@ -287,8 +379,9 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
     def _process_mint_data(self, data: PumpMigration | LiquidityPoolData | SwapData | RetailTransaction | ExtendedMetadata):
         if data.program_type == SupportedPrograms.PUMPFUN:
             if data.get_type() == TradeEventType.NEW_MINT:
-                if data.tx_signature in self.saved_transactions:
-                    transaction = self.saved_transactions[data.tx_signature]
+                transaction = self.saved_transactions.get(data.tx_signature)
+
+                if transaction:
                     new_mint_instruction = self.find_instruction(transaction, data.get_type())
 
                     if new_mint_instruction and isinstance(new_mint_instruction, ExtendedMetadata):
@@ -298,6 +391,7 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                 token_info.phase = TokenPhase.NEW_MINT
 
                 self.add_new_pool(token_info) #Need the next retail transaction to fill out reserves; will notify clients then
+                self._watch_token(token_info.token_address, is_temporary=True) #Let its first trade through the prefilter
             elif data.token_address in self.token_pools:
                 token_pools = self.token_pools.get(data.token_address)
                 token_info = token_pools.get_selected_pool()
@@ -306,13 +400,16 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                     if token_info.phase == TokenPhase.NEW_MINT:
                         #Copy missing essential data (don't need all the metadata yet, time is of the essence here)
                         if not token_info.is_metadata_complete(): #No vaults
-                            transaction = self._get_transaction(data.tx_signature)
+                            transaction = self._get_transaction(data.tx_signature, data.token_address, TradeEventType.NEW_MINT) #The create transaction has the vaults too
                             token_infos = self.token_info_retriever.extract_token_infos(transaction)
 
                             if token_infos and len(token_infos) > 0:
                                 token_info.copy_missing(token_infos[0])
                                 
                         token_info.phase = TokenPhase.NOT_BONDED
+
+                        self._release_token(token_info.token_address)
+
                         token_info.sol_vault_amount = Amount.sol_scaled(data.sol_reserves)
                         token_info.token_vault_amount = Amount.tokens_scaled(data.token_reserves, 6)
                         pub.sendMessage(topicName=globals.topic_token_alerts, arg1=token_info.metadata) #Send out an ExtendedMetaData message indicating that there's a new mint
@@ -369,7 +466,7 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                 return instruction_info
 
     def _migrate_token(self, data: PumpMigration):
-        transaction = self._get_transaction(data.tx_signature)
+        transaction = self._get_transaction(data.tx_signature, data.token_address, TradeEventType.BONDING_COMPLETE) #No signature when liquidity showed up first
         migration_data : PumpMigration = None 
         add_liquidity_data : LiquidityPoolData= None
 
@@ -402,7 +499,7 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
     def _process_account_info(self, account_info: AccountInfo):
         vault_balances = self.vault_balances.get(account_info.account_address)
         
-        if vault_balances:
+        if vault_balances and vault_balances.update_slot(account_info.account_address, account_info.last_slot):
             token_info = self.get_token_info(vault_balances.token_address)
 
             if isinstance(account_info.account_data, dict): #Check if there's token amounts
@@ -422,6 +519,17 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                             token_info.token_vault_amount = vault_balances.token_balance
                             #print("Token vault balance changed for " + vault_balances.token_address) #Only need one notification per pair
                             pub.sendMessage(topicName=globals.topic_token_update_event, arg1=vault_balances.token_address)
+            elif isinstance(account_info.account_data, bytes): #Raw token account from the geyser account tracker
+                raw_amount = account_layouts.parse_token_amount(account_info.account_data)
+
+                if raw_amount is not None:
+                    if account_info.account_data[:32] == wrapped_sol_mint_key:
+                        vault_balances.sol_balance.set_amount2(raw_amount, Value_Type.SCALED)
+                        token_info.sol_vault_amount = vault_balances.sol_balance
+                    else:
+                        vault_balances.token_balance.set_amount2(raw_amount, Value_Type.SCALED)
+                        token_info.token_vault_amount = vault_balances.token_balance
+                        pub.sendMessage(topicName=globals.topic_token_update_event, arg1=vault_balances.token_address)
             else: #Must be just a sol account
                 vault_balances.sol_balance.set_amount(account_info.balance)
                 token_info.sol_vault_amount = vault_balances.sol_balance
@@ -431,17 +539,26 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
         self._process_account_info(data)
 
     def start(self):
-        self.token_balance_change_socket.start()
-        self.sol_balance_change_socket.start()
+        if self.token_balance_change_socket:
+            self.token_balance_change_socket.start()
+            self.sol_balance_change_socket.start()
+
         self.token_balance_tracker.start()
-        self.sol_balance_tracker.start()
+
+        if self.sol_balance_tracker is not self.token_balance_tracker:
+            self.sol_balance_tracker.start()
 
     def stop(self):
         pub.unsubAll()
-        self.token_balance_change_socket.stop()
-        self.sol_balance_change_socket.stop()
+
+        if self.token_balance_change_socket:
+            self.token_balance_change_socket.stop()
+            self.sol_balance_change_socket.stop()
+
         self.token_balance_tracker.stop()
-        self.sol_balance_tracker.stop()
+
+        if self.sol_balance_tracker is not self.token_balance_tracker:
+            self.sol_balance_tracker.stop()
 
 
 
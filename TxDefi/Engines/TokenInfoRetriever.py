@@ -1,12 +1,14 @@
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Callable
 import base64
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.RpcCache import RpcCache
 from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
 from TxDefi.DataAccess.Blockchains.Solana.RaydiumTxBuilder import RaydiumTxBuilder
 from TxDefi.DataAccess.Decoders.PumpDataDecoder import PumpDataDecoder, BondimgCurveData
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TradingDTOs import *
 import TxDefi.DataAccess.Blockchains.Solana.SolanaUtilities as solana_utilities
+import TxDefi.DataAccess.Blockchains.Solana.AccountLayouts as account_layouts
 import TxDefi.Utilities.DEX.DexscreenerApi as dexscreener
 import TxDefi.Utilities.HttpUtils as http_utils
 import TxDefi.Utilities.MetaplexUtility as metaplex_util
@@ -15,6 +17,8 @@ import TxDefi.Data.Globals as globals
 T = TypeVar("T", bound=InstructionData)  # Generic type Key Pair Type
 
 class TokenInfoRetriever:
+    token_program_addresses = [solana_utilities.TOKEN_PROGRAM_ADDRESS, solana_utilities.TOKEN_2022_PROGRAM_ADDRESS]
+
     def __init__(self, solana_rpc_api: SolanaRpcApi, pump_decoder: PumpDataDecoder, transaction_decoder: TransactionsDecoder, use_backup_rpc = False):
         self.solana_rpc_api = solana_rpc_api
         self.pump_decoder = pump_decoder
@@ -52,7 +56,7 @@ class TokenInfoRetriever:
         #    return self.tokens_metadata[token_address]
  
         try:
-            asset_data = self.solana_rpc_api.get_account_info(token_address, 3)
+            asset_data = self.solana_rpc_api.get_account_info(token_address, 3, RpcCache.mint_ttl)
 
             if asset_data:
                 has_token_supply_info = False                
@@ -113,7 +117,7 @@ class TokenInfoRetriever:
     def get_complete_metadata(self, token_address: str)->ExtendedMetadata: 
         try:            
             token_pda_address = metaplex_util.get_metadata_pda(token_address)
-            account_info = self.solana_rpc_api.get_account_info(token_pda_address) #FYI getAsset by Helius seems to be faster than this; may revert back if this causes issues; Should only effect the display
+            account_info = self.solana_rpc_api.get_account_info(token_pda_address, cache_ttl=RpcCache.metadata_ttl) #FYI getAsset by Helius seems to be faster than this; may revert back if this causes issues; Should only effect the display
 
             if account_info and account_info.get('value') is not None:
                 decoded_data = base64.b64decode(account_info['value']['data'][0])
@@ -171,29 +175,64 @@ class TokenInfoRetriever:
             return self.supported_programs[owner].decode(value)
         
     def update_token_vaults(self, token_info: TokenInfo):
-        if len(token_info.metadata.sol_vault_address) > 0 and len(token_info.metadata.token_vault_address) > 0: 
-            account_info = self.solana_rpc_api.get_account_info(token_info.metadata.sol_vault_address, 3)
-  
-            if account_info and account_info.get("value") is not None:
-                value = account_info.get("value")
-                owner = value.get("owner")
-
-                if owner and owner == self.pump_decoder.program_address:  #Pump        
-                    instruction_data = self.pump_decoder.decode(value)
+        self.update_token_vaults_bulk([token_info])
+
+    #Refresh vault reserves for many tokens with getMultipleAccounts; decodes bonding curves and SPL token accounts from the raw bytes
+    #get_min_slot: slot of the newest streamed vault update for a token, checked as each result is applied; tokens the snapshot is older than are left alone
+    #Returns the tokens whose reserves changed
+    def update_token_vaults_bulk(self, token_infos: list[TokenInfo], get_min_slot: Callable[[TokenInfo], int] = None)->list[TokenInfo]:
+        updated_token_infos = []
+        token_infos = [token_info for token_info in token_infos if token_info.is_metadata_complete()]
+        vault_addresses = []
+
+        for token_info in token_infos:
+            vault_addresses.append(token_info.metadata.sol_vault_address)
+            vault_addresses.append(token_info.metadata.token_vault_address)
+
+        vault_accounts, snapshot_slot = self.solana_rpc_api.get_multiple_accounts_at_slot(vault_addresses, 3) #Try a few times as these tokens may be new
+
+        for index, token_info in enumerate(token_infos):
+            if get_min_slot and snapshot_slot < get_min_slot(token_info):
+                continue
+
+            sol_vault_value = vault_accounts[2*index]
+            token_vault_value = vault_accounts[2*index+1]
+            sol_vault_scaled_amount = None
+            token_vault_scaled_amount = None
+
+            if sol_vault_value is None:
+                continue
+
+            sol_vault_bytes = account_layouts.get_account_bytes(sol_vault_value)
+            owner = sol_vault_value.get("owner")
+
+            if owner == self.pump_decoder.program_address: #Pump
+                instruction_data = self.pump_decoder.decode_bonding_curve(sol_vault_bytes)
+            
+                if instruction_data:
+                    token_info.metadata.program_type = SupportedPrograms.PUMPFUN
+                    sol_vault_scaled_amount = instruction_data.virtual_sol_reserves
+                    token_vault_scaled_amount = instruction_data.virtual_token_reserves
+
+                    token_info.metadata.supply.set_amount2(instruction_data.token_total_supply , Value_Type.SCALED) 
+            else: #Ray or Pump AMM
+                if owner in self.token_program_addresses: #WSOL vault
+                    sol_vault_account = account_layouts.parse_token_account(token_info.metadata.sol_vault_address, sol_vault_bytes)
+                    sol_vault_scaled_amount = sol_vault_account.amount if sol_vault_account else None
+                else:
+                    sol_vault_scaled_amount = sol_vault_value.get("lamports")
                 
-                    if isinstance(instruction_data, BondimgCurveData):
-                        token_info.metadata.program_type = SupportedPrograms.PUMPFUN
-                        sol_vault_scaled_amount = instruction_data.virtual_sol_reserves
-                        token_vault_scaled_amount = instruction_data.virtual_token_reserves
+                token_vault_account = account_layouts.parse_token_account(token_info.metadata.token_vault_address, account_layouts.get_account_bytes(token_vault_value))
+                token_vault_scaled_amount = token_vault_account.amount if token_vault_account else None
+
+            if sol_vault_scaled_amount and token_vault_scaled_amount:
+                if token_info.sol_vault_amount.to_scaled() != sol_vault_scaled_amount or token_info.token_vault_amount.to_scaled() != token_vault_scaled_amount:
+                    updated_token_infos.append(token_info)
 
-                        token_info.metadata.supply.set_amount2(instruction_data.token_total_supply , Value_Type.SCALED) 
-                else: #Ray
-                    sol_vault_scaled_amount = self.solana_rpc_api.get_account_balance(token_info.metadata.sol_vault_address, 3)
-                    token_vault_scaled_amount = self.solana_rpc_api.get_token_account_balance(token_info.metadata.token_vault_address, 3).to_scaled() #Try a few times as this token may be new
+                token_info.sol_vault_amount.set_amount2(sol_vault_scaled_amount, Value_Type.SCALED)
+                token_info.token_vault_amount.set_amount2(token_vault_scaled_amount, Value_Type.SCALED)
 
-                if sol_vault_scaled_amount and token_vault_scaled_amount:
-                    token_info.sol_vault_amount.set_amount2(sol_vault_scaled_amount, Value_Type.SCALED)
-                    token_info.token_vault_amount.set_amount2(token_vault_scaled_amount, Value_Type.SCALED)
+        return updated_token_infos
 
     def get_token_info(self, token_address: str, is_token_bonding = False)->TokenInfo:
         try:
@@ -201,17 +240,24 @@ class TokenInfoRetriever:
             ret_token_info = RaydiumTxBuilder.get_token_info(token_address)
 
             if ret_token_info:
-                #Need to populate vault reserves since the API doesn't give this to us
-                ret_token_info.sol_vault_amount = self.solana_rpc_api.get_account_balance_Amount(ret_token_info.metadata.sol_vault_address)
-                ret_token_info.token_vault_amount = self.solana_rpc_api.get_token_account_balance(ret_token_info.metadata.token_vault_address)
+                #Need to populate vault reserves since the API doesn't give this to us; fetch both in one batched round trip
+                responses = self.solana_rpc_api.run_rpc_batch([("getBalance", [ret_token_info.metadata.sol_vault_address]),
+                                                               ("getTokenAccountBalance", [ret_token_info.metadata.token_vault_address])])
+
+                if responses[0]:
+                    ret_token_info.sol_vault_amount = Amount.sol_scaled(responses[0].result['value'])
+                if responses[1]:
+                    ret_token_info.token_vault_amount = Amount.tokens_ui(responses[1].result['value']['uiAmount'], responses[1].result['value']['decimals'])
        
                 return ret_token_info
             else: #Check if it's a Pumpfun Address (Add in other AMM support as needed)
                 #TODO Revisit, getting data from market address may be more efficient
                 top_accounts = self.solana_rpc_api.get_token_largest_accounts(token_address, 5)
+                spl_token_accounts = self.solana_rpc_api.get_spl_token_accounts([token_account.account_address for token_account in top_accounts])
+
+                for token_account, spl_token_account in zip(top_accounts, spl_token_accounts):                    
+                    token_vault_owner = spl_token_account.owner_address if spl_token_account else None
 
-                for token_account in top_accounts:                    
-                    token_vault_owner = self.solana_rpc_api.get_spl_account_owner(token_account.account_address)
                     
                     if token_vault_owner == RaydiumTxBuilder.RAYDIUM_AUTHORITY_V4_ADDRESS:                        
                         ret_token_info = TokenInfo(token_address, token_account.balance.decimals)
@@ -259,8 +305,8 @@ class TokenInfoRetriever:
                                     sol_vault_account = token_vault_owner
                                     program = SupportedPrograms.PUMPFUN                                
                                 elif isinstance(decoded_data, LiquidityPoolData):
-                                    sol_reserves = self.solana_rpc_api.get_token_account_balance(decoded_data.pool_quote_address, 3)
-                                    token_reserves = self.solana_rpc_api.get_token_account_balance(decoded_data.pool_base_address, 3)
+                                    sol_reserves, token_reserves = self.solana_rpc_api.get_token_account_balances([decoded_data.pool_quote_address,
+                                                                                                                  decoded_data.pool_base_address], 3)
                                     supply = decoded_data.total_supply  #TODO may need to pull this later
                                     sol_vault_account = decoded_data.pool_quote_address
                                     program = SupportedPrograms.PUMPFUN_AMM   
@@ -93,6 +93,9 @@ class MarketManager(AbstractMarketManager):
 
         return self.lp_monitor.monitor_token(token_address)
 
+    def watch_wallets(self, wallet_addresses: list[str]):
+        self.lp_monitor.watch_wallets(wallet_addresses)
+
     def stop_monitoring_token(self, token_address: str):
         if token_address in self.candlesticks:
             self.candlesticks.pop(token_address)
@@ -185,6 +188,7 @@ class MarketManager(AbstractMarketManager):
     def update_market_parameters(self):
         while not self.cancel_token.is_set():
             self.update_token_accounts()
+            self.lp_monitor.refresh_vault_balances()
             new_sol_price = solana_utilites.get_solana_price() #Add more robustness or switches if server provider goes down
             
             if new_sol_price:
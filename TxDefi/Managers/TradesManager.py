@@ -1,6 +1,5 @@
 import json
 import time
-import concurrent.futures
 import threading
 from discord import Thread
 from pubsub import pub
@@ -24,6 +23,7 @@ from TxDefi.Data.TradingDTOs import *
 from TxDefi.Data.MarketDTOs import *
 from WalletTracker import WalletTracker
 import TxDefi.Utilities.FinanceUtil as finance_util
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry
 import TxDefi.Data.Globals as globals
 
 class TradesManager(AbstractTradesManager[ExecutableOrder], AbstractSubscriber[AccountInfo], threading.Thread):
@@ -77,13 +77,14 @@ class TradesManager(AbstractTradesManager[ExecutableOrder], AbstractSubscriber[A
         if order_executor:                
             if order.get_wallet_settings() is None:
                 order.set_wallet_settings(self.get_default_wallet_settings())
+            else: #Custom payers need their notifications let through the prefilter too
+                self.market_manager.watch_wallets([signer.get_account_address() for signer in order.get_wallet_settings().signer_wallets])
 
             signatures = order_executor.execute(order, max_tries)
 
             if signatures:
                 for signature in signatures:
-                    with concurrent.futures.ThreadPoolExecutor() as executor: #Set thread limit?
-                        executor.submit(self._process_transaction, order, signature)
+                    ExecutorRegistry.submit(ExecutorRegistry.io_pool, self._process_transaction, order, signature)
                 
                 return signatures
 
@@ -332,7 +333,6 @@ class TradesManager(AbstractTradesManager[ExecutableOrder], AbstractSubscriber[A
     def _update_stats_task(self):
         while not self.cancel_token.is_set():
             total_unrealized_pnl = 0
-            self.solana_rpc_api.update_latest_block_hash() #Updates recent block hash every ten seconds
 
             trades = list(self.active_trades.values())
 
@@ -7,6 +7,7 @@ from TxDefi.Data.MarketEnums import *
 from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder, AccountNotification
 from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import Subscription
 from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocketPool import AccountSubscribeSocketPool
 from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
 
 class AccountUpdateInfoAdvanced(AccountInfo):
@@ -23,7 +24,7 @@ class AccountUpdateInfoAdvanced(AccountInfo):
 class WalletTracker(threading.Thread):
     current_rpc_id = 1
 
-    def __init__(self, sub_socket: AccountSubscribeSocket, solana_rpc_api: SolanaRpcApi):
+    def __init__(self, sub_socket: AccountSubscribeSocket | AccountSubscribeSocketPool, solana_rpc_api: SolanaRpcApi):
         threading.Thread.__init__(self, daemon=True)
         self.name = WalletTracker.__name__
         self.subscription_accounts_map : dict[int, AccountUpdateInfoAdvanced] = {} #key=rpc sub id
@@ -54,59 +55,63 @@ class WalletTracker(threading.Thread):
                     contract_subs.pop(subscriber.get_id())
 
     def subscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
-        if contract_address not in self.accounts_map:
-            sol_balance = self.get_account_balance(contract_address)
-            
-            if sol_balance:
-                new_account = AccountUpdateInfoAdvanced(self.current_rpc_id, contract_address, sol_balance)
-                account_info_decoder = AccountNotificationDecoder(contract_address, self.solana_rpc_api)            
+        self.subscribe_to_wallets([contract_address], subscriber)
 
-                new_account.account_info_decoder = account_info_decoder
-                new_account.balance = sol_balance
+    #Balances are fetched in one batched RPC call and every accountSubscribe is queued together so the socket can send them in a few frames
+    def subscribe_to_wallets(self, contract_addresses: list[str], subscriber: AbstractSubscriber):
+        new_addresses = list(dict.fromkeys(address for address in contract_addresses if address not in self.accounts_map))
+        subscriptions = []
 
-                self.accounts_map[contract_address] = new_account
-                self.rpc_id_accounts_map[self.current_rpc_id] = new_account
-            
-                #Make Sub Request
-                account_sub_request = SolanaRpcApi.get_account_subscribe_request(contract_address, self.current_rpc_id)
+        if len(new_addresses) > 0:
+            sol_balances = self.solana_rpc_api.get_account_balances(new_addresses)
+
+            for contract_address, raw_balance in zip(new_addresses, sol_balances):
+                if raw_balance is not None:
+                    sol_balance = Amount.sol_scaled(raw_balance)
+                    new_account = AccountUpdateInfoAdvanced(self.current_rpc_id, contract_address, sol_balance)
+                    account_info_decoder = AccountNotificationDecoder(contract_address, self.solana_rpc_api)            
+
+                    new_account.account_info_decoder = account_info_decoder
+                    new_account.balance = sol_balance
+
+                    self.accounts_map[contract_address] = new_account
+                    self.rpc_id_accounts_map[self.current_rpc_id] = new_account
                 
-                self.current_rpc_id += 1
-
-                #Make socket sub request
-                json_request = json.dumps(account_sub_request)  
-        
-                self.sub_socket.send_request_no_wait(json_request)
-            else:
-                print("WalletTracker: Issue Retrieving SOL Balance. Did you use the right Solana RPC key?")
+                    #Make Sub Request
+                    subscriptions.append((self.current_rpc_id, contract_address, account_info_decoder))
+                    
+                    self.current_rpc_id += 1
+                else:
+                    print(f"WalletTracker: Issue Retrieving SOL Balance for {contract_address}. Did you use the right Solana RPC key?")
+
+            #Make socket sub requests; the socket's registry resubscribes them after a reconnect
+            self.sub_socket.subscribe_accounts(subscriptions)
     
         #Add subs
-        contract_subs = self.reverse_subscribers.get(contract_address) 
-        if not contract_subs:
-            contract_subs = {}
-            self.reverse_subscribers[contract_address] = contract_subs
-            self.subscribers[subscriber.get_id()] = subscriber
-        contract_subs[subscriber.get_id()] = subscriber
-
-    #TODO
+        for contract_address in contract_addresses:
+            contract_subs = self.reverse_subscribers.get(contract_address) 
+            if not contract_subs:
+                contract_subs = {}
+                self.reverse_subscribers[contract_address] = contract_subs
+                self.subscribers[subscriber.get_id()] = subscriber
+            contract_subs[subscriber.get_id()] = subscriber
+
     def unsubscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
          with self.updates_lock:
             if contract_address in self.accounts_map.keys():
-                id = self.accounts_map[contract_address]
                 account = self.accounts_map.pop(contract_address)
 
-                self.rpc_id_accounts_map.pop(id)
+                self.rpc_id_accounts_map.pop(account.id, None)
+                self.subscription_accounts_map.pop(account.rpc_subscription_id, None)
 
                 contract_subs = self.reverse_subscribers.get(contract_address) 
 
                 if contract_subs:
-                    for sub in contract_subs.values:
+                    for sub in list(contract_subs.values()):
                         self._remove_client_subscription(sub.get_id(), contract_address)
            
                 self.reverse_subscribers[contract_address] = contract_subs
-                #TODO
-                account_unsub_request = SolanaRpcApi.get_account_unsubscribe_request(contract_address, self.current_rpc_id)
-                json_request = json.dumps(account_unsub_request)       
-                self.sub_socket.send_request_no_wait(json_request)
+                self.sub_socket.unsubscribe_account(account.id)
 
     def get_account_balance(self, contract_address: str)->Amount:
         if contract_address not in self.rpc_id_accounts_map:
@@ -116,17 +121,20 @@ class WalletTracker(threading.Thread):
         return self.accounts_map[contract_address].balance
 
     def _handle_token_update(self, arg1):      
-        if isinstance(arg1, Subscription) and arg1.id in self.rpc_id_accounts_map: #Successful subscription, so add the decoder
+        if isinstance(arg1, Subscription) and arg1.id in self.rpc_id_accounts_map: #Successful (re)subscription; the socket registers the decoder
             with self.updates_lock:
-                self.rpc_id_accounts_map[arg1.id].rpc_subscription_id = arg1.subscription #need to hold onto this to unsubscribe
-                self.subscription_accounts_map[arg1.subscription] = self.rpc_id_accounts_map[arg1.id]
-                decoder = self.rpc_id_accounts_map[arg1.id].account_info_decoder
-                account_address = self.rpc_id_accounts_map[arg1.id].account_address
-                self.sub_socket.wallet_tracker_decoder.add_decoder(arg1.subscription, decoder)
-                print(f"WalletTracker: subsription successful! id: {arg1.id} CA: {account_address}")
+                account = self.rpc_id_accounts_map[arg1.id]
+                self.subscription_accounts_map.pop(account.rpc_subscription_id, None) #Id from a previous connection
+                account.rpc_subscription_id = arg1.subscription
+                self.subscription_accounts_map[arg1.subscription] = account
+                print(f"WalletTracker: subsription successful! id: {arg1.id} CA: {account.account_address}")
         elif isinstance(arg1, AccountNotification): #Has transaction signature
             #print("Wallet update " + arg1.tx_signature) #DELETE
-            account_info = self.subscription_accounts_map.get(arg1.subscription_id)
+            account_info = self.accounts_map.get(arg1.contract_address) #Server subscription ids aren't unique across pooled connections
+
+            if not account_info:
+                return
+
             account_info.balance.set_amount2(arg1.lamports, Value_Type.SCALED)
             account_info.account_data = arg1.account_data
             account_info.last_slot = arg1.slot
@@ -10,6 +10,10 @@ class BuyDipStrategy(AbstractTradingStrategy):
     def __init__(self, trades_manager: AbstractTradesManager, settings: dict[str, any]):
         AbstractTradingStrategy.__init__(self, trades_manager, [globals.topic_token_update_event], settings)
     
+    #Token updates only name the token that changed, so a newer one makes a waiting one redundant
+    def get_event_key(self, event: str):
+        return event
+
     def process_event(self, id: int, event: any):
         if event == self.initial_order.token_address:
             trigger_state = self.token_dip_signal_generator.update()
@@ -18,6 +18,10 @@ class McapTargetStrategy(AbstractTradingStrategy):
     def load_from_obj(self, order: McapOrder):
         self.initial_order = order
 
+    #Token updates only name the token that changed, so a newer one makes a waiting one redundant
+    def get_event_key(self, event: str):
+        return event
+
     def process_event(self, id: int, event: any):
         if event == self.initial_order.token_address and self.event_process_lock.acquire(blocking=False):
             token_value = self.trades_manager.get_market_manager().get_token_value(self.initial_order.token_address, Denomination.USD)
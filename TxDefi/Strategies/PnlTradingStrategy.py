@@ -104,6 +104,10 @@ class PnlTradingStrategy(AbstractTradingStrategy):
 
             return Amount.tokens_ui(total_amount_ui, self.limit_order_triggers[key].in_sell_amount.decimals)  
 
+    #Token updates only name the token that changed, so a newer one makes a waiting one redundant
+    def get_event_key(self, event: str):
+        return event
+
     def process_event(self, id: int, event: any):
         if event == self.initial_order.token_address and self.event_process_lock.acquire(blocking=False):
             new_price = self.trades_manager.get_market_manager().get_price(self.initial_order.token_address)
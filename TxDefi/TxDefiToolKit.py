@@ -11,6 +11,8 @@ from TxDefi.DataAccess.Blockchains.Solana.PumpTxBuilder import PumpTxBuilder
 from TxDefi.DataAccess.Blockchains.Solana.RaydiumTxBuilder import RaydiumTxBuilder
 from TxDefi.DataAccess.Blockchains.Solana.RiskAssessor import RiskAssessor
 from TxDefi.DataAccess.Blockchains.Solana.grpc.GRpcStreamer import YellowstoneGrpcStreamReader
+from TxDefi.DataAccess.Blockchains.Solana.grpc.GeyserAccountTracker import GeyserAccountTracker
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry
 from TxDefi.Engines.TokenInfoRetriever import TokenInfoRetriever
 from TxDefi.Engines.DiscordMonitor import DiscordMonitor
 from TxDefi.Engines.WebhookServer import WebhookServer
@@ -30,10 +32,28 @@ from TxDefi.DataAccess.Decoders.RaydiumDataDecoder import RaydiumDataDecoder
 from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
 from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
 from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import SolanaLogsDecoder
+from TxDefi.DataAccess.Decoders.NotificationFilter import NotificationFilter
+from TxDefi.DataAccess.Decoders.DecodeProcessPool import DecodeProcessPool
 from TxDefi.DataAccess.Decoders.PumpDataDecoder import *
 from TxDefi.Strategies.StrategyFactory import StrategyFactory
 from TxDefi.Utilities.DEX.RugCheckerApi import RugCheckerApi
 
+#Decoder for AMM program transactions; module level so decode processes can build their own copy
+def create_amm_transactions_decoder()->TransactionsDecoder:
+    ray_instruction_decoder = RaydiumDataDecoder(RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS, MessageDecoder.base58_encoding)
+    pump_decoder = PumpDataDecoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, globals.idl_path + "/pumpidl.json", MessageDecoder.base58_encoding)
+    pump_amm_decoder = PumpAmmDataDecoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, MessageDecoder.base58_encoding)
+
+    transactions_decoder = TransactionsDecoder()
+    #transactions_decoder.add_data_decoder(jup_program_address, jup_instruction_decoder)
+    transactions_decoder.add_data_decoder(RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS, ray_instruction_decoder)
+    transactions_decoder.add_data_decoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, pump_decoder)
+    transactions_decoder.add_data_decoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, pump_amm_decoder)
+    #Pump transactions need their logs too; decode them with the transaction so it happens in the decode process when there is one
+    transactions_decoder.add_logs_decoder(SupportedPrograms.PUMPFUN, SolanaLogsDecoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, None, pump_decoder, transactions_decoder))
+
+    return transactions_decoder
+
 #Tx Defi Toolkit Primary Setup
 class TxDefiToolKit(threading.Thread):
     default_none = "None"
@@ -62,12 +82,29 @@ class TxDefiToolKit(threading.Thread):
 
         rpc_wss_uri = os.getenv('WSS_RPC_URI')
         rpc_geyser_uri = os.getenv('GEYSER_WSS')
-        rpc_rate_limit = int(os.getenv('RPC_RATE_LIMIT', '10'))
+        geyser_x_token = os.getenv('GEYSER_X_TOKEN', None) #Auth token for Yellowstone gRPC endpoints that need one
+        use_geyser_account_updates = os.getenv('GEYSER_ACCOUNT_UPDATES', 'False').lower() == 'true' #Stream vault balances over the gRPC endpoint instead of accountSubscribe
+        rpc_rate_limit = float(os.getenv('RPC_RATE_LIMIT', '10')) #Fractional rates are allowed
+        rpc_pool_size = int(os.getenv('RPC_POOL_SIZE', '10')) #Keep-alive connections held per RPC endpoint
+        rpc_endpoints = os.getenv('RPC_ENDPOINTS', None) #Extra providers to route across e.g. [('https://my-rpc.com', 1.0)]
+        rpc_hedging = os.getenv('RPC_HEDGING', 'True').lower() == 'true'
+        blockhash_poll_interval = float(os.getenv('BLOCKHASH_POLL_INTERVAL', '2')) #Seconds between background blockhash refreshes
+        account_socket_shards = int(os.getenv('ACCOUNT_SOCKET_SHARDS', '2')) #Websocket connections each vault subscription pool spreads across
+        use_prefilter = os.getenv('NOTIFICATION_PREFILTER', 'True').lower() == 'true' #Drop program notifications that don't touch tokens we watch before decoding them
+        decode_processes = int(os.getenv('DECODE_PROCESSES', '0')) #Processes decoding the geyser transaction stream; 0 decodes in the socket thread
+
+        if geyser_x_token == self.default_none:
+            geyser_x_token = None
+
+        if rpc_endpoints and rpc_endpoints != self.default_none:
+            rpc_endpoints = ast.literal_eval(rpc_endpoints)
+        else:
+            rpc_endpoints = None
 
         #Default Keys      
         #FYI you can also set custom payers in custom strategies
         payer_keys_hash = os.getenv('PAYER_HASH') #TODO Add encryption loading
-        self.solana_rpc_api = SolanaRpcApi(rpc_http_uri, rpc_wss_uri, rpc_rate_limit, rpc_backup_uri)
+        self.solana_rpc_api = SolanaRpcApi(rpc_http_uri, rpc_wss_uri, rpc_rate_limit, rpc_backup_uri, rpc_pool_size, rpc_endpoints, rpc_hedging, blockhash_poll_interval)
         default_signer_keypair = Keypair.from_base58_string(payer_keys_hash)
 
         #Custom Strategies Path
@@ -96,8 +133,6 @@ class TxDefiToolKit(threading.Thread):
         # ray_amm_client = SolanaTradeExecutor.create_program("TxDefi/DataAccess/Decoders/idl/raydiumstandard_sfm.json", 
         #                                                 signer_wallet, solana_rpc_api.async_client)
         #Init anchor Program so we can take advantage of the decoder  
-        pump_client = SolanaTradeExecutor.create_program(globals.idl_path + "/pumpidl.json",
-                                                         default_signer_keypair, self.solana_rpc_api.async_client)
         #self.pump_amm_client = SolanaTradeExecutor.create_program(globals.idl_path + "/pump_ammedit.json", #FIXME DELETE
         #                                                 default_signer_keypair, solana_rpc_api.async_client)
         jup_client = SolanaTradeExecutor.create_program(globals.idl_path + "/jupsolanafm.json",
@@ -106,19 +141,16 @@ class TxDefiToolKit(threading.Thread):
         jup_program_address = str(jup_client.program_id)
         
         jup_instruction_decoder = JupDataDecoder(jup_program_address, jup_client.coder.instruction, MessageDecoder.base58_encoding)
-        ray_instruction_decoder = RaydiumDataDecoder(RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS, MessageDecoder.base58_encoding)
-        pump_decoder = PumpDataDecoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, pump_client.coder, MessageDecoder.base58_encoding)
-        pump_amm_decoder = PumpAmmDataDecoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, MessageDecoder.base58_encoding)
+        transactions_decoder = create_amm_transactions_decoder()
+        ray_instruction_decoder : RaydiumDataDecoder = transactions_decoder.get_instructions_decoder(RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS)
+        pump_decoder : PumpDataDecoder = transactions_decoder.get_instructions_decoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS)
+        pump_amm_decoder : PumpAmmDataDecoder = transactions_decoder.get_instructions_decoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS)
         self.pump_decoder = pump_amm_decoder
         
         self.sockets : dict[SupportedPrograms, SubscribeSocket] = {}
-        self.wallet_transaction_socket = AccountSubscribeSocket(rpc_wss_uri, globals.topic_wallet_update_event, False) #Custom ping doesn't work for accountSubscribe so it's disabled here
+        self.wallet_transaction_socket = AccountSubscribeSocket(rpc_wss_uri, globals.topic_wallet_update_event, False, self.solana_rpc_api) #Custom ping doesn't work for accountSubscribe so it's disabled here
+        self.decode_pool : DecodeProcessPool = None
 
-        transactions_decoder = TransactionsDecoder()
-        #transactions_decoder.add_data_decoder(jup_program_address, jup_instruction_decoder)
-        transactions_decoder.add_data_decoder(RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS, ray_instruction_decoder)
-        transactions_decoder.add_data_decoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, pump_decoder)
-        transactions_decoder.add_data_decoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, pump_amm_decoder)
         pump_logs_decoder = SolanaLogsDecoder(PumpTxBuilder.PUMP_PROGRAM_ADDRESS, self.solana_rpc_api, pump_decoder, transactions_decoder)
         
         #Auto Trade Settings
@@ -138,9 +170,21 @@ class TxDefiToolKit(threading.Thread):
 
         tokens_info_retriever = TokenInfoRetriever(self.solana_rpc_api, pump_decoder, transactions_decoder, use_backup_rpc)        
         
+        #Program notifications must mention a watched token/vault/wallet or a new mint, migration or liquidity event to be decoded
+        self.notification_filter = NotificationFilter()
+        self.notification_filter.add_markers(pump_decoder.get_prefilter_markers() + pump_amm_decoder.get_prefilter_markers() + ray_instruction_decoder.get_prefilter_markers())
+        self.notification_filter.watch([str(default_signer_keypair.pubkey())])
+        program_socket_filter = self.notification_filter if use_prefilter else None
+
         #Need the events coder for pump logs
         self.risk_assessor = RiskAssessor(self.solana_rpc_api)
-        self.token_accounts_monitor = TokenAccountsMonitor(self.solana_rpc_api, tokens_info_retriever, pump_logs_decoder, self.risk_assessor)
+        vault_account_tracker = None
+
+        if use_geyser and use_geyser_account_updates and rpc_geyser_uri and not rpc_geyser_uri.startswith("ws"):
+            vault_account_tracker = GeyserAccountTracker(rpc_geyser_uri, self.solana_rpc_api, geyser_x_token)
+
+        self.token_accounts_monitor = TokenAccountsMonitor(self.solana_rpc_api, tokens_info_retriever, pump_logs_decoder, self.risk_assessor, account_socket_shards,
+                                                           self.notification_filter, vault_account_tracker)
         self.market_manager = MarketManager(self.solana_rpc_api, self.token_accounts_monitor, self.risk_assessor)
 
         default_payer = SolPubKey(payer_keys_hash, SupportEncryption.NONE, False, Amount.sol_ui(auto_buy_in))
@@ -157,9 +201,13 @@ class TxDefiToolKit(threading.Thread):
             programs = [PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, PumpTxBuilder.PUMP_PROGRAM_ADDRESS, RaydiumTxBuilder.RAYDIUM_V4_PROGRAM_ADDRESS]
             if rpc_geyser_uri.startswith("ws"):
                 transaction_request = json.dumps(SolanaRpcApi.get_geyser_transaction_sub_request(programs))
-                amm_transaction_socket = SubscribeSocket(rpc_geyser_uri, transactions_decoder, globals.topic_incoming_transactions, [transaction_request], True)
+                if decode_processes > 0:
+                    self.decode_pool = DecodeProcessPool(create_amm_transactions_decoder, globals.topic_incoming_transactions, decode_processes)
+
+                amm_transaction_socket = SubscribeSocket(rpc_geyser_uri, transactions_decoder, globals.topic_incoming_transactions, [transaction_request], True,
+                                                         notification_filter=program_socket_filter, decode_pool=self.decode_pool)
             else:
-                amm_transaction_socket = YellowstoneGrpcStreamReader(rpc_geyser_uri, self.solana_rpc_api, transactions_decoder, programs)
+                amm_transaction_socket = YellowstoneGrpcStreamReader(rpc_geyser_uri, self.solana_rpc_api, transactions_decoder, programs, geyser_x_token)
                 
             self.sockets[SupportedPrograms.ALL] = amm_transaction_socket
         else:
@@ -172,9 +220,12 @@ class TxDefiToolKit(threading.Thread):
             pump_amm_logs_decoder = SolanaLogsDecoder(PumpAmmTxBuilder.PUMP_AMM_PROGRAM_ADDRESS, self.solana_rpc_api, pump_amm_decoder, transactions_decoder)
         
             #Need 3 sockets to differentiate log messages
-            amm_logs_socket = SubscribeSocket(rpc_wss_uri, raydium_logs_decoder, globals.topic_amm_program_event, [ray_program_sub_request], True)
-            pump_logs_socket = SubscribeSocket(rpc_wss_uri, pump_logs_decoder, globals.topic_amm_program_event, [pump_program_sub_request], True)
-            pump_amm_logs_socket = SubscribeSocket(rpc_wss_uri, pump_amm_logs_decoder, globals.topic_amm_program_event, [pump_amm_program_sub_request], True)
+            amm_logs_socket = SubscribeSocket(rpc_wss_uri, raydium_logs_decoder, globals.topic_amm_program_event, [ray_program_sub_request], True,
+                                              notification_filter=program_socket_filter)
+            pump_logs_socket = SubscribeSocket(rpc_wss_uri, pump_logs_decoder, globals.topic_amm_program_event, [pump_program_sub_request], True,
+                                               notification_filter=program_socket_filter)
+            pump_amm_logs_socket = SubscribeSocket(rpc_wss_uri, pump_amm_logs_decoder, globals.topic_amm_program_event, [pump_amm_program_sub_request], True,
+                                                   notification_filter=program_socket_filter)
 
             self.sockets[SupportedPrograms.RAYDIUMLEGACY] = amm_logs_socket
             self.sockets[SupportedPrograms.PUMPFUN_AMM] = pump_amm_logs_socket
@@ -200,6 +251,9 @@ class TxDefiToolKit(threading.Thread):
             if self.ifttt_webhook_monitor:
                 self.ifttt_webhook_monitor.start()   
 
+        if self.decode_pool:
+            self.decode_pool.start()
+
         for socket in self.sockets.values():
             time.sleep(.5)
             socket.start() 
@@ -224,11 +278,15 @@ class TxDefiToolKit(threading.Thread):
 
         for socket in self.sockets.values():
             socket.stop() 
+
+        if self.decode_pool:
+            self.decode_pool.stop()
   
         self.wallet_tracker.stop()
         self.market_manager.stop()        
         self.trades_manager.stop()          
         self.solana_rpc_api.stop()   
         self.risk_assessor.stop()
+        ExecutorRegistry.shutdown()
         self.cancel_event.set() 
         
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = 0 #Evict the oldest queued item to make room
+    BLOCK = 1 #put() waits for room; put_nowait() returns False
+    COALESCE = 2 #Keep only the newest pending item per key (e.g. account); drop oldest if still full
+
+#Thread-safe bounded FIFO with a configurable overflow policy and depth/drop counters
+class BoundedQueue:
+    def __init__(self, max_size: int, overflow_policy = OverflowPolicy.DROP_OLDEST):
+        self.max_size = max(1, max_size)
+        self.overflow_policy = overflow_policy
+        self.items : OrderedDict[any, any] = OrderedDict() #key=coalesce key or a unique sequence number
+        self.sequence = 0
+        self.condition = threading.Condition()
+
+        #Metrics
+        self.peak_depth = 0
+        self.total_put = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def _get_item_key(self, key):
+        if key is not None and self.overflow_policy == OverflowPolicy.COALESCE:
+            return ("key", key)
+
+        self.sequence += 1
+        return ("seq", self.sequence)
+
+    def _add(self, item, key):
+        item_key = self._get_item_key(key)
+
+        if item_key in self.items:
+            self.items[item_key] = item #Replace in place; the newer state supersedes the queued one
+            self.coalesced += 1
+        else:
+            if len(self.items) >= self.max_size:
+                self.items.popitem(last=False)
+                self.dropped += 1
+
+            self.items[item_key] = item
+
+        self.total_put += 1
+        self.peak_depth = max(self.peak_depth, len(self.items))
+        self.condition.notify()
+
+    #Returns False only when the policy is BLOCK and the queue is full
+    def put_nowait(self, item, key = None)->bool:
+        with self.condition:
+            if self.overflow_policy == OverflowPolicy.BLOCK and len(self.items) >= self.max_size:
+                return False
+
+            self._add(item, key)
+
+            return True
+
+    def put(self, item, key = None, timeout: float = None)->bool:
+        with self.condition:
+            if self.overflow_policy == OverflowPolicy.BLOCK:
+                if not self.condition.wait_for(lambda: len(self.items) < self.max_size, timeout):
+                    return False
+
+            self._add(item, key)
+
+            return True
+
+    #Returns None on timeout
+    def get(self, timeout: float = None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.items) > 0, timeout):
+                return None
+
+            item = self.items.popitem(last=False)[1]
+            self.condition.notify_all() #Wake blocked producers
+
+            return item
+
+    def qsize(self)->int:
+        return len(self.items)
+
+    def get_stats(self)->dict:
+        with self.condition:
+            return {"depth": len(self.items), "peak_depth": self.peak_depth, "max_size": self.max_size, "put": self.total_put,
+                    "dropped": self.dropped, "coalesced": self.coalesced}
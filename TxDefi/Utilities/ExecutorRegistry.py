@@ -0,0 +1,289 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from enum import Enum
+from typing import Callable
+from TxDefi.Utilities.BoundedQueue import BoundedQueue, OverflowPolicy
+
+class RejectionPolicy(Enum):
+    BLOCK = 0 #Submitter waits for room
+    CALLER_RUNS = 1 #Submitter runs the task itself; slows producers down without losing work
+    DROP_OLDEST = 2 #Cancel the oldest queued task to make room
+    DROP_NEWEST = 3 #Cancel the task being submitted
+
+#Fixed set of worker threads over a bounded task queue; submit never waits on the task itself
+class BoundedExecutor:
+    poll_interval = .5
+
+    def __init__(self, name: str, max_workers: int, max_queue_depth: int, rejection_policy = RejectionPolicy.BLOCK):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.rejection_policy = rejection_policy
+        self.task_queue = BoundedQueue(max_queue_depth, OverflowPolicy.BLOCK)
+        self.workers : list[threading.Thread] = []
+        self.workers_lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.start_time = time.monotonic()
+        self.metrics_lock = threading.Lock() #Worker counters are updated from every worker thread
+
+        #Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.caller_runs = 0
+        self.active = 0
+        self.busy_time = 0
+
+    #Workers are started on first use so unused pools cost nothing
+    def _start_workers(self):
+        with self.workers_lock:
+            if len(self.workers) == 0:
+                self.start_time = time.monotonic()
+
+                for index in range(self.max_workers):
+                    worker = threading.Thread(target=self._work, name=f"{self.name}-{index}", daemon=True)
+                    worker.start()
+                    self.workers.append(worker)
+
+    def submit(self, function: Callable, *args, **kwargs)->Future:
+        future = Future()
+
+        if self.cancel_event.is_set(): #Nothing would run it
+            future.cancel()
+            self.rejected += 1
+
+            return future
+
+        if len(self.workers) == 0:
+            self._start_workers()
+
+        task = (future, function, args, kwargs)
+        self.submitted += 1
+
+        if self.rejection_policy == RejectionPolicy.BLOCK:
+            self.task_queue.put(task)
+
+            if self.cancel_event.is_set(): #Shut down while we waited for room
+                future.cancel()
+        elif not self.task_queue.put_nowait(task):
+            if self.rejection_policy == RejectionPolicy.CALLER_RUNS:
+                self.caller_runs += 1
+                self._run_task(task)
+            elif self.rejection_policy == RejectionPolicy.DROP_OLDEST:
+                oldest_task = self.task_queue.get(0)
+
+                if oldest_task:
+                    oldest_task[0].cancel()
+                    self.rejected += 1
+
+                if not self.task_queue.put_nowait(task): #Lost the race for the freed slot
+                    future.cancel()
+                    self.rejected += 1
+            else:
+                future.cancel()
+                self.rejected += 1
+
+        return future
+
+    def _run_task(self, task: tuple):
+        future, function, args, kwargs = task
+
+        if not future.set_running_or_notify_cancel():
+            return
+
+        start_time = time.monotonic()
+        is_failed = False
+
+        with self.metrics_lock:
+            self.active += 1
+
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as e:
+            is_failed = True
+            future.set_exception(e)
+            print(f"{self.name}: Task {getattr(function, '__name__', function)} failed {e}")
+
+        with self.metrics_lock:
+            self.active -= 1
+            self.busy_time += time.monotonic() - start_time
+
+            if is_failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def _work(self):
+        while not self.cancel_event.is_set():
+            task = self.task_queue.get(self.poll_interval)
+
+            if task:
+                self._run_task(task)
+
+    def get_stats(self)->dict:
+        uptime = time.monotonic() - self.start_time
+        utilization = self.busy_time/(uptime*self.max_workers) if len(self.workers) > 0 and uptime > 0 else 0
+
+        return {"name": self.name, "workers": self.max_workers, "active": self.active, "queued": self.task_queue.qsize(), "peak_depth": self.task_queue.peak_depth,
+                "submitted": self.submitted, "completed": self.completed, "failed": self.failed, "rejected": self.rejected, "caller_runs": self.caller_runs,
+                "utilization": utilization}
+
+    #Queued tasks are cancelled so nobody waits on a future that will never run
+    def shutdown(self):
+        self.cancel_event.set()
+
+        while True:
+            task = self.task_queue.get(0)
+
+            if not task:
+                break
+
+            task[0].cancel()
+
+#Shared named pools so hot paths hand work off instead of building a ThreadPoolExecutor per message
+class ExecutorRegistry:
+    io_pool = "io" #RPC calls, confirmations and retries; retries wait on submit_after, never inside a worker
+    decode_pool = "decode" #Market data; one worker keeps events for a token in order
+    strategy_pool = "strategy" #Each strategy runs through its own SerialLane so one strategy never has more than one task here
+    ui_pool = "ui" #UI commands; one worker keeps them in order
+
+    #name: (max workers, max queue depth, rejection policy)
+    default_settings = {io_pool: (16, 1000, RejectionPolicy.CALLER_RUNS),
+                        decode_pool: (1, 10000, RejectionPolicy.BLOCK),
+                        strategy_pool: (8, 1000, RejectionPolicy.BLOCK), #Queue depth must stay above the number of lanes (see SerialLane)
+                        ui_pool: (1, 1000, RejectionPolicy.BLOCK)}
+    settings = dict(default_settings)
+    executors : dict[str, BoundedExecutor] = {}
+    timers : set[threading.Timer] = set() #Delayed submits that haven't fired yet
+    lock = threading.Lock()
+    is_shut_down = False #Work submitted after shutdown is dropped instead of starting new pools
+
+    #Takes effect for pools that haven't been used yet
+    @staticmethod
+    def configure(name: str, max_workers: int, max_queue_depth: int, rejection_policy: RejectionPolicy):
+        with ExecutorRegistry.lock:
+            ExecutorRegistry.settings[name] = (max_workers, max_queue_depth, rejection_policy)
+
+    #None after shutdown if the pool was never used
+    @staticmethod
+    def get_executor(name: str)->BoundedExecutor:
+        executor = ExecutorRegistry.executors.get(name)
+
+        if executor is None:
+            with ExecutorRegistry.lock:
+                executor = ExecutorRegistry.executors.get(name)
+
+                if executor is None:
+                    if ExecutorRegistry.is_shut_down: #Don't start new workers for stray submits
+                        return
+
+                    if name not in ExecutorRegistry.settings:
+                        raise ValueError(f"ExecutorRegistry: Unknown pool {name}")
+
+                    executor = BoundedExecutor(name, *ExecutorRegistry.settings[name])
+                    ExecutorRegistry.executors[name] = executor
+
+        return executor
+
+    #Work submitted after shutdown comes back as a cancelled future
+    @staticmethod
+    def submit(name: str, function: Callable, *args, **kwargs)->Future:
+        executor = ExecutorRegistry.get_executor(name)
+
+        if executor is None:
+            future = Future()
+            future.cancel()
+
+            return future
+
+        return executor.submit(function, *args, **kwargs)
+
+    #Submits to the pool once the delay has passed; nothing holds a worker in the meantime. Returns None after shutdown
+    @staticmethod
+    def submit_after(delay: float, name: str, function: Callable, *args, **kwargs)->threading.Timer:
+        def _submit():
+            with ExecutorRegistry.lock:
+                ExecutorRegistry.timers.discard(timer)
+
+            ExecutorRegistry.submit(name, function, *args, **kwargs)
+
+        timer = threading.Timer(delay, _submit)
+        timer.daemon = True
+
+        with ExecutorRegistry.lock:
+            if ExecutorRegistry.is_shut_down:
+                return
+
+            ExecutorRegistry.timers.add(timer)
+
+        timer.start()
+
+        return timer
+
+    @staticmethod
+    def get_stats()->list[dict]:
+        return [executor.get_stats() for executor in list(ExecutorRegistry.executors.values())]
+
+    @staticmethod
+    def shutdown():
+        with ExecutorRegistry.lock:
+            ExecutorRegistry.is_shut_down = True
+
+            for timer in ExecutorRegistry.timers:
+                timer.cancel()
+
+            ExecutorRegistry.timers.clear()
+
+            for executor in ExecutorRegistry.executors.values():
+                executor.shutdown()
+
+#Runs one task at a time on a shared pool in submit order; a task submitted under a key that is still waiting replaces the waiting one
+#A None key never coalesces
+#Each run hands the worker back and requeues the lane so a busy lane can't hold a worker while other lanes wait
+class SerialLane:
+    def __init__(self, pool_name: str):
+        self.pool_name = pool_name
+        self.pending : OrderedDict[any, tuple[Callable, tuple]] = OrderedDict() #key=coalescing key, value=(function, args)
+        self.lock = threading.Lock()
+        self.is_scheduled = False #A run is queued or in flight
+
+        #Metrics
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, key, function: Callable, *args):
+        if key is None:
+            key = object()
+
+        with self.lock:
+            self.submitted += 1
+
+            if key in self.pending:
+                self.coalesced += 1
+
+            self.pending[key] = (function, args)
+
+            if self.is_scheduled:
+                return
+
+            self.is_scheduled = True
+
+        ExecutorRegistry.submit(self.pool_name, self._run_next)
+
+    def _run_next(self):
+        with self.lock:
+            _, (function, args) = self.pending.popitem(last=False)
+
+        try:
+            function(*args)
+        finally:
+            with self.lock:
+                is_scheduled = self.is_scheduled = len(self.pending) > 0
+
+            if is_scheduled:
+                ExecutorRegistry.submit(self.pool_name, self._run_next)
+
+    def get_stats(self)->dict:
+        return {"pool": self.pool_name, "pending": len(self.pending), "submitted": self.submitted, "coalesced": self.coalesced}
@@ -0,0 +1,41 @@
+import json
+
+#Pluggable JSON backend; uses the fastest installed library (orjson, then msgspec) and falls back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson:
+    backend = "orjson"
+elif msgspec:
+    backend = "msgspec"
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+else:
+    backend = "json"
+
+def loads(data: str | bytes):
+    if orjson:
+        return orjson.loads(data)
+    elif msgspec:
+        return _msgspec_decoder.decode(data)
+    else:
+        return json.loads(data)
+
+def dumps_bytes(obj, sort_keys = False)->bytes:
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    elif msgspec and not sort_keys:
+        return _msgspec_encoder.encode(obj)
+    else:
+        return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":")).encode()
+
+#Compact output (no spaces) regardless of backend
+def dumps(obj, sort_keys = False)->str:
+    return dumps_bytes(obj, sort_keys).decode()
@@ -1,36 +1,120 @@
+import asyncio
 import threading
 import time
 
+#Token bucket limiter; tokens refill continuously at the current rate so calls are spread out instead of bunching up each second
+#Costs are reserved up front (the bucket may go into debt) so waiters are served in arrival order without polling
 class RateLimiter(threading.Thread):
-    def __init__(self, rate_limit: float, log_info: bool = False):  
+    backoff_factor = .5 #Rate multiplier applied on every throttled response (429/-32005)
+    min_rate_factor = .1 #Never back off below this fraction of the configured rate
+    recovery_delay = 5 #Seconds without throttling before the rate starts to recover
+    recovery_rate = .1 #Fraction of the configured rate recovered per second
+
+    def __init__(self, rate_limit: float, log_info: bool = False, method_weights: dict[str, float] = None):
         threading.Thread.__init__(self, daemon=True)
         self.rate_limit = rate_limit
-        self.cancel_event = threading.Event() 
-        self.rate_semaphore = threading.Semaphore(rate_limit)       
-        self.sems_acquired = 0
+        self.current_rate = rate_limit
+        self.capacity = max(1, rate_limit) #Burst size
+        self.tokens = self.capacity
+        self.last_refill_time = time.monotonic()
+        self.last_throttle_time = 0
+        self.method_weights = method_weights if method_weights else {}
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
         self.log_info = log_info
 
-    def acquire_sem(self)->bool:
-        did_acquire = self.rate_semaphore.acquire()
-        if did_acquire:
+        #Counters
+        self.sems_acquired = 0 #Acquisitions since the last log interval
+        self.total_acquired = 0
+        self.tokens_used = 0
+        self.total_wait_time = 0
+        self.throttle_count = 0
+
+    def get_cost(self, method_name: str)->float:
+        return self.method_weights.get(method_name, 1)
+
+    def _refill(self, now: float):
+        elapsed = now - self.last_refill_time
+
+        if self.current_rate < self.rate_limit and now - self.last_throttle_time >= self.recovery_delay:
+            self.current_rate = min(self.rate_limit, self.current_rate + self.rate_limit*self.recovery_rate*elapsed)
+
+        self.tokens = min(self.capacity, self.tokens + elapsed*self.current_rate)
+        self.last_refill_time = now
+
+    #Reserve cost tokens and return how long the caller must wait for them
+    def _reserve(self, cost: float)->float:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= cost
+            self.sems_acquired += 1
+            self.total_acquired += 1
+            self.tokens_used += cost
+
+            wait_time = -self.tokens/self.current_rate if self.tokens < 0 else 0
+            self.total_wait_time += wait_time
+
+            return wait_time
+
+    def acquire_sem(self, cost: float = 1)->bool:
+        wait_time = self._reserve(cost)
+
+        if wait_time > 0:
+            return not self.cancel_event.wait(wait_time)
+
+        return True
+
+    #Takes cost tokens only if they are available right now; for optional calls (e.g. hedges) that shouldn't wait or put the bucket in debt
+    def try_acquire(self, cost: float = 1)->bool:
+        with self.lock:
+            self._refill(time.monotonic())
+
+            if self.tokens < cost:
+                return False
+
+            self.tokens -= cost
             self.sems_acquired += 1
+            self.total_acquired += 1
+            self.tokens_used += cost
+
+            return True
+
+    async def acquire_sem_async(self, cost: float = 1)->bool:
+        wait_time = self._reserve(cost)
 
-        return did_acquire
-    
-    def _reset_num_execs(self):           
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+        return not self.cancel_event.is_set()
+
+    #Call when the endpoint pushes back (HTTP 429 or JSON-RPC -32005); halves the rate and drains the bucket
+    def report_throttled(self):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.current_rate = max(self.rate_limit*self.min_rate_factor, self.current_rate*self.backoff_factor)
+            self.tokens = min(self.tokens, 0)
+            self.last_throttle_time = now
+            self.throttle_count += 1
+
+    def get_stats(self)->dict:
+        with self.lock:
+            return {"rate_limit": self.rate_limit, "current_rate": self.current_rate, "acquired": self.total_acquired,
+                    "tokens_used": self.tokens_used, "wait_time": self.total_wait_time, "throttled": self.throttle_count}
+
+    def _reset_num_execs(self):
         if self.sems_acquired > 0:
-            self.rate_semaphore.release(self.rate_limit)
-               
             if self.log_info:
-                print(f"Calls per second: {self.sems_acquired} Rate Limit: {self.rate_limit}")
+                print(f"Calls per second: {self.sems_acquired} Rate Limit: {self.rate_limit} Current Rate: {round(self.current_rate, 2)} " +
+                      f"Total Wait: {round(self.total_wait_time, 2)}s Throttled: {self.throttle_count}")
 
             self.sems_acquired = 0
 
     def run(self):
         while not self.cancel_event.is_set():
             time.sleep(1)
-        
+
             self._reset_num_execs()
 
     def stop(self):
-        self.cancel_event.set()
\ No newline at end of file
+        self.cancel_event.set()
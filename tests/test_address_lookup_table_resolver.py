@@ -0,0 +1,144 @@
+import base64
+import struct
+import threading
+from types import SimpleNamespace
+import pytest
+from solders.pubkey import Pubkey
+from TxDefi.DataAccess.Blockchains.Solana.grpc.AddressLookupTableResolver import AddressLookupTable, AddressLookupTableResolver
+
+table_key = bytes([7])*32
+other_table_key = bytes([8])*32
+
+def table_bytes(addresses: list[bytes], deactivation_slot = AddressLookupTable.active_slot, type_index = 1)->bytes:
+    header = struct.pack("<IQQB", type_index, deactivation_slot, 100, 0)
+
+    return header + bytes(AddressLookupTable.header_size - len(header)) + b"".join(addresses)
+
+def get_addresses(count: int, start = 0)->list[bytes]:
+    return [bytes([index])*32 for index in range(start, start + count)]
+
+def get_lookup(account_key: bytes, writable_indexes: list[int], readonly_indexes: list[int]):
+    return SimpleNamespace(account_key=account_key, writable_indexes=writable_indexes, readonly_indexes=readonly_indexes)
+
+#Stands in for SolanaRpcApi; serves getMultipleAccounts from a dict of raw account bytes
+class TableRpc:
+    def __init__(self, accounts: dict[str, bytes], slot = 1000):
+        self.accounts = accounts
+        self.slot = slot
+        self.requests : list[list[str]] = []
+
+    def run_rpc_method(self, request_name: str, params: list, cache_ttl = None):
+        addresses = params[0]
+        self.requests.append(addresses)
+        values = [{"data": [base64.b64encode(self.accounts[address]).decode(), "base64"]} if address in self.accounts else None for address in addresses]
+
+        return SimpleNamespace(result={"context": {"slot": self.slot}, "value": values})
+
+def get_address(raw_key: bytes)->str:
+    return str(Pubkey.from_bytes(raw_key))
+
+def test_from_bytes():
+    table = AddressLookupTable.from_bytes(table_key, table_bytes(get_addresses(3)), 1000)
+
+    assert table.addresses == get_addresses(3)
+    assert table.fetched_slot == 1000
+    assert table.is_usable(2**40)
+
+@pytest.mark.parametrize("data", [None, b"", table_bytes([])[:-1], table_bytes(get_addresses(2), type_index=0)])
+def test_from_bytes_invalid(data: bytes):
+    assert AddressLookupTable.from_bytes(table_key, data, 1000) is None
+
+def test_from_bytes_ignores_partial_address():
+    table = AddressLookupTable.from_bytes(table_key, table_bytes(get_addresses(2)) + bytes(31), 1000)
+
+    assert len(table.addresses) == 2
+
+def test_deactivated_table():
+    table = AddressLookupTable.from_bytes(table_key, table_bytes(get_addresses(2), deactivation_slot=500), 1000)
+
+    assert table.is_usable(500 + AddressLookupTable.deactivation_cooldown)
+    assert not table.is_usable(501 + AddressLookupTable.deactivation_cooldown)
+
+def test_resolve_orders_writable_before_readonly():
+    rpc = TableRpc({get_address(table_key): table_bytes(get_addresses(4)), get_address(other_table_key): table_bytes(get_addresses(4, 10))})
+    resolver = AddressLookupTableResolver(rpc)
+    lookups = [get_lookup(table_key, [1], [3]), get_lookup(other_table_key, [0, 2], [1])]
+
+    assert resolver.resolve(lookups, 1000) is None
+    assert resolver._fetch(list(resolver.pending.keys()))
+
+    writable_keys, readonly_keys = resolver.resolve(lookups, 1000)
+
+    assert writable_keys == [bytes([1])*32, bytes([10])*32, bytes([12])*32]
+    assert readonly_keys == [bytes([3])*32, bytes([11])*32]
+    assert len(resolver.pending) == 0
+    assert (resolver.hits, resolver.misses) == (1, 1)
+
+def test_extended_table_is_refetched():
+    rpc = TableRpc({get_address(table_key): table_bytes(get_addresses(2))})
+    resolver = AddressLookupTableResolver(rpc)
+    resolver.request(table_key)
+    resolver._fetch([table_key])
+    lookups = [get_lookup(table_key, [], [3])]
+
+    assert resolver.resolve(lookups, 1000) is None #Not newer than the snapshot; the index is just bad
+    assert len(resolver.pending) == 0
+
+    rpc.accounts[get_address(table_key)] = table_bytes(get_addresses(4))
+    rpc.slot = 1001
+
+    assert resolver.resolve(lookups, 1001) is None
+    assert resolver.refetches == 1
+
+    resolver._fetch(list(resolver.pending.keys()))
+
+    assert resolver.resolve(lookups, 1001) == ([], [bytes([3])*32])
+
+def test_missing_table_backs_off():
+    resolver = AddressLookupTableResolver(TableRpc({}))
+    resolver.request(table_key)
+    resolver._fetch([table_key])
+
+    assert table_key in resolver.failed
+    assert resolver.resolve([get_lookup(table_key, [0], [])], 1000) is None
+    assert len(resolver.pending) == 0 #Not requested again inside the retry interval
+
+def test_lru_eviction():
+    rpc = TableRpc({get_address(table_key): table_bytes(get_addresses(1)), get_address(other_table_key): table_bytes(get_addresses(1))})
+    resolver = AddressLookupTableResolver(rpc, max_tables=1)
+    resolver._fetch([table_key, other_table_key])
+
+    assert list(resolver.tables.keys()) == [other_table_key]
+    assert resolver.evictions == 1
+
+def test_deactivated_table_is_refetched():
+    rpc = TableRpc({get_address(table_key): table_bytes(get_addresses(2), deactivation_slot=100)})
+    resolver = AddressLookupTableResolver(rpc)
+    resolver._fetch([table_key])
+    lookups = [get_lookup(table_key, [1], [])]
+
+    assert resolver.resolve(lookups, 1000) == ([], []) #Deactivated in a snapshot at least as new as the transaction
+    assert resolver.unusable == 1 and len(resolver.pending) == 0
+
+    rpc.accounts[get_address(table_key)] = table_bytes(get_addresses(2))
+    rpc.slot = 1001
+
+    assert resolver.resolve(lookups, 1001) is None
+    assert resolver.refetches == 1 and table_key in resolver.pending
+
+    resolver._fetch(list(resolver.pending.keys()))
+
+    assert resolver.resolve(lookups, 1001) == ([bytes([1])*32], [])
+
+def test_on_fetched_is_called():
+    fetched_event = threading.Event()
+    resolver = AddressLookupTableResolver(TableRpc({get_address(table_key): table_bytes(get_addresses(1))}), on_fetched=fetched_event.set)
+    resolver.start()
+
+    try:
+        resolver.request(table_key)
+
+        assert fetched_event.wait(2)
+        assert resolver.resolve([get_lookup(table_key, [0], [])], 1000) == ([bytes([0])*32], [])
+    finally:
+        resolver.stop()
@@ -0,0 +1,127 @@
+import base64
+import struct
+import pytest
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout, DataType
+from TxDefi.DataAccess.Decoders.PumpAmmDataDecoder import PumpAmmDataDecoder
+from TxDefi.DataAccess.Decoders.RaydiumDataDecoder import RaydiumDataDecoder
+from TxDefi.Data.TransactionInfo import AmmSwapData, LiquidityPoolData, WithdrawLiquidity
+from TxDefi.Data.MarketEnums import TradeEventType, SupportedPrograms
+
+pump_amm_program_address = "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA"
+raydium_program_address = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+
+def discriminator_bytes(discriminator: int)->bytes:
+    return discriminator.to_bytes(8, byteorder='big')
+
+@pytest.fixture
+def pump_amm_decoder()->PumpAmmDataDecoder:
+    return PumpAmmDataDecoder(pump_amm_program_address, PumpAmmDataDecoder.base58_encoding)
+
+@pytest.fixture
+def raydium_decoder()->RaydiumDataDecoder:
+    return RaydiumDataDecoder(raydium_program_address, RaydiumDataDecoder.base58_encoding)
+
+def test_binary_layout():
+    layout = BinaryLayout("Sample", [("flag", DataType.BOOL), ("count", DataType.UINT16), ("amount", DataType.UINT64), ("key", DataType.PUBKEY)])
+    data = b"\x00" + struct.pack("<?HQ", True, 7, 2**64 - 1) + bytes(range(32))
+
+    assert layout.size == 43
+    assert layout.unpack(data, 1) == (True, 7, 2**64 - 1, bytes(range(32)))
+
+    record = layout.decode(data, 1)
+
+    assert (record.flag, record.count, record.amount, record.key) == (True, 7, 2**64 - 1, bytes(range(32)))
+    assert layout.unpack(data, 2) is None
+    assert layout.decode(data[:-1], 1) is None
+
+def test_pump_amm_buy_and_sell(pump_amm_decoder: PumpAmmDataDecoder):
+    buy_data = pump_amm_decoder.decode_bytes_data(discriminator_bytes(PumpAmmDataDecoder.buy_discriminator) + struct.pack("<QQ", 5_000_000, 110_000_000))
+    sell_data = pump_amm_decoder.decode_bytes_data(discriminator_bytes(PumpAmmDataDecoder.sell_discriminator) + struct.pack("<QQ", 5_000_000, 90_000_000))
+
+    assert isinstance(buy_data, AmmSwapData) and buy_data.get_type() == TradeEventType.BUY
+    assert (buy_data.in_amount, buy_data.out_amount) == (110_000_000, 5_000_000)
+    assert isinstance(sell_data, AmmSwapData) and sell_data.get_type() == TradeEventType.SELL
+    assert (sell_data.in_amount, sell_data.out_amount) == (5_000_000, 90_000_000)
+    assert buy_data.program_type == SupportedPrograms.PUMPFUN_AMM
+
+def test_pump_amm_add_liquidity(pump_amm_decoder: PumpAmmDataDecoder):
+    data = discriminator_bytes(PumpAmmDataDecoder.add_liquidity_discriminator) + struct.pack("<HQQ", 0, 206_900_000_000_000, 79_000_000_000)
+    ret_data = pump_amm_decoder.decode_bytes_data(data)
+
+    assert isinstance(ret_data, LiquidityPoolData) and ret_data.get_type() == TradeEventType.ADD_LIQUIDITY
+    assert (ret_data.pc_amount, ret_data.coin_amount) == (79_000_000_000, 206_900_000_000_000)
+
+def test_pump_amm_buy_event_log(pump_amm_decoder: PumpAmmDataDecoder):
+    amounts = [1_736_479_444, 5_000_000, 110_000_000, 0, 0, 206_900_000_000_000, 85_000_000_000, 100_000_000, 20, 200_000, 5, 50_000, 100_200_000, 100_250_000]
+    data = (discriminator_bytes(PumpAmmDataDecoder.cpi_log_info) + discriminator_bytes(PumpAmmDataDecoder.log_buy_discriminator) +
+            struct.pack("<14Q", *amounts) + bytes(6*32))
+    ret_data = pump_amm_decoder.decode_log("Program data: " + base64.b64encode(data).decode())
+
+    assert isinstance(ret_data, AmmSwapData) and ret_data.get_type() == TradeEventType.BUY
+    assert (ret_data.in_amount, ret_data.out_amount) == (100_000_000, 5_000_000)
+
+def test_pump_amm_pool_account(pump_amm_decoder: PumpAmmDataDecoder):
+    keys = [bytes([index])*32 for index in range(1, 7)]
+    data = discriminator_bytes(PumpAmmDataDecoder.pool_account_discriminator) + struct.pack("<BH", 255, 0) + b"".join(keys) + struct.pack("<Q", 4_000_000)
+    ret_data = pump_amm_decoder.decode_bytes_data(data)
+
+    assert isinstance(ret_data, LiquidityPoolData) and ret_data.get_type() == TradeEventType.ACCOUNT_INFO
+    assert ret_data.trader_address == BinaryLayout.to_address(keys[0])
+    assert ret_data.token_address == BinaryLayout.to_address(keys[1])
+    assert ret_data.quote_mint_address == BinaryLayout.to_address(keys[2])
+    assert ret_data.pool_base_address == BinaryLayout.to_address(keys[4])
+    assert ret_data.pool_quote_address == BinaryLayout.to_address(keys[5])
+    assert ret_data.lp_supply == 4_000_000
+
+@pytest.mark.parametrize("discriminator", [PumpAmmDataDecoder.buy_discriminator, PumpAmmDataDecoder.sell_discriminator, PumpAmmDataDecoder.add_liquidity_discriminator,
+                                           PumpAmmDataDecoder.pool_account_discriminator])
+def test_pump_amm_short_payload(pump_amm_decoder: PumpAmmDataDecoder, discriminator: int, capsys):
+    assert pump_amm_decoder.decode_bytes_data(discriminator_bytes(discriminator) + bytes(8)) is None
+    assert "Bad data" not in capsys.readouterr().out
+
+def test_pump_amm_unknown_discriminator(pump_amm_decoder: PumpAmmDataDecoder):
+    assert pump_amm_decoder.decode_bytes_data(bytes(8) + struct.pack("<QQ", 5_000_000, 110_000_000)) is None
+
+def test_raydium_swap(raydium_decoder: RaydiumDataDecoder):
+    data = struct.pack("<BQQ", RaydiumDataDecoder.swap_id, 8_709_997_127, 96_798_496)
+    ret_data = raydium_decoder.decode_bytes_data(data, False)
+
+    assert isinstance(ret_data, AmmSwapData) and ret_data.get_type() == TradeEventType.EXCHANGE
+    assert (ret_data.in_amount, ret_data.out_amount) == (8_709_997_127, 96_798_496)
+    assert ret_data.program_type == SupportedPrograms.RAYDIUMLEGACY
+
+def test_raydium_init2(raydium_decoder: RaydiumDataDecoder):
+    instruction_data = raydium_decoder.decode_bytes_data(struct.pack("<BBQQQ", RaydiumDataDecoder.initialize2_id, 254, 1_736_479_444, 1_000_000_000, 50_000_000_000_000), False)
+    log = "Program log: ray_log: " + base64.b64encode(struct.pack("<BQBBQQQQ", RaydiumDataDecoder.log_type_initialize2_id, 1_736_479_444, 9, 6, 1, 1,
+                                                                             1_000_000_000, 50_000_000_000_000)).decode()
+    log_data = raydium_decoder.decode_log(log)
+
+    for ret_data in [instruction_data, log_data]:
+        assert isinstance(ret_data, LiquidityPoolData) and ret_data.get_type() == TradeEventType.NEW_MINT
+        assert (ret_data.pc_amount, ret_data.coin_amount) == (1_000_000_000, 50_000_000_000_000)
+
+def test_raydium_liquidity(raydium_decoder: RaydiumDataDecoder):
+    add_data = raydium_decoder.decode_bytes_data(struct.pack("<BQQQ", RaydiumDataDecoder.add_lq_id, 300, 200, 0), False)
+    withdraw_data = raydium_decoder.decode_bytes_data(struct.pack("<BQ", RaydiumDataDecoder.withdraw_lq_id, 12_345), False)
+
+    assert isinstance(add_data, LiquidityPoolData) and (add_data.pc_amount, add_data.coin_amount) == (200, 300)
+    assert isinstance(withdraw_data, WithdrawLiquidity) and withdraw_data.lp_amount_out == 12_345
+
+def test_raydium_swap_accounts(raydium_decoder: RaydiumDataDecoder):
+    accounts = [f"account{index}" for index in range(18)]
+    data = base64.b64encode(struct.pack("<BQQ", RaydiumDataDecoder.swap_id, 1_000, 900)).decode()
+    ret_data = raydium_decoder.decode({"data": [data, RaydiumDataDecoder.base64_encoding], "accounts": accounts})
+
+    assert ret_data.market_address == "account1"
+    assert (ret_data.pool_base_address, ret_data.pool_quote_address) == ("account5", "account6")
+    assert (ret_data.user_in_account, ret_data.user_out_account) == ("account15", "account16")
+    assert raydium_decoder.decode({"data": [data, RaydiumDataDecoder.base64_encoding], "accounts": accounts[:16]}) is None
+
+@pytest.mark.parametrize("is_log_data, data", [(False, struct.pack("<BQ", RaydiumDataDecoder.swap_id, 1_000)), (False, bytes([RaydiumDataDecoder.initialize2_id])),
+                                               (True, struct.pack("<BQ", RaydiumDataDecoder.log_type_initialize2_id, 1)), (False, bytes([RaydiumDataDecoder.withdraw_lq_id]))])
+def test_raydium_short_payload(raydium_decoder: RaydiumDataDecoder, is_log_data: bool, data: bytes):
+    assert raydium_decoder.decode_bytes_data(data, is_log_data) is None
+
+def test_raydium_unknown_discriminator(raydium_decoder: RaydiumDataDecoder):
+    assert raydium_decoder.decode_bytes_data(struct.pack("<BQQ", 200, 1_000, 900), False) is None
+    assert raydium_decoder.decode_bytes_data(struct.pack("<BQQ", 200, 1_000, 900), True) is None
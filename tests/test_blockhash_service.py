@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from TxDefi.DataAccess.Blockchains.Solana.BlockhashService import BlockhashService
+
+blockhash = "4sGjMW1sUnHzSxGspuhpqLDx6wiyjNtZAMdL4VZHirAn"
+
+#Stands in for SolanaRpcApi; answers getLatestBlockhash with an increasing slot unless told to fail
+class BlockhashRpc:
+    def __init__(self):
+        self.slot = 1000
+        self.fail = False
+        self.requests = 0
+
+    def run_rpc_method(self, request_name: str, params: list, cache_ttl = None):
+        self.requests += 1
+
+        if self.fail:
+            return None
+
+        self.slot += 1
+
+        return SimpleNamespace(result={"context": {"slot": self.slot}, "value": {"blockhash": blockhash, "lastValidBlockHeight": 5000}})
+
+def age_latest(service: BlockhashService, seconds: float):
+    service.latest.received_time -= seconds
+
+def test_cached_hash_is_reused():
+    rpc = BlockhashRpc()
+    service = BlockhashService(rpc)
+
+    assert str(service.get_blockhash_for_signing()) == blockhash
+    assert str(service.get_blockhash_for_signing()) == blockhash
+    assert rpc.requests == 1
+
+def test_stale_hash_is_refreshed():
+    rpc = BlockhashRpc()
+    service = BlockhashService(rpc)
+    service.refresh()
+    age_latest(service, 40)
+
+    assert service.latest.get_blocks_left() < BlockhashService.min_blocks_left
+    assert str(service.get_blockhash_for_signing()) == blockhash
+    assert rpc.requests == 2 and service.stale_refreshes == 1
+    assert service.latest.get_age() < 1
+
+def test_stale_hash_is_not_returned_when_refresh_fails():
+    rpc = BlockhashRpc()
+    service = BlockhashService(rpc)
+    service.refresh()
+    age_latest(service, 40)
+    rpc.fail = True
+
+    assert service.get_blockhash_for_signing() is None
+    assert service.get_blockhash() is None
+    assert service.expired_requests == 2 and service.failed_polls == 2
+    assert len(service.signing_ages) == 0
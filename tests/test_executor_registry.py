@@ -0,0 +1,64 @@
+import threading
+import pytest
+from TxDefi.Utilities.ExecutorRegistry import ExecutorRegistry, SerialLane
+
+#The registry is process wide; give each test a fresh one
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(ExecutorRegistry, "executors", {})
+    monkeypatch.setattr(ExecutorRegistry, "timers", set())
+    monkeypatch.setattr(ExecutorRegistry, "is_shut_down", False)
+    yield
+    ExecutorRegistry.shutdown()
+
+def test_submit_runs_task():
+    assert ExecutorRegistry.submit(ExecutorRegistry.io_pool, lambda value: value*2, 21).result(1) == 42
+
+def test_submit_after_shutdown_is_dropped():
+    ExecutorRegistry.submit(ExecutorRegistry.io_pool, lambda: None).result(1)
+    ExecutorRegistry.shutdown()
+
+    assert ExecutorRegistry.submit(ExecutorRegistry.io_pool, lambda: None).cancelled()
+    assert ExecutorRegistry.submit(ExecutorRegistry.ui_pool, lambda: None).cancelled()
+    assert ExecutorRegistry.submit_after(0, ExecutorRegistry.io_pool, lambda: None) is None
+    assert ExecutorRegistry.ui_pool not in ExecutorRegistry.executors #No new pool was started
+
+def test_shutdown_cancels_timers():
+    ran = threading.Event()
+    timer = ExecutorRegistry.submit_after(10, ExecutorRegistry.io_pool, ran.set)
+    ExecutorRegistry.shutdown()
+    timer.join(1)
+
+    assert not timer.is_alive() and not ran.is_set()
+
+def run_lane(events: list[tuple[object, int]])->list[int]:
+    lane = SerialLane(ExecutorRegistry.strategy_pool)
+    processed = []
+    started = threading.Event()
+    gate = threading.Event()
+    done = threading.Event()
+
+    def process(value: int):
+        started.set()
+        gate.wait(1) #Hold the first task so the rest queue up behind it
+        processed.append(value)
+
+        if len(lane.pending) == 0:
+            done.set()
+
+    lane.submit("first", process, 0)
+    started.wait(1)
+
+    for key, value in events:
+        lane.submit(key, process, value)
+
+    gate.set()
+    done.wait(1)
+
+    return processed[1:]
+
+def test_lane_coalesces_waiting_keys():
+    assert run_lane([("a", 1), ("b", 2), ("a", 3)]) == [3, 2]
+
+def test_lane_keeps_every_unkeyed_event():
+    assert run_lane([(None, 1), (None, 2), (None, 3)]) == [1, 2, 3]
@@ -0,0 +1,164 @@
+import base64
+import struct
+from pathlib import Path
+import pytest
+import TxDefi
+from TxDefi.DataAccess.Decoders.AnchorIdlLayout import AnchorIdlLayout
+from TxDefi.DataAccess.Decoders.BinaryLayout import BinaryLayout
+from TxDefi.DataAccess.Decoders.PumpDataDecoder import PumpDataDecoder, BondimgCurveData
+from TxDefi.Data.MarketDTOs import RetailTransaction, ExtendedMetadata
+from TxDefi.Data.TransactionInfo import PumpMigration, SwapData
+from TxDefi.Data.MarketEnums import TradeEventType
+
+pump_program_address = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+pump_idl_path = str(Path(TxDefi.__file__).resolve().parent / "DataAccess" / "Decoders" / "idl" / "pumpidl.json")
+
+#Discriminators as emitted on chain; dispatch must land on these whether or not the IDL ships them
+trade_event_discriminator = bytes.fromhex("bddb7fd34ee661ee")
+create_event_discriminator = bytes.fromhex("1b72a94ddeeb6376")
+bonding_curve_discriminator = bytes.fromhex("17b7f83760d8ac60")
+buy_discriminator = bytes.fromhex("66063d1201daebea")
+sell_discriminator = bytes.fromhex("33e685a4017f83ad")
+withdraw_discriminator = bytes.fromhex("b712469c946da122")
+
+mint_key = bytes(range(32))
+user_key = bytes(range(32, 64))
+bonding_curve_key = bytes(range(64, 96))
+
+def borsh_string(value: str)->bytes:
+    encoded = value.encode()
+
+    return struct.pack("<I", len(encoded)) + encoded
+
+def trade_event_bytes(is_buy = True, virtual_token_reserves = 1_000_000_000_000_000)->bytes:
+    return (trade_event_discriminator + mint_key + struct.pack("<QQ?", 150_000_000, 5_000_000_000_000, is_buy) + user_key +
+            struct.pack("<qQQ", 1_736_479_444, 30_150_000_000, virtual_token_reserves))
+
+def create_event_bytes()->bytes:
+    return (create_event_discriminator + borsh_string("Test Token") + borsh_string("TEST") + borsh_string("https://example.com/test.json") +
+            mint_key + bonding_curve_key + user_key)
+
+def bonding_curve_bytes()->bytes:
+    return bonding_curve_discriminator + struct.pack("<5Q?", 1_073_000_000_000_000, 30_000_000_000, 793_100_000_000_000, 0, 1_000_000_000_000_000, False)
+
+@pytest.fixture
+def decoder()->PumpDataDecoder:
+    return PumpDataDecoder(pump_program_address, pump_idl_path, PumpDataDecoder.base58_encoding)
+
+def test_dispatch_table_discriminators(decoder: PumpDataDecoder):
+    names = {discriminator: name for discriminator, (name, _) in decoder.dispatch_table.items()}
+
+    assert names[trade_event_discriminator] == "TradeEvent"
+    assert names[create_event_discriminator] == "CreateEvent"
+    assert names[bonding_curve_discriminator] == "BondingCurve"
+    assert names[buy_discriminator] == "buy"
+    assert names[sell_discriminator] == "sell"
+    assert names[withdraw_discriminator] == "withdraw"
+
+def test_trade_event(decoder: PumpDataDecoder):
+    ret_data = decoder.decode_bytes_data(trade_event_bytes())
+
+    assert isinstance(ret_data, RetailTransaction)
+    assert ret_data.token_address == BinaryLayout.to_address(mint_key)
+    assert ret_data.trader_address == BinaryLayout.to_address(user_key)
+    assert ret_data.is_buy is True
+    assert ret_data.trade_amt_sol == 150_000_000
+    assert ret_data.token_quantity == 5_000_000_000_000
+    assert ret_data.transaction_timestamp == 1_736_479_444
+    assert ret_data.sol_reserves == 30_150_000_000
+    assert ret_data.token_reserves == 1_000_000_000_000_000
+
+def test_repeated_trade_event_is_dropped(decoder: PumpDataDecoder):
+    assert decoder.decode_bytes_data(trade_event_bytes()) is not None
+    assert decoder.decode_bytes_data(trade_event_bytes()) is None #Same mint and reserves as the last event
+    assert decoder.decode_bytes_data(trade_event_bytes(virtual_token_reserves=999)) is not None
+
+def test_create_event(decoder: PumpDataDecoder):
+    ret_data = decoder.decode_bytes_data(create_event_bytes())
+
+    assert isinstance(ret_data, ExtendedMetadata)
+    assert ret_data.name == "Test Token"
+    assert ret_data.symbol == "TEST"
+    assert ret_data.inner_metadata_uri == "https://example.com/test.json"
+    assert ret_data.token_address == BinaryLayout.to_address(mint_key)
+    assert ret_data.sol_vault_address == BinaryLayout.to_address(bonding_curve_key)
+    assert ret_data.creator_address == BinaryLayout.to_address(user_key)
+    assert ret_data.program_id == pump_program_address
+
+def test_create_event_from_log(decoder: PumpDataDecoder):
+    log = "Program data: " + base64.b64encode(create_event_bytes()).decode()
+    ret_data = decoder.decode_log(log)
+
+    assert isinstance(ret_data, ExtendedMetadata)
+    assert ret_data.symbol == "TEST"
+
+def test_bonding_curve_account(decoder: PumpDataDecoder):
+    for ret_data in [decoder.decode_bytes_data(bonding_curve_bytes()), decoder.decode_bonding_curve(bonding_curve_bytes())]:
+        assert isinstance(ret_data, BondimgCurveData)
+        assert ret_data.virtual_token_reserves == 1_073_000_000_000_000
+        assert ret_data.virtual_sol_reserves == 30_000_000_000
+        assert ret_data.real_token_reserves == 793_100_000_000_000
+        assert ret_data.real_sol_reserves == 0
+        assert ret_data.token_total_supply == 1_000_000_000_000_000
+        assert ret_data.complete is False
+
+def test_buy_and_sell_instructions(decoder: PumpDataDecoder):
+    buy_data = decoder.decode_bytes_data(buy_discriminator + struct.pack("<QQ", 5_000_000, 110_000_000))
+    sell_data = decoder.decode_bytes_data(sell_discriminator + struct.pack("<QQ", 5_000_000, 90_000_000))
+
+    assert isinstance(buy_data, SwapData) and buy_data.get_type() == TradeEventType.BUY
+    assert (buy_data.in_amount, buy_data.out_amount) == (110_000_000, 5_000_000)
+    assert isinstance(sell_data, SwapData) and sell_data.get_type() == TradeEventType.SELL
+    assert (sell_data.in_amount, sell_data.out_amount) == (5_000_000, 90_000_000)
+
+def test_withdraw_and_migration(decoder: PumpDataDecoder):
+    for data in [withdraw_discriminator, PumpDataDecoder.pump_migration_id_bytes, PumpDataDecoder.pump_amm_migration_event_bytes + bytes(16)]:
+        assert isinstance(decoder.decode_bytes_data(data), PumpMigration)
+
+def test_create_instruction_fills_accounts(decoder: PumpDataDecoder):
+    create_discriminator = AnchorIdlLayout.get_discriminator("global", "create")
+    data = create_discriminator + borsh_string("Test Token") + borsh_string("TEST") + borsh_string("https://example.com/test.json")
+    accounts = [f"account{index}" for index in range(14)]
+    ret_data = decoder.decode({"data": [base64.b64encode(data).decode(), PumpDataDecoder.base64_encoding], "accounts": accounts})
+
+    assert isinstance(ret_data, ExtendedMetadata)
+    assert ret_data.inner_metadata_uri == "https://example.com/test.json"
+    assert (ret_data.token_address, ret_data.sol_vault_address, ret_data.token_vault_address) == ("account0", "account2", "account3")
+
+@pytest.mark.parametrize("data", [trade_event_bytes()[:-1], create_event_bytes()[:-1], bonding_curve_bytes()[:-1], buy_discriminator + bytes(15),
+                                  create_event_discriminator + struct.pack("<I", 1000) + b"short", trade_event_discriminator, b""])
+def test_short_payload(decoder: PumpDataDecoder, data: bytes):
+    assert decoder.decode_bytes_data(data) is None
+
+def test_unknown_discriminator(decoder: PumpDataDecoder):
+    assert decoder.decode_bytes_data(bytes(8) + trade_event_bytes()[8:]) is None
+    assert decoder.decode_bonding_curve(bytes(8) + bonding_curve_bytes()[8:]) is None
+    assert decoder.decode_bonding_curve(trade_event_bytes()) is None
+    assert decoder.decode_bonding_curve(None) is None
+
+def test_unsupported_idl_type():
+    with pytest.raises(ValueError):
+        AnchorIdlLayout("Bad", [{"name": "values", "type": {"vec": "u64"}}])
+
+#Same payloads through the anchorpy coders the decoder replaced
+def test_matches_anchorpy():
+    anchorpy = pytest.importorskip("anchorpy")
+    coder = anchorpy.Coder(anchorpy.Idl.from_json(Path(pump_idl_path).read_text()))
+    decoder = PumpDataDecoder(pump_program_address, pump_idl_path, PumpDataDecoder.base58_encoding)
+
+    for data in [trade_event_bytes(), create_event_bytes()]:
+        expected = coder.events.parse(data)
+        actual = decoder.parse_event(data)
+
+        assert actual.name == expected.name
+
+        for field_name, value in actual.data._asdict().items():
+            expected_value = getattr(expected.data, field_name)
+            assert value == (bytes(expected_value) if isinstance(value, bytes) else expected_value)
+
+    for data in [buy_discriminator + struct.pack("<QQ", 5_000_000, 110_000_000), sell_discriminator + struct.pack("<QQ", 5_000_000, 90_000_000)]:
+        expected = coder.instruction.parse(data)
+        actual = decoder.parse_event(data)
+
+        assert actual.name == expected.name
+        assert actual.data._asdict() == {field_name: getattr(expected.data, field_name) for field_name in actual.data._fields}
@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from TxDefi.Utilities.RateLimiter import RateLimiter
+from TxDefi.DataAccess.Blockchains.Solana.RpcRouter import RpcRouter, RpcEndpoint
+
+ok_body = b'{"jsonrpc":"2.0","result":250000000,"id":1}'
+error_body = b'{"jsonrpc":"2.0","error":{"code":-32005,"message":"Node is behind"},"id":1}'
+
+#Stands in for RpcTransport; every endpoint answers with the same body
+class BodyTransport:
+    def __init__(self, content: bytes, status_code = 200):
+        self.content = content
+        self.status_code = status_code
+        self.posts = 0
+
+    async def post(self, uri: str, json_request: dict | list):
+        self.posts += 1
+
+        return SimpleNamespace(status_code=self.status_code, content=self.content)
+
+def get_response(content: bytes, status_code = 200):
+    return SimpleNamespace(status_code=status_code, content=content)
+
+@pytest.mark.parametrize("response, is_error", [(get_response(ok_body), False), (get_response(error_body), True), (get_response(ok_body, 429), True),
+                                                (get_response(b"[" + error_body + b"," + ok_body + b"]"), False), (get_response(b"[" + error_body + b"]"), True)])
+def test_is_error_response(response, is_error: bool):
+    assert RpcRouter.is_error_response(response) == is_error
+
+def test_error_body_counts_against_endpoint():
+    router = RpcRouter(BodyTransport(error_body), [RpcEndpoint("http://a"), RpcEndpoint("http://b")])
+    asyncio.run(router.post({}))
+
+    assert sum(endpoint.get_error_rate() for endpoint in router.endpoints) == 1
+
+def test_slot_polls_are_charged_to_limiter():
+    rate_limiter = RateLimiter(10)
+    transport = BodyTransport(ok_body)
+    router = RpcRouter(transport, [RpcEndpoint("http://a"), RpcEndpoint("http://b")], rate_limiter=rate_limiter)
+
+    async def poll():
+        await asyncio.gather(*[router._update_slot(endpoint) for endpoint in router.endpoints])
+
+    asyncio.run(poll())
+
+    assert rate_limiter.total_acquired == 2 and transport.posts == 2
+    assert router.max_slot == 250000000
+
+def test_slot_polls_stop_with_limiter():
+    rate_limiter = RateLimiter(10)
+    rate_limiter.stop()
+    transport = BodyTransport(ok_body)
+    router = RpcRouter(transport, [RpcEndpoint("http://a"), RpcEndpoint("http://b")], rate_limiter=rate_limiter)
+    asyncio.run(router._update_slot(router.endpoints[0]))
+
+    assert transport.posts == 0
@@ -0,0 +1,112 @@
+import threading
+import pytest
+from TxDefi.Data.TransactionStore import TransactionStore
+from TxDefi.Data.TransactionInfo import InstructionInfo, LiquidityPoolData, ParsedTransaction
+from TxDefi.Data.MarketEnums import TradeEventType
+
+def get_transaction(tx_signature: str, slot: int, token_address: str = None, log_messages: list[str] = None)->ParsedTransaction:
+    instructions = []
+
+    if token_address:
+        instruction_data = LiquidityPoolData(TradeEventType.ADD_LIQUIDITY, 0, 0)
+        instruction_data.token_address = token_address
+        instructions.append(InstructionInfo(instruction_data.get_type(), [], instruction_data))
+
+    return ParsedTransaction(tx_signature, slot, "payer", [], [], [], {}, {}, 5000, instructions, log_messages or [])
+
+def test_add_and_get():
+    store = TransactionStore()
+    transaction = get_transaction("sig1", 10, "mint1")
+    store.add(transaction)
+
+    assert store.get("sig1") is transaction
+    assert store.get("missing") is None
+    assert "sig1" in store and len(store) == 1
+    assert store.get_stats()["hit_rate"] == .5
+
+def test_indexes():
+    store = TransactionStore()
+
+    for index, (slot, token_address) in enumerate([(10, "mint1"), (10, "mint2"), (11, "mint1")]):
+        store.add(get_transaction(f"sig{index}", slot, token_address))
+
+    assert [transaction.tx_signature for transaction in store.get_by_mint("mint1")] == ["sig2", "sig0"] #Newest first
+    assert [transaction.tx_signature for transaction in store.get_by_slot(10)] == ["sig0", "sig1"]
+    assert store.get_by_mint("mint3") == []
+
+    store.pop("sig0")
+
+    assert [transaction.tx_signature for transaction in store.get_by_mint("mint1")] == ["sig2"]
+    assert [transaction.tx_signature for transaction in store.get_by_slot(10)] == ["sig1"]
+
+def test_evicts_oldest_by_count():
+    store = TransactionStore(max_count=2)
+
+    for index in range(3):
+        store.add(get_transaction(f"sig{index}", index, f"mint{index}"))
+
+    assert "sig0" not in store and "sig1" in store and "sig2" in store
+    assert store.get_by_mint("mint0") == [] and store.get_by_slot(0) == []
+    assert store.get_stats()["evictions"] == 1
+    assert store.get_stats()["mints"] == 2
+
+def test_evicts_oldest_by_bytes():
+    transaction_size = get_transaction("sig", 0, "mint").get_size_estimate()
+    store = TransactionStore(max_bytes=2*transaction_size + 1)
+
+    for index in range(3):
+        store.add(get_transaction(f"sig{index}", index, "mint"))
+
+    assert len(store) == 2 and "sig0" not in store
+    assert store.total_bytes == 2*transaction_size
+
+def test_oversized_transaction_is_kept():
+    store = TransactionStore(max_bytes=1)
+    store.add(get_transaction("sig0", 0, log_messages=["x"*1000]))
+
+    assert "sig0" in store
+
+def test_readd_replaces_entry():
+    store = TransactionStore()
+    store.add(get_transaction("sig0", 10, "mint1"))
+    store.add(get_transaction("sig0", 11, "mint2"))
+
+    assert len(store) == 1
+    assert store.get_by_mint("mint1") == [] and store.get_by_slot(10) == []
+    assert store.total_bytes == store.entries["sig0"].size
+
+def test_find_by_mint():
+    store = TransactionStore()
+    store.add(get_transaction("sig0", 10, "mint1"))
+    store.add(get_transaction("sig1", 11, "mint1"))
+
+    assert store.find_by_mint("mint1", lambda transaction: transaction.slot == 10).tx_signature == "sig0"
+    assert store.find_by_mint("mint1", lambda transaction: True).tx_signature == "sig1"
+    assert store.find_by_mint("mint1", lambda transaction: False) is None
+    assert store.find_by_mint("mint2", lambda transaction: True) is None
+    assert (store.hits, store.misses) == (2, 2)
+
+def test_concurrent_lookups_are_counted():
+    store = TransactionStore()
+    store.add(get_transaction("sig0", 10, "mint1"))
+    thread_count = 8
+    lookups_per_thread = 2000
+
+    def lookup():
+        for index in range(lookups_per_thread):
+            store.get("sig0")
+            store.find_by_mint("mint1", lambda transaction: index % 2 == 0)
+
+    threads = [threading.Thread(target=lookup) for _ in range(thread_count)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    stats = store.get_stats()
+
+    assert stats["hits"] + stats["misses"] == 2*thread_count*lookups_per_thread
+    assert stats["misses"] == thread_count*lookups_per_thread//2
+    assert stats["hit_rate"] == pytest.approx(.75)